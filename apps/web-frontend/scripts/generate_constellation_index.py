@@ -1,102 +1,162 @@
 #!/usr/bin/env python3
 """
-Generate a comprehensive constellation_index.json that includes
-constellations from ALL skycultures for cross-culture search support.
+Generate the cross-culture constellation index used for search: the
+constellations of ALL skycultures, split so that the frontend only loads
+the active culture eagerly.
+
+Output (public/skydata/constellations/):
+  index.json       version and number of constellations of each culture
+  <culture>.json   one culture: its deduplicated name table and column
+                   arrays of ids and of the english, native, pronounce
+                   and iau names as positions in the name table (-1 when
+                   missing)
+  lookup.json      normalized name -> [[culture, position], ...] over all
+                   the cultures, for cross-culture search
 """
 
+import argparse
 import json
 import os
+import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+INDEX_VERSION = 1
+NAME_FIELDS = ('english', 'native', 'pronounce', 'iau')
+
+# Same normalization as the frontend search (search_engine.js)
+NORMALIZE_RE = re.compile(r"""[\s.,\-'"]+""")
+
+def normalize(name):
+    return NORMALIZE_RE.sub('', name.upper())
+
+def parse_culture(culture_index):
+    """
+    Read the constellations of one skyculture index.json.
+    Returns (constellations, error): a list of {id, english, native,
+    pronounce, iau} with the missing names left out.
+    """
+    try:
+        with open(culture_index, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except Exception as e:
+        return [], str(e)
+
+    constellations = []
+    for con in data.get("constellations", []):
+        common_name = con.get("common_name", {})
+        entry = {"id": con.get("id", "")}
+        for field in ('english', 'native', 'pronounce'):
+            if common_name.get(field):
+                entry[field] = common_name[field]
+        if con.get("iau"):
+            entry["iau"] = con["iau"]
+        constellations.append(entry)
+    return constellations, None
+
+def parse_cultures(culture_indexes, workers=1):
+    """Parse culture index files, in a process pool if workers > 1 (results in order)"""
+    if workers <= 1:
+        return list(map(parse_culture, culture_indexes))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(parse_culture, culture_indexes))
+
+def searchable_names(con):
+    """Names a constellation is found by, without repetitions"""
+    names = []
+    for field in NAME_FIELDS:
+        name = con.get(field)
+        if name and name not in names:
+            names.append(name)
+    return names
+
+def build_culture(culture, constellations):
+    """Shard of one culture, constellations sorted by id"""
+    cons = sorted(constellations, key=lambda con: con["id"])
+    names = list(dict.fromkeys(name for con in cons for name in searchable_names(con)))
+    name_ids = {name: i for i, name in enumerate(names)}
+    shard = {"culture": culture, "names": names, "ids": [con["id"] for con in cons]}
+    for field in NAME_FIELDS:
+        shard[field] = [name_ids[con[field]] if con.get(field) else -1 for con in cons]
+    return shard
+
+def build_index(by_culture):
+    """
+    Build the index, the culture shards and the lookup from
+    {culture: constellations}.  Returns (index, {culture: shard}, lookup).
+    """
+    shards = {culture: build_culture(culture, by_culture[culture])
+              for culture in sorted(by_culture)}
+    lookup = {}
+    for culture, shard in shards.items():
+        for pos in range(len(shard["ids"])):
+            names = (shard["names"][shard[field][pos]] for field in NAME_FIELDS
+                     if shard[field][pos] >= 0)
+            for key in dict.fromkeys(normalize(name) for name in names):
+                if key:
+                    lookup.setdefault(key, []).append([culture, pos])
+
+    index = {
+        "version": INDEX_VERSION,
+        "cultures": {culture: len(shard["ids"]) for culture, shard in shards.items()},
+    }
+    return index, shards, dict(sorted(lookup.items()))
+
+def write_json(data, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+
 def main():
-    # Paths
     base_dir = Path(__file__).parent.parent
-    skycultures_dir = base_dir / "public" / "skydata" / "skycultures"
-    output_file = base_dir / "public" / "skydata" / "constellation_index.json"
-    
+    parser = argparse.ArgumentParser(description='Generate the cross-culture constellation index')
+    parser.add_argument('--skycultures', type=Path,
+                        default=base_dir / "public" / "skydata" / "skycultures")
+    parser.add_argument('--output', type=Path,
+                        default=base_dir / "public" / "skydata" / "constellations")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Number of processes parsing the culture files')
+    args = parser.parse_args()
+
     # Load skycultures index
-    cultures_index_file = skycultures_dir / "index.json"
-    with open(cultures_index_file, 'r', encoding='utf-8') as f:
+    with open(args.skycultures / "index.json", 'r', encoding='utf-8') as f:
         cultures = json.load(f)
-    
+
     print(f"Found {len(cultures)} skycultures: {cultures}")
-    
-    all_constellations = []
-    
-    for culture in cultures:
-        culture_dir = skycultures_dir / culture
-        culture_index = culture_dir / "index.json"
-        
-        if not culture_index.exists():
-            print(f"  Skipping {culture}: no index.json found")
-            continue
-        
-        try:
-            with open(culture_index, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-        except Exception as e:
-            print(f"  Error loading {culture}: {e}")
+
+    found = [c for c in cultures if (args.skycultures / c / "index.json").exists()]
+    for culture in sorted(set(cultures) - set(found)):
+        print(f"  Skipping {culture}: no index.json found")
+
+    by_culture = {}
+    parsed = parse_cultures([args.skycultures / c / "index.json" for c in found], args.workers)
+    for culture, (constellations, error) in zip(found, parsed):
+        if error:
+            print(f"  Error loading {culture}: {error}")
             continue
-        
-        constellations = data.get("constellations", [])
         print(f"  {culture}: {len(constellations)} constellations")
-        
-        for con in constellations:
-            con_id = con.get("id", "")
-            common_name = con.get("common_name", {})
-            
-            # Extract names
-            english = common_name.get("english", "")
-            native = common_name.get("native", "")
-            pronounce = common_name.get("pronounce", "")
-            iau = con.get("iau", "")
-            
-            # Build list of searchable names
-            names = []
-            if english:
-                names.append(english)
-            if native and native != english:
-                names.append(native)
-            if pronounce and pronounce not in names:
-                names.append(pronounce)
-            if iau and iau not in names:
-                names.append(iau)
-            
-            # Create entry
-            entry = {
-                "id": con_id,
-                "culture": culture,
-                "names": names
-            }
-            
-            # Add optional fields if they exist
-            if iau:
-                entry["iau"] = iau
-            if english:
-                entry["english"] = english
-            if native:
-                entry["native"] = native
-            if pronounce:
-                entry["pronounce"] = pronounce
-            
-            all_constellations.append(entry)
-    
-    print(f"\nTotal constellations: {len(all_constellations)}")
-    
-    # Sort by culture, then by id
-    all_constellations.sort(key=lambda x: (x["culture"], x["id"]))
-    
-    # Write output
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(all_constellations, f, indent=2, ensure_ascii=False)
-    
-    print(f"Written to: {output_file}")
-    
+        by_culture[culture] = constellations
+
+    index, shards, lookup = build_index(by_culture)
+
+    # Write output, removing the shards of cultures that are gone
+    args.output.mkdir(parents=True, exist_ok=True)
+    for old in args.output.glob('*.json'):
+        if old.stem not in ('index', 'lookup') and old.stem not in shards:
+            old.unlink()
+    for culture, shard in shards.items():
+        write_json(shard, args.output / f"{culture}.json")
+    write_json(lookup, args.output / "lookup.json")
+    write_json(index, args.output / "index.json")
+
+    total = sum(index["cultures"].values())
+    size = sum(p.stat().st_size for p in args.output.glob('*.json'))
+    print(f"\nTotal constellations: {total}, {len(lookup)} lookup keys")
+    print(f"Written to: {args.output} ({len(shards)} culture files, {size / 1024:.0f} KB, "
+          f"lookup.json {(args.output / 'lookup.json').stat().st_size / 1024:.0f} KB)")
+
     # Show summary by culture
     print("\nSummary by culture:")
-    from collections import Counter
-    culture_counts = Counter(c["culture"] for c in all_constellations)
-    for culture, count in sorted(culture_counts.items()):
+    for culture, count in index["cultures"].items():
         print(f"  {culture}: {count}")
 
 if __name__ == "__main__":
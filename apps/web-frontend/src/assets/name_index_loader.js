@@ -171,47 +171,98 @@ class NameIndexLoader {
 
 /**
  * Constellation Index Loader
- * Loads constellation data from skycultures
+ * Loads constellation data from skycultures, one culture at a time:
+ * constellations/index.json lists the cultures, constellations/<culture>.json
+ * holds the constellations of one culture (written by
+ * scripts/generate_constellation_index.py)
  */
+const CONSTELLATIONS_URL = 'skydata/constellations/'
+
+function fetchJson (url) {
+  return fetch(url).then(response => {
+    if (!response.ok) {
+      throw new Error('Failed to load ' + url)
+    }
+    return response.json()
+  })
+}
+
 class ConstellationLoader {
   constructor () {
-    this.constellations = null
-    this.loading = false
+    this.index = null
     this.loadPromise = null
+    this.cultures = {}
+    this.lookupPromise = null
   }
 
+  /**
+     * Load the culture list and the constellations of the active culture
+     * @returns {Promise<Object>} The index ({version, cultures: {culture: count}})
+     */
   async load () {
-    if (this.constellations) {
-      return Promise.resolve(this.constellations)
+    if (!this.loadPromise) {
+      this.loadPromise = fetchJson(CONSTELLATIONS_URL + 'index.json')
+        .then(index => {
+          this.index = index
+          return this.currentCulture()
+        })
+        .then(culture => this.loadCulture(culture).catch(() => []))
+        .then(() => this.index)
+        .catch(error => {
+          this.loadPromise = null
+          console.error('Failed to load constellation index:', error)
+          return { cultures: {} }
+        })
     }
+    return this.loadPromise
+  }
 
-    if (this.loading && this.loadPromise) {
-      return this.loadPromise
+  /**
+     * Constellations of one culture, fetched on first use
+     * @param {string} culture - Skyculture id
+     * @returns {Promise<Array>} Constellation objects
+     *   {id, culture, names, english, native, pronounce, iau}
+     */
+  loadCulture (culture) {
+    if (!this.cultures[culture]) {
+      this.cultures[culture] = fetchJson(CONSTELLATIONS_URL + culture + '.json')
+        .then(shard => {
+          const fields = ['english', 'native', 'pronounce', 'iau']
+          const constellations = shard.ids.map((id, i) => {
+            const con = { id, culture, names: [] }
+            for (const field of fields) {
+              const name = shard[field][i] >= 0 ? shard.names[shard[field][i]] : null
+              if (!name) continue
+              con[field] = name
+              if (!con.names.includes(name)) con.names.push(name)
+            }
+            return con
+          })
+          console.log('Constellation index loaded:', constellations.length, 'constellations in', culture)
+          return constellations
+        })
+        .catch(error => {
+          delete this.cultures[culture]
+          throw error
+        })
     }
+    return this.cultures[culture]
+  }
 
-    this.loading = true
-    this.loadPromise = fetch('skydata/constellation_index.json')
-      .then(response => {
-        if (!response.ok) {
-          throw new Error('Failed to load constellation index')
-        }
-        return response.json()
-      })
-      .then(data => {
-        this.constellations = data
-        this.loading = false
-        console.log('Constellation index loaded:', this.constellations.length, 'constellations')
-        return this.constellations
-      })
-      .catch(error => {
-        this.loading = false
-        this.loadPromise = null
-        console.error('Failed to load constellation index:', error)
-        this.constellations = []
-        return this.constellations
-      })
-
-    return this.loadPromise
+  /**
+     * Current skyculture from the engine (or western by default)
+     * @returns {Promise<string>} Skyculture id
+     */
+  async currentCulture () {
+    try {
+      const Vue = (await import('vue')).default
+      if (Vue.prototype.$stel && Vue.prototype.$stel.core && Vue.prototype.$stel.core.skycultures) {
+        return Vue.prototype.$stel.core.skycultures.current_id || 'western'
+      }
+    } catch (e) {
+      // Fallback to western if can't get current culture
+    }
+    return 'western'
   }
 
   normalize (str) {
@@ -220,35 +271,53 @@ class ConstellationLoader {
   }
 
   /**
-     * Search constellations by name
+     * Constellations of all the cultures with a name equal to name (after
+     * normalization).  Loads the cross-culture lookup and the cultures of
+     * the matches on demand.
+     * @param {string} name - Constellation name
+     * @returns {Promise<Array>} Matching constellation objects
+     */
+  async lookupName (name) {
+    if (!this.lookupPromise) {
+      this.lookupPromise = fetchJson(CONSTELLATIONS_URL + 'lookup.json')
+        .catch(error => {
+          this.lookupPromise = null
+          throw error
+        })
+    }
+    const lookup = await this.lookupPromise
+    const matches = lookup[this.normalize(name)] || []
+    const constellations = await Promise.all(matches.map(([culture, pos]) =>
+      this.loadCulture(culture).then(constellations => constellations[pos])))
+    return constellations.filter(con => con)
+  }
+
+  /**
+     * Search constellations by name in the active culture, or if none
+     * matches, exact name matches in the other cultures (see lookupName)
      * @param {string} query - Search query
      * @param {number} limit - Maximum results
      * @returns {Promise<Array>} Matching constellation objects
      */
   async searchConstellations (query, limit = 10) {
-    const constellations = await this.load()
-    if (!query || constellations.length === 0) {
+    if (!query) {
       return []
     }
 
     const queryNorm = this.normalize(query)
     if (!queryNorm) return []
 
-    // Get current skyculture from Vue store (or default to western)
-    let currentCulture = 'western'
+    // IMPORTANT: Search the CURRENT active culture first
+    // The engine's getObj() only works for constellations in the active skyculture
+    await this.load()
+    const allowedCulture = await this.currentCulture()
+    let constellations
     try {
-      const Vue = (await import('vue')).default
-      if (Vue.prototype.$stel && Vue.prototype.$stel.core && Vue.prototype.$stel.core.skycultures) {
-        currentCulture = Vue.prototype.$stel.core.skycultures.current_id || 'western'
-      }
+      constellations = await this.loadCulture(allowedCulture)
     } catch (e) {
-      // Fallback to western if can't get current culture
+      return []
     }
 
-    // IMPORTANT: Only show constellations from the CURRENT active culture
-    // The engine's getObj() only works for constellations in the active skyculture
-    const allowedCulture = currentCulture
-
     const exactMatches = []
     const startsWithMatches = []
     const containsMatches = []
@@ -258,24 +327,9 @@ class ConstellationLoader {
         break
       }
 
-      // Only show constellations from the current active culture
-      if (con.culture && con.culture !== allowedCulture) {
-        continue
-      }
-
-      // Check all names from the 'names' array (includes english, native, pronounce, iau)
-      // Also check individual fields for backwards compatibility
-      const allNames = [
-        ...(con.names || []),
-        con.native,
-        con.english,
-        con.iau,
-        con.pronounce
-      ].filter(n => n)
-
       let matchType = null
 
-      for (const name of allNames) {
+      for (const name of con.names) {
         const nameNorm = this.normalize(name)
         if (nameNorm === queryNorm) {
           matchType = 'exact'
@@ -296,11 +350,22 @@ class ConstellationLoader {
       }
     }
 
-    return [
+    const results = [
       ...exactMatches,
       ...startsWithMatches,
       ...containsMatches
     ].slice(0, limit)
+    if (results.length) {
+      return results
+    }
+
+    // No match in the active culture: constellations of the other cultures
+    // named like the query (selecting one switches the skyculture)
+    try {
+      return (await this.lookupName(query)).slice(0, limit)
+    } catch (e) {
+      return []
+    }
   }
 }
 
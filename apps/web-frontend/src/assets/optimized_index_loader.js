@@ -1,9 +1,47 @@
 import axios from 'axios'
 
 const INDEX_URL = 'skydata/search_index.json'
+// Sharded index written by generate_search_index.py --shards: manifest.json
+// lists the first normalized name of each shard <i>.json
+const SHARDS_URL = 'skydata/search_index/'
 
 let indexData = null
 let loadingPromise = null
+let manifest = null
+const shardPromises = {}
+
+// Index of the last boundary <= key
+function shardIndex (boundaries, key) {
+  let lo = 0
+  let hi = boundaries.length - 1
+  while (lo < hi) {
+    const mid = Math.ceil((lo + hi) / 2)
+    if (boundaries[mid] <= key) lo = mid
+    else hi = mid - 1
+  }
+  return lo
+}
+
+function loadShard (i) {
+  if (!shardPromises[i]) {
+    shardPromises[i] = axios.get(SHARDS_URL + i + '.json').then(response => response.data)
+      .catch(err => {
+        delete shardPromises[i]
+        throw err
+      })
+  }
+  return shardPromises[i]
+}
+
+// The indexes (full index or shards) that can hold names starting with prefix
+async function indexesFor (prefix) {
+  if (!manifest) return [indexData]
+  const first = shardIndex(manifest.boundaries, prefix)
+  const last = shardIndex(manifest.boundaries, prefix + '\uffff')
+  const shards = []
+  for (let i = first; i <= last; i++) shards.push(loadShard(i))
+  return Promise.all(shards)
+}
 
 // Binary search implementation for prefix matching
 function binarySearchRange (arr, prefix) {
@@ -66,14 +104,18 @@ function parseEntry (entry, typeOverride = null) {
 }
 
 export default {
+  // Loads the shard manifest, or the full index if there is no sharded one
   async loadIndex () {
-    if (indexData) return indexData
+    if (indexData || manifest) return indexData || manifest
     if (loadingPromise) return loadingPromise
 
-    loadingPromise = axios.get(INDEX_URL).then(response => {
+    loadingPromise = axios.get(SHARDS_URL + 'manifest.json').then(response => {
+      manifest = response.data
+      return manifest
+    }).catch(() => axios.get(INDEX_URL).then(response => {
       indexData = response.data
       return indexData
-    }).catch(err => {
+    })).catch(err => {
       console.error('Failed to load search index', err)
       loadingPromise = null
       throw err
@@ -83,16 +125,20 @@ export default {
   },
 
   async search (normalizedQuery, limit = 10, filters = {}) {
-    if (!indexData) await this.loadIndex()
+    if (!indexData && !manifest) await this.loadIndex()
     if (!normalizedQuery) return []
 
+    const indexes = await indexesFor(normalizedQuery)
     const results = []
 
     // Search Stars
     if (filters.stars) {
-      const matches = binarySearchRange(indexData.stars, normalizedQuery)
-      for (const m of matches) {
-        results.push(parseEntry(m, 'star'))
+      for (const index of indexes) {
+        const matches = binarySearchRange(index.stars, normalizedQuery)
+        for (const m of matches) {
+          results.push(parseEntry(m, 'star'))
+          if (results.length >= limit) break
+        }
         if (results.length >= limit) break
       }
     }
@@ -122,10 +168,12 @@ export default {
 
     // We can prioritize based on categories or mix them
     for (const cat of dsoCategories) {
-      const matches = binarySearchRange(indexData.dsos[cat], normalizedQuery)
-      for (const m of matches) {
-        results.push(parseEntry(m)) // Type is in the entry string
-        if (results.length >= limit * 2) break // Collect a bit more to sort later
+      for (const index of indexes) {
+        const matches = binarySearchRange(index.dsos[cat], normalizedQuery)
+        for (const m of matches) {
+          results.push(parseEntry(m)) // Type is in the entry string
+          if (results.length >= limit * 2) break // Collect a bit more to sort later
+        }
       }
     }
 
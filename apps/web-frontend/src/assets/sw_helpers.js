@@ -837,7 +837,8 @@ const swh = {
             model: 'constellation',
             model_data: {
               iau_abbreviation: con.iau,
-              con_id: con.id
+              con_id: con.id,
+              culture: con.culture
             },
             match: matchedName
           })
@@ -0,0 +1,58 @@
+"""
+Micro-benchmark of the EPH byte (un)shuffling.
+Compares the vectorized routines of eph.py with the original per-byte loop.
+Usage: python bench_eph_shuffle.py [n_rows] [row_size]
+"""
+
+import os
+import sys
+import time
+
+from eph import shuffle_bytes, unshuffle_bytes
+
+def unshuffle_bytes_loop(data, row_size, num_rows):
+    """Reference implementation: reverse byte shuffling one byte at a time"""
+    total_size = row_size * num_rows
+    if len(data) < total_size:
+        return data
+
+    unshuffled = bytearray(total_size)
+    for i in range(num_rows):
+        for j in range(row_size):
+            unshuffled[i * row_size + j] = data[j * num_rows + i]
+
+    return bytes(unshuffled)
+
+def timeit(func, *args, repeat=5):
+    """Return the best time of repeat calls, in seconds"""
+    best = None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        func(*args)
+        t = time.perf_counter() - t
+        best = t if best is None else min(best, t)
+    return best
+
+def main():
+    # Default to a full star tile (1024 rows of 292 bytes)
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    row_size = int(sys.argv[2]) if len(sys.argv) > 2 else 292
+
+    table = os.urandom(n_rows * row_size)
+    shuffled = shuffle_bytes(table, row_size, n_rows)
+
+    # Check that both implementations agree before timing them
+    assert unshuffle_bytes(shuffled, row_size, n_rows) == table
+    assert unshuffle_bytes_loop(shuffled, row_size, n_rows) == table
+
+    t_loop = timeit(unshuffle_bytes_loop, shuffled, row_size, n_rows, repeat=3)
+    t_numpy = timeit(unshuffle_bytes, shuffled, row_size, n_rows)
+    t_shuffle = timeit(shuffle_bytes, table, row_size, n_rows)
+
+    print(f"Table: {n_rows} rows x {row_size} bytes ({len(table):,} bytes)")
+    print(f"  unshuffle (loop):  {t_loop * 1000:10.3f} ms")
+    print(f"  unshuffle (numpy): {t_numpy * 1000:10.3f} ms  ({t_loop / t_numpy:.0f}x faster)")
+    print(f"  shuffle   (numpy): {t_shuffle * 1000:10.3f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark of the search_sky.py text searches.
+Compares the FTS5 trigram index with the original LIKE scan on the search
+databases created by create_search_index.py, and checks that both return
+the same objects.
+Usage: python bench_search_fts.py [query ...]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+from search_sky import search_dsos, search_stars
+
+DSO_DB = Path('dso_extracted/dso_search.db')
+STAR_DB = Path('stars_extracted/star_search.db')
+
+DEFAULT_QUERIES = ['NGC 224', 'Andromeda', 'Pleiades', 'Orion', 'Nebula',
+                   'Cluster', 'Sirius', 'Vega', 'Betelgeuse', 'IC 434']
+
+def timeit(func, *args, repeat=20):
+    """Return the best time of repeat calls, in seconds"""
+    best = None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        func(*args)
+        t = time.perf_counter() - t
+        best = t if best is None else min(best, t)
+    return best
+
+def bench(name, search, db_file, queries):
+    """Time one search function with and without the FTS index"""
+    if not db_file.exists():
+        print(f"⚠ Database not found: {db_file}")
+        return
+
+    print(f"\n{name} ({db_file})")
+    print(f"  {'Query':<16} {'Matches':>8} {'LIKE (ms)':>11} {'FTS (ms)':>10} {'Speedup':>8}")
+    total_like = total_fts = 0
+    for query in queries:
+        # LIMIT -1 is no limit in SQLite: compare the complete match sets
+        like = search(query, db_file, -1, False)
+        fts = search(query, db_file, -1, True)
+        if sorted(map(repr, like)) != sorted(map(repr, fts)):
+            print(f"  ⚠ '{query}': LIKE found {len(like)}, FTS found {len(fts)}")
+
+        t_like = timeit(search, query, db_file, 20, False)
+        t_fts = timeit(search, query, db_file, 20, True)
+        total_like += t_like
+        total_fts += t_fts
+        print(f"  {query:<16} {len(like):>8} {t_like * 1000:>11.3f} {t_fts * 1000:>10.3f} "
+              f"{t_like / t_fts:>7.1f}x")
+    print(f"  {'Total':<16} {'':>8} {total_like * 1000:>11.3f} {total_fts * 1000:>10.3f} "
+          f"{total_like / total_fts:>7.1f}x")
+
+def main():
+    queries = sys.argv[1:] or DEFAULT_QUERIES
+
+    print("="*80)
+    print("Search latency: LIKE scan vs FTS5 trigram index (best of 20, limit 20)")
+    print("="*80)
+    bench("DSOs", search_dsos, DSO_DB, queries)
+    bench("Stars", search_stars, STAR_DB, queries)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Load test of search_service.py: concurrent keep-alive clients replaying a
+mix of autocomplete, resolve and cone queries.  Reports throughput and the
+p50 / p99 latency per endpoint.
+Usage: python bench_search_service.py [--host 127.0.0.1] [--port 8765]
+                                      [--clients 16] [--requests 2000]
+Start the service first: python search_service.py
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from urllib.parse import urlencode
+
+# Autocomplete is typed one key at a time
+WORDS = ['Andromeda', 'Betelgeuse', 'Sirius', 'Orion', 'Pleiades', 'Vega', 'Polaris',
+         'M31', 'M42', 'NGC 224', 'NGC 7000', 'HIP 677', 'Alpha Cen', 'Crab', 'Rigel',
+         'Whirlpool', 'Ursa', 'Cassiopeia', 'Sombrero', 'Arcturus']
+
+def make_queries(count, seed=0):
+    """Reproducible list of (endpoint, query string), 70% suggest"""
+    rng = random.Random(seed)
+    queries = []
+    while len(queries) < count:
+        r = rng.random()
+        word = rng.choice(WORDS)
+        if r < 0.7:
+            for n in range(1, len(word) + 1):
+                queries.append(('/suggest', urlencode({'q': word[:n], 'limit': 10})))
+        elif r < 0.9:
+            queries.append(('/resolve', urlencode({'name': word})))
+        else:
+            queries.append(('/cone', urlencode({
+                'ra': round(rng.uniform(0, 360), 1), 'dec': round(rng.uniform(-80, 80), 1),
+                'radius': rng.choice([0.5, 1, 2]), 'max_vmag': 9, 'limit': 50})))
+    return queries[:count]
+
+async def client(host, port, queries, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for path, query in queries:
+            start = time.perf_counter()
+            writer.write(f'GET {path}?{query} HTTP/1.1\r\nHost: {host}\r\n\r\n'.encode())
+            await writer.drain()
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line == b'\r\n':
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                if name.lower() == 'content-length':
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.setdefault(path, []).append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+async def fetch_stats(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f'GET /stats HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n'.encode())
+    data = await reader.read()
+    writer.close()
+    return json.loads(data.split(b'\r\n\r\n', 1)[1])
+
+async def run(args):
+    queries = make_queries(args.requests, args.seed)
+    # Each client replays a contiguous slice, so keystrokes stay in order
+    step = -(-len(queries) // args.clients)
+    latencies, statuses = {}, {}
+    start = time.perf_counter()
+    await asyncio.gather(*(client(args.host, args.port, queries[i:i + step], latencies, statuses)
+                           for i in range(0, len(queries), step)))
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(queries)} requests, {args.clients} clients: {elapsed:.2f} s, "
+          f"{len(queries) / elapsed:.0f} req/s")
+    print(f"Status codes: {dict(sorted(statuses.items()))}")
+    print(f"{'endpoint':<10} {'count':>6} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    everything = [t for values in latencies.values() for t in values]
+    for path, values in sorted(latencies.items()) + [('all', everything)]:
+        print(f"{path:<10} {len(values):>6} {percentile(values, 50) * 1000:>8.2f} "
+              f"{percentile(values, 99) * 1000:>8.2f} {max(values) * 1000:>8.2f}")
+    stats = await fetch_stats(args.host, args.port)
+    print(f"Service: cache {stats['cache']}, {stats['queries']} queries "
+          f"in {stats['batches']} batches")
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test of search_service.py')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,433 @@
+"""
+Streaming writers and columnar loader for the extracted star and DSO catalogs.
+
+The extractors decode the .eph files one tile at a time and pass each tile
+table (dict of column name -> numpy array, see eph.py) to a CatalogWriter,
+which forwards it to the selected sinks.  Nothing is accumulated across
+tiles, so peak memory is bounded by the size of one tile.
+
+Columnar bundle format ('npy' sink, e.g. stars_extracted/star_data_columns/):
+    manifest.json         format, version, row count and ordered column list
+    <col>.npy             numeric columns, one flat array per column
+    <col>.offsets.npy     string columns: uint64 array of count + 1 offsets
+    <col>.blob.npy        string columns: concatenated utf-8 bytes (uint8)
+
+All the files are plain .npy so they can be memory mapped, and a loader only
+opens the columns it is asked for.
+"""
+
+import csv
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from eph import table_len, table_to_rows
+
+# Sink name -> output file suffix
+SINKS = {
+    'json': '.json',    # Indented JSON array (same as json.dump(rows, indent=2))
+    'jsonl': '.jsonl',  # One JSON object per line
+    'csv': '.csv',
+    'txt': '.txt',      # Human readable dump
+    'npy': '_columns',  # Columnar bundle directory, see load_catalog
+}
+
+DEFAULT_SINKS = ('json', 'csv', 'txt', 'npy')
+
+CATALOG_FORMAT = 'catalog-columns'
+CATALOG_VERSION = 1
+
+def parse_sinks(value):
+    """Parse a comma separated list of sink names (for argparse)"""
+    sinks = [s.strip() for s in value.split(',') if s.strip()]
+    for sink in sinks:
+        if sink not in SINKS:
+            raise ValueError(f"Unknown output '{sink}' (choose from {', '.join(SINKS)})")
+    return sinks
+
+class JsonArrayWriter:
+    """Write rows as an indented JSON array, one row at a time"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'w', encoding='utf-8')
+        self.count = 0
+
+    def write(self, table):
+        for row in table_to_rows(table):
+            self.file.write('[\n  ' if self.count == 0 else ',\n  ')
+            self.file.write(json.dumps(row, indent=2).replace('\n', '\n  '))
+            self.count += 1
+
+    def close(self):
+        self.file.write('\n]' if self.count else '[]')
+        self.file.close()
+
+class JsonlWriter:
+    """Write rows as JSON Lines"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'w', encoding='utf-8')
+
+    def write(self, table):
+        for row in table_to_rows(table):
+            self.file.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+    def close(self):
+        self.file.close()
+
+class CsvWriter:
+    """Write rows as CSV, the header is taken from the first table"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = None
+
+    def write(self, table):
+        if self.writer is None:
+            self.writer = csv.DictWriter(self.file, fieldnames=list(table))
+            self.writer.writeheader()
+        self.writer.writerows(table_to_rows(table))
+
+    def close(self):
+        self.file.close()
+
+class TextWriter:
+    """
+    Write a human readable dump of the rows.
+
+    The header contains the total number of rows, which is only known at
+    the end, so the body is spooled to a temporary file first.
+    """
+
+    def __init__(self, path, title, total_label, item_label, limit=None):
+        self.path = path
+        self.title = title
+        self.total_label = total_label
+        self.item_label = item_label
+        self.limit = limit
+        self.body = tempfile.TemporaryFile('w+', encoding='utf-8')
+        self.count = 0
+
+    def write(self, table):
+        n = table_len(table)
+        if self.limit is not None and self.count + n > self.limit:
+            rows = table_to_rows(table, 0, max(self.limit - self.count, 0))
+        else:
+            rows = table_to_rows(table)
+        for i, row in enumerate(rows, self.count + 1):
+            self.body.write(f"{self.item_label} #{i}\n")
+            self.body.write(f"{'-'*40}\n")
+            for key, value in row.items():
+                if value is not None:
+                    self.body.write(f"  {key:10s}: {value}\n")
+            self.body.write(f"\n")
+        self.count += n
+
+    def close(self):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(f"{self.title}\n")
+            f.write(f"{'='*80}\n\n")
+            f.write(f"Total {self.total_label}: {self.count}\n")
+            if self.limit is not None:
+                f.write(f"(Showing first {self.limit} in text format)\n")
+            f.write(f"\n")
+            self.body.seek(0)
+            shutil.copyfileobj(self.body, f)
+        self.body.close()
+
+class NpyColumnsWriter:
+    """
+    Write the catalog as a columnar bundle (see load_catalog).
+
+    The column data is appended to temporary files as tiles arrive and the
+    .npy headers (which need the final row count) are written on close.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.mkdir(exist_ok=True)
+        self.columns = {}  # name -> column state
+        self.count = 0
+
+    def write(self, table):
+        for name, values in table.items():
+            if name not in self.columns:
+                self.columns[name] = {
+                    'kind': 'str' if values.dtype.kind == 'S' else 'num',
+                    'dtype': values.dtype,
+                    'data': tempfile.TemporaryFile(),
+                    'offsets': tempfile.TemporaryFile(),
+                    'size': 0,
+                }
+            column = self.columns[name]
+            if column['kind'] == 'str':
+                # Variable length strings: utf-8 blob + end offsets.
+                # (numpy already stripped the trailing zeros)
+                items = values.tolist()
+                ends = np.cumsum([len(v) for v in items], dtype=np.uint64) + column['size']
+                column['data'].write(b''.join(items))
+                column['offsets'].write(ends.tobytes())
+                column['size'] += sum(len(v) for v in items)
+            else:
+                column['data'].write(np.ascontiguousarray(values, column['dtype']).tobytes())
+        self.count += table_len(table)
+
+    def _write_npy(self, path, dtype, data, count):
+        with open(path, 'wb') as f:
+            np.lib.format.write_array_header_1_0(f, {
+                'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)),
+                'fortran_order': False,
+                'shape': (count,),
+            })
+            data.seek(0)
+            shutil.copyfileobj(data, f)
+        data.close()
+
+    def close(self):
+        manifest = {
+            'format': CATALOG_FORMAT,
+            'version': CATALOG_VERSION,
+            'count': self.count,
+            'columns': [],
+        }
+        for name, column in self.columns.items():
+            if column['kind'] == 'str':
+                # Offsets array starts with a zero so that item i is
+                # blob[offsets[i]:offsets[i + 1]]
+                offsets = tempfile.TemporaryFile()
+                offsets.write(np.zeros(1, np.uint64).tobytes())
+                column['offsets'].seek(0)
+                shutil.copyfileobj(column['offsets'], offsets)
+                column['offsets'].close()
+                self._write_npy(self.path / f'{name}.offsets.npy', np.uint64,
+                                offsets, self.count + 1)
+                self._write_npy(self.path / f'{name}.blob.npy', np.uint8,
+                                column['data'], column['size'])
+                manifest['columns'].append({'name': name, 'type': 'str'})
+            else:
+                column['offsets'].close()
+                self._write_npy(self.path / f'{name}.npy', column['dtype'],
+                                column['data'], self.count)
+                manifest['columns'].append({
+                    'name': name,
+                    'type': np.lib.format.dtype_to_descr(column['dtype'])})
+        with open(self.path / 'manifest.json', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+
+def replace_output(tmp_path, path):
+    """Move a finished output file or directory over the previous one"""
+    if path.is_dir():
+        # A directory can't replace a non empty one: move the old one aside
+        old_path = path.with_name(path.name + '.old')
+        shutil.rmtree(old_path, ignore_errors=True)
+        os.replace(path, old_path)
+        os.replace(tmp_path, path)
+        shutil.rmtree(old_path)
+    else:
+        os.replace(tmp_path, path)
+
+def remove_output(path):
+    if path.is_dir():
+        shutil.rmtree(path)
+    elif path.exists():
+        path.unlink()
+
+class CatalogWriter:
+    """
+    Fan out the decoded tiles to a set of sinks.
+
+    The sinks are written to temporary '.tmp' files that only replace the
+    previous outputs on close if at least one row was written, so a run
+    that finds nothing leaves them in place.
+
+    Usage:
+        writer = CatalogWriter(output_dir, 'star_data', ['json', 'csv'],
+                               text=('Star Data', 'stars', 'Star', 1000))
+        for table in tiles:
+            writer.write(table)
+        files = writer.close()
+    """
+
+    def __init__(self, output_dir, basename, sinks=DEFAULT_SINKS, text=None):
+        self.output_path = Path(output_dir)
+        self.output_path.mkdir(exist_ok=True)
+        self.count = 0
+        self.first_row = None
+        self.sinks = []
+        self.paths = []
+        for sink in sinks:
+            self.paths.append(self.output_path / (basename + SINKS[sink]))
+            path = self.output_path / (basename + SINKS[sink] + '.tmp')
+            remove_output(path)
+            if sink == 'json':
+                self.sinks.append(JsonArrayWriter(path))
+            elif sink == 'jsonl':
+                self.sinks.append(JsonlWriter(path))
+            elif sink == 'csv':
+                self.sinks.append(CsvWriter(path))
+            elif sink == 'txt':
+                self.sinks.append(TextWriter(path, *(text or (basename, 'rows', 'Row'))))
+            elif sink == 'npy':
+                self.sinks.append(NpyColumnsWriter(path))
+
+    def write(self, table):
+        if not table_len(table):
+            return
+        if self.first_row is None:
+            self.first_row = table_to_rows(table, 0, 1)[0]
+        self.count += table_len(table)
+        for sink in self.sinks:
+            sink.write(table)
+
+    def close(self):
+        """
+        Finish all the sinks, return the list of written paths (none if
+        there were no rows, the previous outputs are kept)
+        """
+        for sink in self.sinks:
+            sink.close()
+        for sink, path in zip(self.sinks, self.paths):
+            if self.count:
+                replace_output(Path(sink.path), path)
+            else:
+                remove_output(Path(sink.path))
+        return self.paths if self.count else []
+
+class StringColumn:
+    """Lazily decoded string column backed by a blob and an offsets array"""
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        """String at index i, or list of strings for a slice"""
+        if isinstance(i, slice):
+            start, stop, step = i.indices(len(self))
+            if step != 1:
+                return [self[j] for j in range(start, stop, step)]
+            if start >= stop:
+                return []
+            offsets = self.offsets[start:stop + 1].tolist()
+            base = offsets[0]
+            data = bytes(self.blob[base:offsets[-1]])
+            return [data[offsets[j] - base:offsets[j + 1] - base].decode('utf-8', errors='ignore')
+                    for j in range(len(offsets) - 1)]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('string column index out of range')
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        return bytes(self.blob[start:end]).decode('utf-8', errors='ignore')
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def tolist(self):
+        data = bytes(self.blob)
+        offsets = self.offsets.tolist()
+        return [data[offsets[i]:offsets[i + 1]].decode('utf-8', errors='ignore')
+                for i in range(len(offsets) - 1)]
+
+class Catalog:
+    """
+    Columnar catalog loaded by load_catalog.
+
+    catalog['ra'] returns a (memory mapped) numpy array for numeric columns
+    and a StringColumn for string columns.  Columns are opened on first
+    access and cached.
+    """
+
+    def __init__(self, path, mmap=True):
+        self.path = Path(path)
+        with open(self.path / 'manifest.json', 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('format') != CATALOG_FORMAT or manifest.get('version') != CATALOG_VERSION:
+            raise ValueError(f"Unsupported catalog bundle: {self.path}")
+        self.count = manifest['count']
+        self.types = {col['name']: col['type'] for col in manifest['columns']}
+        self.names = list(self.types)
+        self.mmap_mode = 'r' if mmap else None
+        self._columns = {}
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, name):
+        return name in self.types
+
+    def __getitem__(self, name):
+        if name not in self._columns:
+            if name not in self.types:
+                raise KeyError(name)
+            if self.types[name] == 'str':
+                self._columns[name] = StringColumn(
+                    np.load(self.path / f'{name}.blob.npy', mmap_mode=self.mmap_mode),
+                    np.load(self.path / f'{name}.offsets.npy', mmap_mode=self.mmap_mode))
+            else:
+                self._columns[name] = np.load(self.path / f'{name}.npy',
+                                              mmap_mode=self.mmap_mode)
+        return self._columns[name]
+
+    def rows(self, columns=None, index=slice(None)):
+        """
+        Iterate over the rows (all, or the slice index) as dicts, with the
+        same values as the JSON output: columns missing from the bundle
+        are None, like row.get(name) on the JSON rows
+        """
+        names = columns or self.names
+        count = len(range(*index.indices(self.count)))
+        cols = [self._values(name, index) if name in self.types else [None] * count
+                for name in names]
+        for values in zip(*cols):
+            yield dict(zip(names, values))
+
+    def _values(self, name, index):
+        column = self[name]
+        if isinstance(column, StringColumn):
+            return column[index]
+        return column[index].tolist()
+
+def load_catalog(path, mmap=True):
+    """
+    Open a columnar catalog bundle.
+
+    Only the manifest is read here, the columns are loaded on access:
+        stars = load_catalog('stars_extracted/star_data_columns')
+        ra, de, vmag = stars['ra'], stars['de'], stars['vmag']
+    """
+    return Catalog(path, mmap)
+
+def columns_path(json_file):
+    """Return the columnar bundle path matching an extracted JSON file"""
+    json_file = Path(json_file)
+    return json_file.with_name(json_file.stem + SINKS['npy'])
+
+def iter_catalog_rows(json_file, columns=None):
+    """
+    Iterate over the rows of an extracted catalog.
+
+    Uses the columnar bundle written next to the JSON file when it is there
+    and up to date, and falls back to parsing the JSON otherwise.
+    """
+    json_file = Path(json_file)
+    manifest = columns_path(json_file) / 'manifest.json'
+    if manifest.exists() and (not json_file.exists() or
+                              manifest.stat().st_mtime >= json_file.stat().st_mtime):
+        yield from load_catalog(manifest.parent).rows(columns)
+        return
+    with open(json_file, 'r', encoding='utf-8') as f:
+        rows = json.load(f)
+    if columns:
+        rows = ({name: row.get(name) for name in columns} for row in rows)
+    yield from rows
@@ -1,7 +1,40 @@
+import argparse
+import hashlib
+import io
 import json
 import csv
+import re
+import time
+from contextlib import contextmanager
+from itertools import chain
 from pathlib import Path
-from collections import defaultdict
+
+from catalog_io import columns_path, iter_catalog_rows
+from name_search import NAME_BUNDLE, NameIndex, NgramIndex, write_name_bundle
+
+# Output files (in the output directory) by short name
+OUTPUTS = {
+    'json': 'name_index.json',
+    'bundle': NAME_BUNDLE,
+    'ngrams': 'name_ngrams.npz',
+    'compact': 'name_index_compact.json',
+    'csv': 'name_index.csv',
+    'txt': 'name_index.txt',
+    'stats': 'name_index_stats.json',
+}
+
+# Outputs that only depend on the entries metadata, not on the names of each
+# catalog or their order
+METADATA_OUTPUTS = ('json', 'bundle', 'csv', 'stats')
+
+# Names extracted from each catalog object by the previous build, used to
+# only process the objects that changed (see CatalogState)
+STATE_FILE = 'name_index_state.json'
+STATE_VERSION = 1
+
+# Catalog fields the name index entries are made of
+STAR_FIELDS = ('hip', 'hd', 'vmag', 'ra', 'de', 'ids')
+DSO_FIELDS = ('type', 'vmag', 'ra', 'de', 'short_name', 'ids')
 
 # Greek letter mapping: symbol -> (english name, abbreviation)
 GREEK_LETTERS = {
@@ -85,6 +118,16 @@ GREEK_ABBREV_TO_FULL = {
     'ome': 'omega',
 }
 
+# Greek symbols -> english names / abbreviations, for str.translate
+GREEK_TO_FULL = str.maketrans({c: full for c, (full, _) in GREEK_LETTERS.items()})
+GREEK_TO_ABBREV = str.maketrans({c: abbrev for c, (_, abbrev) in GREEK_LETTERS.items()})
+
+# Leading Greek abbreviation followed by a space or a digit, as in
+# 'alf And', 'pi1 Ori' or 'ksi2 Cet'
+GREEK_ABBREV_RE = re.compile(
+    '(' + '|'.join(sorted(GREEK_ABBREV_TO_FULL, key=len, reverse=True)) + ')(?=[ 012])',
+    re.IGNORECASE)
+
 def convert_greek_to_english(name):
     """
     Convert Greek letter abbreviations in a name to full English names.
@@ -94,178 +137,326 @@ def convert_greek_to_english(name):
     """
     alternatives = []
     
-    # Check for Greek symbols first (α, β, etc.)
-    has_greek_symbol = False
-    for greek_char in GREEK_LETTERS:
-        if greek_char in name:
-            has_greek_symbol = True
-            break
-    
-    if has_greek_symbol:
-        full_english = name
-        abbrev_english = name
-        for greek_char, (full_name, abbrev) in GREEK_LETTERS.items():
-            if greek_char in name:
-                full_english = full_english.replace(greek_char, full_name)
-                abbrev_english = abbrev_english.replace(greek_char, abbrev)
-        if full_english != name:
-            alternatives.append(full_english)
-        if abbrev_english != name and abbrev_english != full_english:
+    # Greek symbols (α, β, etc.)
+    full_english = name.translate(GREEK_TO_FULL)
+    if full_english != name:
+        alternatives.append(full_english)
+        abbrev_english = name.translate(GREEK_TO_ABBREV)
+        if abbrev_english != full_english:
             alternatives.append(abbrev_english)
     
-    # Check for Greek abbreviations (alf, bet, etc.)
-    # Names like "alf And", "bet CMa", "gam Ori"
-    name_lower = name.lower()
-    for abbrev, full_name in GREEK_ABBREV_TO_FULL.items():
-        # Check if name starts with Greek abbrev followed by space or digit
-        if name_lower.startswith(abbrev + ' ') or name_lower.startswith(abbrev + '0') or name_lower.startswith(abbrev + '1') or name_lower.startswith(abbrev + '2'):
-            # Create full English version
-            full_english = full_name + name[len(abbrev):]
-            if full_english not in alternatives and full_english != name:
-                alternatives.append(full_english)
-            break
+    # Greek abbreviations (alf, bet, etc.)
+    match = GREEK_ABBREV_RE.match(name)
+    if match:
+        full_english = GREEK_ABBREV_TO_FULL[match.group(1).lower()] + name[match.end():]
+        if full_english != name and full_english not in alternatives:
+            alternatives.append(full_english)
     
     return alternatives
 
-def extract_star_names(star_data_file):
-    """Extract all star names from the star data JSON file"""
+def add_greek_alternatives(names):
+    """
+    Return the names with the Greek letter alternatives of each one inserted
+    after it, without duplicates, and the number of alternatives added
+    """
+    result = []
+    seen = set()
+    added = 0
+    for name in names:
+        if name in seen:
+            continue
+        seen.add(name)
+        result.append(name)
+        for alt in convert_greek_to_english(name):
+            if alt not in seen:
+                seen.add(alt)
+                result.append(alt)
+                added += 1
+    return result, added
+
+class StageTimes:
+    """
+    Wall time spent in each stage of the index creation:
+        with times('load'):
+            ...
+        times.report()
+    """
+
+    def __init__(self):
+        self.times = {}
+
+    @contextmanager
+    def __call__(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.times[stage] = self.times.get(stage, 0.0) + time.perf_counter() - start
+
+    def report(self):
+        total = sum(self.times.values())
+        print(f"\n{'='*80}")
+        print("PROFILE (wall time per stage)")
+        print(f"{'='*80}")
+        for stage, seconds in self.times.items():
+            share = seconds / total * 100 if total else 0
+            print(f"  {stage:<32} {seconds * 1000:>10.1f} ms  {share:>5.1f}%")
+        print(f"  {'Total':<32} {total * 1000:>10.1f} ms")
+        print(f"{'='*80}\n")
+
+def fingerprint(row, fields):
+    """Short hash of the fields of a catalog row"""
+    data = json.dumps([row.get(f) for f in fields], default=str)
+    return hashlib.md5(data.encode('utf-8')).hexdigest()[:16]
+
+def object_keys(rows, key_func):
+    """Unique key of each row (repeated keys get a '#n' suffix)"""
+    keys = []
+    seen = {}
+    for row in rows:
+        key = str(key_func(row))
+        n = seen.get(key, 0)
+        seen[key] = n + 1
+        keys.append(f"{key}#{n}" if n else key)
+    return keys
+
+class CatalogState:
+    """
+    Names extracted from each object of a catalog, keyed by object (HIP
+    number or IDs) with a fingerprint of the fields they derive from.
+
+    Objects whose fingerprint matches the previous build reuse its names,
+    the others are extracted again.  touched collects the names of the
+    objects that were added, changed or removed.  The objects are kept in
+    catalog order, which decides the object owning a shared name.
+    """
+
+    def __init__(self, previous=None):
+        self.previous = previous or {}
+        self.objects = {}
+        self.touched = set()
+        self.changed = 0
+        self.removed = 0
+
+    def cached(self, key, fprint):
+        """Names of an unchanged object, or None"""
+        old = self.previous.get(key)
+        return old[1] if old and old[0] == fprint else None
+
+    def record(self, key, fprint, names, reused):
+        self.objects[key] = [fprint, names]
+        if not reused:
+            self.changed += 1
+            self.touched.update(names)
+            if key in self.previous:
+                self.touched.update(self.previous[key][1])
+
+    def finish(self):
+        """Account for the objects that were removed from the catalog"""
+        for key in self.previous.keys() - self.objects.keys():
+            self.touched.update(self.previous[key][1])
+            self.removed += 1
+        print(f"  {self.changed} new or changed objects, {self.removed} removed"
+              + (", objects reordered" if self.reordered() else ""))
+
+    def reordered(self):
+        """Whether the objects kept from the previous build changed order"""
+        kept = [key for key in self.objects if key in self.previous]
+        return kept != [key for key in self.previous if key in self.objects]
+
+    def names_changed(self):
+        """Whether the names of the catalog, or the order they are first claimed in, changed"""
+        def ordered(objects):
+            return list(dict.fromkeys(chain.from_iterable(names for _, names in objects.values())))
+        return ordered(self.objects) != ordered(self.previous)
+
+def extract_star_names(star_data_file, times=None, state=None):
+    """
+    Extract all star names from the star data JSON file
+    (or from its columnar bundle when available)
+    """
+    times = times or StageTimes()
     print("Loading star data...")
-    with open(star_data_file, 'r', encoding='utf-8') as f:
-        stars = json.load(f)
-    
-    print(f"Processing {len(stars)} stars...")
-    
-    star_names = []
-    name_to_info = {}
-    greek_alternatives_added = 0
-    
-    for star in stars:
-        hip = star.get('hip')
-        hd = star.get('hd')
-        vmag = star.get('vmag')
-        ra = star.get('ra')
-        de = star.get('de')
-        ids = star.get('ids', '').strip()
-        
-        # Collect all names for this star
-        names = []
-        
-        # If star has named IDs, parse them
-        if ids:
+    
+    with times('stars: load'):
+        stars = list(iter_catalog_rows(star_data_file))
+    
+    # Objects unchanged since the previous build keep their names
+    with times('stars: diff'):
+        if state is not None:
+            keys = object_keys(stars, lambda s: f"HIP {s['hip']}" if s.get('hip') else
+                               f"HD {s['hd']}" if s.get('hd') else s.get('ids', ''))
+            prints = [fingerprint(star, STAR_FIELDS) for star in stars]
+            cached = [state.cached(k, f) for k, f in zip(keys, prints)]
+        else:
+            cached = [None] * len(stars)
+    
+    # Split the IDs into names
+    with times('stars: parse ids'):
+        star_ids = []
+        for star, names in zip(stars, cached):
+            if names is not None:
+                star_ids.append(None)
+                continue
+            ids = star.get('ids', '').strip()
+            names = []
             # IDs can be pipe-separated or comma-separated
             # Examples: "* CG And", "Sirius|* alf CMa|HIP 32349"
-            id_parts = ids.replace('|', ',').split(',')
-            for part in id_parts:
+            for part in ids.replace('|', ',').split(',') if ids else ():
                 part = part.strip()
                 if part and not part.startswith('HIP') and not part.startswith('HD'):
                     # Remove common prefixes for cleaner names
                     clean_name = part.replace('* ', '').strip()
                     if clean_name:
                         names.append(clean_name)
-                        # Add Greek letter alternatives
-                        greek_alts = convert_greek_to_english(clean_name)
-                        for alt in greek_alts:
-                            if alt not in names:
-                                names.append(alt)
-                                greek_alternatives_added += 1
-        
-        # Always add HIP number as fallback name
-        if hip:
-            hip_name = f"HIP {hip}"
-            names.append(hip_name)
-        
-        # Add HD number as alternative
-        if hd:
-            hd_name = f"HD {hd}"
-            names.append(hd_name)
-        
-        # Store each name with its info
-        primary_name = names[0] if names else (f"HIP {hip}" if hip else "Unknown")
-        for name in names:
-            if name not in name_to_info:
-                name_to_info[name] = {
-                    'name': name,
-                    'type': 'star',
-                    'hip': hip,
-                    'hd': hd,
-                    'vmag': vmag,
-                    'ra': ra,
-                    'de': de,
-                    'primary_name': primary_name
-                }
-    
+            star_ids.append(names)
+    
+    with times('stars: greek alternatives'):
+        greek_alternatives_added = 0
+        star_names = []
+        for i, (star, names) in enumerate(zip(stars, star_ids)):
+            if names is None:
+                star_names.append(cached[i])
+                state.record(keys[i], prints[i], cached[i], True)
+                continue
+            names, added = add_greek_alternatives(names)
+            greek_alternatives_added += added
+            
+            # Always add HIP number as fallback name, HD number as alternative
+            if star.get('hip'):
+                names.append(f"HIP {star['hip']}")
+            if star.get('hd'):
+                names.append(f"HD {star['hd']}")
+            star_names.append(names)
+            if state is not None:
+                state.record(keys[i], prints[i], names, False)
+        if state is not None:
+            state.finish()
+    
+    with times('stars: build entries'):
+        name_to_info = {}
+        for star, names in zip(stars, star_names):
+            hip = star.get('hip')
+            hd = star.get('hd')
+            
+            # Store each name with its info
+            primary_name = names[0] if names else (f"HIP {hip}" if hip else "Unknown")
+            for name in names:
+                if name not in name_to_info:
+                    name_to_info[name] = {
+                        'name': name,
+                        'type': 'star',
+                        'hip': hip,
+                        'hd': hd,
+                        'vmag': star.get('vmag'),
+                        'ra': star.get('ra'),
+                        'de': star.get('de'),
+                        'primary_name': primary_name
+                    }
+    
+    print(f"Processed {len(stars)} stars")
     print(f"  Extracted {len(name_to_info)} unique star names")
     print(f"  Added {greek_alternatives_added} Greek letter alternatives")
     return name_to_info
 
-def extract_dso_names(dso_data_file):
-    """Extract all DSO names from the DSO data JSON file"""
+def extract_dso_names(dso_data_file, times=None, state=None):
+    """
+    Extract all DSO names from the DSO data JSON file
+    (or from its columnar bundle when available)
+    """
+    times = times or StageTimes()
     print("\nLoading DSO data...")
-    with open(dso_data_file, 'r', encoding='utf-8') as f:
-        dsos = json.load(f)
-    
-    print(f"Processing {len(dsos)} DSOs...")
-    
-    name_to_info = {}
-    greek_alternatives_added = 0
-    
-    for dso in dsos:
-        obj_type = dso.get('type', 'Unknown')
-        vmag = dso.get('vmag')
-        ra = dso.get('ra')
-        de = dso.get('de')
-        short_name = dso.get('short_name', '').strip()
-        ids = dso.get('ids', '').strip()
-        
-        # Collect all names for this DSO
-        names = []
-        
-        # Add short name if available
-        if short_name:
-            names.append(short_name)
-            # Add Greek alternatives for short name
-            greek_alts = convert_greek_to_english(short_name)
-            for alt in greek_alts:
-                if alt not in names:
-                    names.append(alt)
-                    greek_alternatives_added += 1
-        
-        # Parse IDs field
-        if ids:
+    
+    with times('dsos: load'):
+        dsos = list(iter_catalog_rows(dso_data_file))
+    
+    # Objects unchanged since the previous build keep their names
+    with times('dsos: diff'):
+        if state is not None:
+            keys = object_keys(dsos, lambda d: d.get('ids') or d.get('short_name', ''))
+            prints = [fingerprint(dso, DSO_FIELDS) for dso in dsos]
+            cached = [state.cached(k, f) for k, f in zip(keys, prints)]
+        else:
+            cached = [None] * len(dsos)
+    
+    # Short name first, then the IDs
+    with times('dsos: parse ids'):
+        dso_ids = []
+        for dso, names in zip(dsos, cached):
+            if names is not None:
+                dso_ids.append(None)
+                continue
+            short_name = dso.get('short_name', '').strip()
+            ids = dso.get('ids', '').strip()
+            names = [short_name] if short_name else []
             # IDs are pipe-separated
             # Examples: "M 31|NGC 224|Andromeda Galaxy"
-            id_parts = ids.split('|')
-            for part in id_parts:
+            for part in ids.split('|') if ids else ():
                 part = part.strip()
-                if part and part not in names:
+                if part:
                     names.append(part)
-                    # Add Greek alternatives
-                    greek_alts = convert_greek_to_english(part)
-                    for alt in greek_alts:
-                        if alt not in names:
-                            names.append(alt)
-                            greek_alternatives_added += 1
-        
-        # Store each name with its info
-        primary_name = names[0] if names else 'Unnamed DSO'
-        for name in names:
-            if name not in name_to_info:
-                name_to_info[name] = {
-                    'name': name,
-                    'type': 'dso',
-                    'dso_type': obj_type,
-                    'vmag': vmag,
-                    'ra': ra,
-                    'de': de,
-                    'primary_name': primary_name
-                }
-    
+            dso_ids.append(names)
+    
+    with times('dsos: greek alternatives'):
+        greek_alternatives_added = 0
+        dso_names = []
+        for i, names in enumerate(dso_ids):
+            if names is None:
+                dso_names.append(cached[i])
+                state.record(keys[i], prints[i], cached[i], True)
+                continue
+            names, added = add_greek_alternatives(names)
+            greek_alternatives_added += added
+            dso_names.append(names)
+            if state is not None:
+                state.record(keys[i], prints[i], names, False)
+        if state is not None:
+            state.finish()
+    
+    with times('dsos: build entries'):
+        name_to_info = {}
+        for dso, names in zip(dsos, dso_names):
+            # Store each name with its info
+            primary_name = names[0] if names else 'Unnamed DSO'
+            for name in names:
+                if name not in name_to_info:
+                    name_to_info[name] = {
+                        'name': name,
+                        'type': 'dso',
+                        'dso_type': dso.get('type', 'Unknown'),
+                        'vmag': dso.get('vmag'),
+                        'ra': dso.get('ra'),
+                        'de': dso.get('de'),
+                        'primary_name': primary_name
+                    }
+    
+    print(f"Processed {len(dsos)} DSOs")
     print(f"  Extracted {len(name_to_info)} unique DSO names")
     print(f"  Added {greek_alternatives_added} Greek letter alternatives")
     return name_to_info
 
-def create_name_index(star_names, dso_names, output_dir):
-    """Create index files for name suggestions"""
+def write_if_changed(path, content):
+    """
+    Write a text file only if its content changed, so that unchanged
+    outputs keep their mtime.  Returns True if the file was written.
+    """
+    path = Path(path)
+    data = content.encode('utf-8')
+    if path.exists() and path.read_bytes() == data:
+        return False
+    path.write_bytes(data)
+    return True
+
+def report_output(written, label, path):
+    print(f"✓ Saved {label} to {path}" if written else f"= Unchanged {label} ({path})")
+
+def create_name_index(star_names, dso_names, output_dir, times=None, outputs=OUTPUTS):
+    """
+    Create index files for name suggestions.  Only the files listed in
+    outputs (see OUTPUTS) are regenerated, and text files are only
+    rewritten if their content changed.
+    """
+    times = times or StageTimes()
     output_path = Path(output_dir)
     output_path.mkdir(exist_ok=True)
     
@@ -279,61 +470,89 @@ def create_name_index(star_names, dso_names, output_dir):
     print(f"{'='*80}\n")
     
     # Sort names alphabetically for better search
-    sorted_names = sorted(all_names.values(), key=lambda x: x['name'].lower())
+    with times('sort'):
+        sorted_names = sorted(all_names.values(), key=lambda x: x['name'].lower())
     
     # Save to JSON (full index with all metadata)
-    json_file = output_path / 'name_index.json'
-    with open(json_file, 'w', encoding='utf-8') as f:
-        json.dump(sorted_names, f, indent=2, ensure_ascii=False)
-    print(f"✓ Saved full index to {json_file}")
-    
-    # Save to JSON (compact - just names for autocomplete)
-    compact_json_file = output_path / 'name_index_compact.json'
-    compact_data = {
-        'stars': sorted([n['name'] for n in star_names.values()]),
-        'dsos': sorted([n['name'] for n in dso_names.values()]),
-        'all': sorted([n['name'] for n in all_names.values()])
-    }
-    with open(compact_json_file, 'w', encoding='utf-8') as f:
-        json.dump(compact_data, f, indent=2, ensure_ascii=False)
-    print(f"✓ Saved compact index to {compact_json_file}")
+    json_file = output_path / OUTPUTS['json']
+    if 'json' in outputs:
+        with times('write name_index.json'):
+            written = write_if_changed(json_file, json.dumps(sorted_names, indent=2, ensure_ascii=False))
+        report_output(written, "full index", json_file)
+    
+    # Binary index (memory mapped by example_name_search.py)
+    bundle_dir = output_path / OUTPUTS['bundle']
+    if 'bundle' in outputs:
+        with times(f'write {NAME_BUNDLE}'):
+            write_name_bundle(sorted_names, bundle_dir)
+        print(f"✓ Saved binary index to {bundle_dir}")
+    
+    # Trigram index for infix and fuzzy search (see name_search.py)
+    ngram_file = output_path / OUTPUTS['ngrams']
+    if 'ngrams' in outputs:
+        with times('write name_ngrams.npz'):
+            NgramIndex.build(NameIndex.load(bundle_dir).prefix_index().keys).save(ngram_file)
+        print(f"✓ Saved trigram index to {ngram_file}")
+    elif 'bundle' in outputs and ngram_file.exists():
+        # Same names in the same order: the index is still valid, mark it
+        # as up to date with the new bundle
+        ngram_file.touch()
+    
+    # Save to JSON (compact - just names for autocomplete, used by the
+    # web frontend)
+    compact_json_file = output_path / OUTPUTS['compact']
+    if 'compact' in outputs:
+        compact_data = {
+            'stars': sorted([n['name'] for n in star_names.values()]),
+            'dsos': sorted([n['name'] for n in dso_names.values()]),
+            'all': sorted([n['name'] for n in all_names.values()])
+        }
+        with times('write name_index_compact.json'):
+            written = write_if_changed(compact_json_file, json.dumps(
+                compact_data, separators=(',', ':'), ensure_ascii=False))
+        report_output(written, "compact index", compact_json_file)
     
     # Save to CSV (for easy viewing/editing)
-    csv_file = output_path / 'name_index.csv'
-    with open(csv_file, 'w', newline='', encoding='utf-8') as f:
-        fieldnames = ['name', 'type', 'primary_name', 'vmag', 'ra', 'de', 'hip', 'hd', 'dso_type']
-        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
-        writer.writeheader()
-        writer.writerows(sorted_names)
-    print(f"✓ Saved CSV index to {csv_file}")
+    csv_file = output_path / OUTPUTS['csv']
+    if 'csv' in outputs:
+        with times('write name_index.csv'):
+            f = io.StringIO(newline='')
+            fieldnames = ['name', 'type', 'primary_name', 'vmag', 'ra', 'de', 'hip', 'hd', 'dso_type']
+            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(sorted_names)
+            written = write_if_changed(csv_file, f.getvalue())
+        report_output(written, "CSV index", csv_file)
     
     # Save to plain text (simple list for quick reference)
-    txt_file = output_path / 'name_index.txt'
-    with open(txt_file, 'w', encoding='utf-8') as f:
-        f.write("Sky Object Name Index\n")
-        f.write(f"{'='*80}\n\n")
-        f.write(f"Total names: {len(all_names)}\n")
-        f.write(f"Stars: {len(star_names)}\n")
-        f.write(f"DSOs: {len(dso_names)}\n\n")
-        f.write(f"{'='*80}\n\n")
-        
-        # Group by type
-        f.write("STARS\n")
-        f.write(f"{'-'*80}\n")
-        star_list = sorted([n for n in all_names.values() if n['type'] == 'star'], 
-                          key=lambda x: x['name'].lower())
-        for item in star_list:
-            f.write(f"{item['name']}\n")
-        
-        f.write(f"\n{'='*80}\n\n")
-        f.write("DEEP SKY OBJECTS\n")
-        f.write(f"{'-'*80}\n")
-        dso_list = sorted([n for n in all_names.values() if n['type'] == 'dso'], 
-                         key=lambda x: x['name'].lower())
-        for item in dso_list:
-            f.write(f"{item['name']}\n")
-    
-    print(f"✓ Saved text list to {txt_file}")
+    txt_file = output_path / OUTPUTS['txt']
+    if 'txt' in outputs:
+        with times('write name_index.txt'):
+            f = io.StringIO()
+            f.write("Sky Object Name Index\n")
+            f.write(f"{'='*80}\n\n")
+            f.write(f"Total names: {len(all_names)}\n")
+            f.write(f"Stars: {len(star_names)}\n")
+            f.write(f"DSOs: {len(dso_names)}\n\n")
+            f.write(f"{'='*80}\n\n")
+            
+            # Group by type
+            f.write("STARS\n")
+            f.write(f"{'-'*80}\n")
+            star_list = sorted([n for n in all_names.values() if n['type'] == 'star'], 
+                              key=lambda x: x['name'].lower())
+            for item in star_list:
+                f.write(f"{item['name']}\n")
+            
+            f.write(f"\n{'='*80}\n\n")
+            f.write("DEEP SKY OBJECTS\n")
+            f.write(f"{'-'*80}\n")
+            dso_list = sorted([n for n in all_names.values() if n['type'] == 'dso'], 
+                             key=lambda x: x['name'].lower())
+            for item in dso_list:
+                f.write(f"{item['name']}\n")
+            written = write_if_changed(txt_file, f.getvalue())
+        report_output(written, "text list", txt_file)
     
     # Create statistics
     stats = {
@@ -350,10 +569,10 @@ def create_name_index(star_names, dso_names, output_dir):
         dso_type = dso.get('dso_type', 'Unknown')
         stats['dso_types'][dso_type] = stats['dso_types'].get(dso_type, 0) + 1
     
-    stats_file = output_path / 'name_index_stats.json'
-    with open(stats_file, 'w', encoding='utf-8') as f:
-        json.dump(stats, f, indent=2)
-    print(f"✓ Saved statistics to {stats_file}")
+    stats_file = output_path / OUTPUTS['stats']
+    if 'stats' in outputs:
+        report_output(write_if_changed(stats_file, json.dumps(stats, indent=2)),
+                      "statistics", stats_file)
     
     # Print summary
     print(f"\n{'='*80}")
@@ -373,32 +592,124 @@ def create_name_index(star_names, dso_names, output_dir):
     
     return sorted_names
 
+def input_signature(json_file):
+    """Size and mtime of the files a catalog can be read from"""
+    files = [Path(json_file), columns_path(json_file) / 'manifest.json']
+    return {str(f): [f.stat().st_size, f.stat().st_mtime_ns] for f in files if f.exists()}
+
+def load_state(state_file):
+    """Load the previous build state, or None if there is none usable"""
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return state if state.get('version') == STATE_VERSION else None
+
+def comparable_entry(entry):
+    """Entry fields as stored in the binary index (missing values are None)"""
+    def value(key, v):
+        if v is None or v != v or v == '' or (key in ('hip', 'hd') and v == 0):
+            return None
+        return v
+    return {k: value(k, v) for k, v in entry.items()}
+
+def outputs_to_update(all_names, states, output_dir):
+    """
+    Return the outputs that need regenerating: all of them when the objects
+    of a catalog changed order or its names changed (the first object to
+    claim a name owns it, names differing only by case keep catalog order),
+    otherwise the metadata outputs if the entries of the touched names differ
+    from the previous build (read from its binary index).
+    """
+    output_path = Path(output_dir)
+    if not all((output_path / f).exists() for f in OUTPUTS.values()):
+        return OUTPUTS
+    if any(state.reordered() or state.names_changed() for state in states):
+        return OUTPUTS
+    
+    old = NameIndex.load(output_path / NAME_BUNDLE)
+    prefix = old.prefix_index()
+    
+    def old_entry(name):
+        # Names differing only by case share a key: look for the exact one
+        pos = prefix.find(name)
+        if pos is None:
+            return None
+        key = prefix.keys[pos]
+        while pos < len(prefix) and prefix.keys[pos] == key:
+            if old.names[pos] == name:
+                return old.entry(pos)
+            pos += 1
+        return None
+    
+    entries_changed = False
+    for name in set().union(*(state.touched for state in states)):
+        before, after = old_entry(name), all_names.get(name)
+        if (before is None) != (after is None):
+            return OUTPUTS
+        if after is not None and comparable_entry(before) != comparable_entry(after):
+            entries_changed = True
+    return METADATA_OUTPUTS if entries_changed else ()
+
 def main():
+    parser = argparse.ArgumentParser(description="Create the sky object name index")
+    parser.add_argument('--profile', action='store_true',
+                        help="Print the time spent in each stage")
+    parser.add_argument('--full', action='store_true',
+                        help="Rebuild everything instead of only what the catalog changes affect")
+    args = parser.parse_args()
+    
     # File paths
     star_data_file = Path('stars_extracted/star_data.json')
     dso_data_file = Path('dso_extracted/dso_data.json')
     output_dir = Path('name_index')
     
     # Check if input files exist
-    if not star_data_file.exists():
+    if not star_data_file.exists() and not columns_path(star_data_file).exists():
         print(f"ERROR: Star data file not found: {star_data_file}")
         print("Please run extract_star_data.py first")
         return
     
-    if not dso_data_file.exists():
+    if not dso_data_file.exists() and not columns_path(dso_data_file).exists():
         print(f"ERROR: DSO data file not found: {dso_data_file}")
         print("Please run extract_dso_data.py first")
         return
     
+    # Previous build: skip it all if the catalogs didn't change, otherwise
+    # only process the objects that did
+    state_file = output_dir / STATE_FILE
+    inputs = {'stars': input_signature(star_data_file), 'dsos': input_signature(dso_data_file)}
+    state = None if args.full else load_state(state_file)
+    outputs_exist = all((output_dir / f).exists() for f in OUTPUTS.values())
+    if state and outputs_exist and state['inputs'] == inputs:
+        print("Name index is up to date (use --full to rebuild it)")
+        return
+    incremental = state is not None and outputs_exist
+    
     print("Creating name index for sky objects...\n")
     print(f"{'='*80}\n")
     
     # Extract names
-    star_names = extract_star_names(star_data_file)
-    dso_names = extract_dso_names(dso_data_file)
+    times = StageTimes()
+    star_state = CatalogState(state['stars'] if incremental else None)
+    dso_state = CatalogState(state['dsos'] if incremental else None)
+    star_names = extract_star_names(star_data_file, times, star_state)
+    dso_names = extract_dso_names(dso_data_file, times, dso_state)
     
     # Create index files
-    index = create_name_index(star_names, dso_names, output_dir)
+    outputs = OUTPUTS
+    if incremental:
+        with times('diff entries'):
+            outputs = outputs_to_update({**star_names, **dso_names},
+                                        (star_state, dso_state), output_dir)
+        print(f"\nOutputs to update: {', '.join(OUTPUTS[o] for o in outputs) or 'none'}")
+    index = create_name_index(star_names, dso_names, output_dir, times, outputs)
+    
+    with times('save state'), open(state_file, 'w', encoding='utf-8') as f:
+        json.dump({'version': STATE_VERSION, 'inputs': inputs,
+                   'stars': star_state.objects, 'dsos': dso_state.objects},
+                  f, separators=(',', ':'), ensure_ascii=False)
     
     # Show some examples
     print("\nSample entries:")
@@ -430,10 +741,16 @@ def main():
     print(f"{'='*80}")
     print(f"\nOutput files in '{output_dir}/':")
     print(f"  - name_index.json (full index with metadata)")
+    print(f"  - {NAME_BUNDLE}/ (binary index, memory mapped)")
     print(f"  - name_index_compact.json (compact for autocomplete)")
+    print(f"  - name_ngrams.npz (trigram index for infix and fuzzy search)")
     print(f"  - name_index.csv (spreadsheet format)")
     print(f"  - name_index.txt (plain text list)")
     print(f"  - name_index_stats.json (statistics)")
+    print(f"  - {STATE_FILE} (build state for incremental rebuilds)")
+    
+    if args.profile:
+        times.report()
 
 if __name__ == "__main__":
     main()
@@ -4,24 +4,56 @@ This creates SQLite databases for fast searching
 """
 
 import sqlite3
-import json
 from pathlib import Path
 
+from catalog_io import columns_path, iter_catalog_rows
+from healpix import HPX_ORDER, radec_to_pix
+
+def hpx_pixel(obj):
+    """Nested HEALPix pixel of an object at HPX_ORDER, for cone searches"""
+    ra, de = obj.get('ra'), obj.get('de')
+    if ra is None or de is None or ra != ra or de != de:  # Missing or NaN
+        return None
+    return radec_to_pix(ra % 360, max(-90.0, min(90.0, de)), HPX_ORDER)
+
+def create_fts_index(cursor, table, columns):
+    """
+    Build the FTS5 trigram index <table>_fts over the given text columns,
+    so that substring searches don't have to scan the whole table.
+    Returns False if this SQLite build has no FTS5 trigram tokenizer, in
+    which case search_sky.py falls back to LIKE queries.
+    """
+    fts_table = f'{table}_fts'
+    cursor.execute(f'DROP TABLE IF EXISTS {fts_table}')
+    try:
+        cursor.execute(f'''
+            CREATE VIRTUAL TABLE {fts_table} USING fts5(
+                {', '.join(columns)},
+                content='{table}', content_rowid='id', tokenize='trigram'
+            )
+        ''')
+    except sqlite3.OperationalError as e:
+        print(f"⚠ Full-text index not created ({e}), searches will use LIKE")
+        return False
+    # External content table: index the rows already inserted
+    cursor.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES('rebuild')")
+    return True
+
 def create_dso_index(json_file, db_file):
     """Create searchable DSO database"""
     print(f"Creating DSO search index from {json_file}...")
     
-    # Load DSO data
-    with open(json_file, 'r', encoding='utf-8') as f:
-        dsos = json.load(f)
+    # Load DSO data (from the columnar bundle when available)
+    dsos = list(iter_catalog_rows(json_file))
     
     # Create database
     conn = sqlite3.connect(db_file)
     cursor = conn.cursor()
     
-    # Create table
+    # Create table (rebuilt from scratch on every run)
+    cursor.execute('DROP TABLE IF EXISTS dsos')
     cursor.execute('''
-        CREATE TABLE IF NOT EXISTS dsos (
+        CREATE TABLE dsos (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             type TEXT,
             vmag REAL,
@@ -34,7 +66,8 @@ def create_dso_index(json_file, db_file):
             morpho TEXT,
             short_name TEXT,
             ids TEXT,
-            search_text TEXT
+            search_text TEXT,
+            hpx INTEGER
         )
     ''')
     
@@ -42,6 +75,7 @@ def create_dso_index(json_file, db_file):
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_search ON dsos(search_text)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_vmag ON dsos(vmag)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_type ON dsos(type)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_hpx ON dsos(hpx)')
     
     # Insert data
     for dso in dsos:
@@ -54,8 +88,8 @@ def create_dso_index(json_file, db_file):
         search_text = ' '.join(search_parts).upper()
         
         cursor.execute('''
-            INSERT INTO dsos (type, vmag, bmag, ra, de, smax, smin, angle, morpho, short_name, ids, search_text)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            INSERT INTO dsos (type, vmag, bmag, ra, de, smax, smin, angle, morpho, short_name, ids, search_text, hpx)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''', (
             dso.get('type'),
             dso.get('vmag'),
@@ -68,9 +102,13 @@ def create_dso_index(json_file, db_file):
             dso.get('morp'),
             dso.get('snam'),
             dso.get('ids'),
-            search_text
+            search_text,
+            hpx_pixel(dso)
         ))
     
+    # Full-text index over the names, ids and morphological types
+    create_fts_index(cursor, 'dsos', ['short_name', 'ids', 'morpho'])
+    
     conn.commit()
     conn.close()
     
@@ -81,17 +119,17 @@ def create_star_index(json_file, db_file):
     """Create searchable star database"""
     print(f"Creating star search index from {json_file}...")
     
-    # Load star data
-    with open(json_file, 'r', encoding='utf-8') as f:
-        stars = json.load(f)
+    # Load star data (from the columnar bundle when available)
+    stars = list(iter_catalog_rows(json_file))
     
     # Create database
     conn = sqlite3.connect(db_file)
     cursor = conn.cursor()
     
-    # Create table
+    # Create table (rebuilt from scratch on every run)
+    cursor.execute('DROP TABLE IF EXISTS stars')
     cursor.execute('''
-        CREATE TABLE IF NOT EXISTS stars (
+        CREATE TABLE stars (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             hip INTEGER,
             hd INTEGER,
@@ -103,7 +141,8 @@ def create_star_index(json_file, db_file):
             pde REAL,
             bv REAL,
             ids TEXT,
-            search_text TEXT
+            search_text TEXT,
+            hpx INTEGER
         )
     ''')
     
@@ -112,6 +151,7 @@ def create_star_index(json_file, db_file):
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_hd ON stars(hd)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_vmag ON stars(vmag)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_search ON stars(search_text)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_hpx ON stars(hpx)')
     
     # Insert data
     for star in stars:
@@ -126,8 +166,8 @@ def create_star_index(json_file, db_file):
         search_text = ' '.join(search_parts).upper()
         
         cursor.execute('''
-            INSERT INTO stars (hip, hd, vmag, ra, de, plx, pra, pde, bv, ids, search_text)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            INSERT INTO stars (hip, hd, vmag, ra, de, plx, pra, pde, bv, ids, search_text, hpx)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''', (
             star.get('hip'),
             star.get('hd'),
@@ -139,9 +179,13 @@ def create_star_index(json_file, db_file):
             star.get('pde'),
             star.get('bv'),
             star.get('ids'),
-            search_text
+            search_text,
+            hpx_pixel(star)
         ))
     
+    # Full-text index over the names and catalog numbers
+    create_fts_index(cursor, 'stars', ['search_text'])
+    
     conn.commit()
     conn.close()
     
@@ -156,7 +200,7 @@ if __name__ == "__main__":
     # Create DSO index
     dso_json = Path('dso_extracted/dso_data.json')
     dso_db = Path('dso_extracted/dso_search.db')
-    if dso_json.exists():
+    if dso_json.exists() or columns_path(dso_json).exists():
         create_dso_index(dso_json, dso_db)
     else:
         print(f"⚠ DSO data not found: {dso_json}")
@@ -164,7 +208,7 @@ if __name__ == "__main__":
     # Create star index
     star_json = Path('stars_extracted/star_data.json')
     star_db = Path('stars_extracted/star_search.db')
-    if star_json.exists():
+    if star_json.exists() or columns_path(star_json).exists():
         create_star_index(star_json, star_db)
     else:
         print(f"⚠ Star data not found: {star_json}")
@@ -173,3 +217,4 @@ if __name__ == "__main__":
     print("Search indexes created successfully!")
     print("="*80)
     print("\nUse 'python search_sky.py <query>' to search")
+    print("or 'python search_sky.py --cone <ra> <dec> <radius> [max_vmag]' for positional searches")
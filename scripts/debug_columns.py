@@ -1,11 +1,9 @@
 import struct
 
-f = open(r'apps\web-frontend\public\skydata\dso\Norder0\Dir0\Npix0.eph', 'rb')
-data = f.read()
-f.close()
+from eph import EphFile
 
-offset = 8
-chunk_data = data[offset+8:offset+8+struct.unpack('<I', data[offset+4:offset+8])[0]]
+with EphFile(r'apps\web-frontend\public\skydata\dso\Norder0\Dir0\Npix0.eph') as eph:
+    chunk_data = bytes(eph.find_chunk('DSO ')['data'])
 
 hdr_offset = 12
 n_col = struct.unpack('<I', chunk_data[hdr_offset+8:hdr_offset+12])[0]
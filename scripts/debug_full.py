@@ -1,12 +1,10 @@
 import struct
 import zlib
 
-f = open(r'apps\web-frontend\public\skydata\dso\Norder0\Dir0\Npix0.eph', 'rb')
-data = f.read()
-f.close()
+from eph import EphFile, unshuffle_bytes
 
-offset = 8
-chunk_data = data[offset+8:offset+8+struct.unpack('<I', data[offset+4:offset+8])[0]]
+with EphFile(r'apps\web-frontend\public\skydata\dso\Norder0\Dir0\Npix0.eph') as eph:
+    chunk_data = bytes(eph.find_chunk('DSO ')['data'])
 
 # Tile header
 tile_version = struct.unpack('<I', chunk_data[0:4])[0]
@@ -52,11 +50,7 @@ print(f"\nDecompressed {len(table_data)} bytes")
 # Unshuffle
 if flags & 1:
     print("Unshuffling data...")
-    unshuffled = bytearray(row_size * n_row)
-    for i in range(n_row):
-        for j in range(row_size):
-            unshuffled[i * row_size + j] = table_data[j * n_row + i]
-    table_data = bytes(unshuffled)
+    table_data = unshuffle_bytes(table_data, row_size, n_row)
 
 # Read first row
 print("\nFirst DSO:")
@@ -0,0 +1,277 @@
+"""
+Shared helpers to decode Stellarium .eph tile chunks.
+See src/eph-file.c for the description of the file format.
+"""
+
+import mmap
+import re
+import struct
+import zlib
+
+import numpy as np
+
+EPH_MAGIC = b'EPHE'
+
+# Numpy dtype of each eph column type (all values are little endian)
+COLUMN_DTYPES = {
+    'f': '<f4',  # float
+    'i': '<i4',  # int
+    'Q': '<u8',  # uint64
+}
+
+class EphFile:
+    """
+    Memory mapped .eph file.
+
+    Chunks are parsed lazily: iterating only reads the 8 bytes header of each
+    chunk and the chunk data is returned as a memoryview into the mapping, so
+    nothing is copied until the caller decodes it.
+
+    Usage:
+        with EphFile(path) as eph:
+            for chunk in eph.chunks(['STAR', 'STRS']):
+                ...
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self._file = open(filepath, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty file
+            self._file.close()
+            raise ValueError(f"Not a valid EPH file: {filepath}")
+        self.data = memoryview(self._mmap)
+
+        # Check magic string
+        if len(self.data) < 8 or self.data[:4] != EPH_MAGIC:
+            self.close()
+            raise ValueError(f"Not a valid EPH file: {filepath}")
+        self.version = struct.unpack_from('<I', self.data, 4)[0]
+
+    def close(self):
+        """Release the mapping and the file"""
+        if self.data is None:
+            return
+        self.data.release()
+        self.data = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Some chunk memoryviews are still alive, the mapping will be
+            # released with them.
+            pass
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def chunks(self, types=None, check_crc=False):
+        """
+        Iterate over the chunks of the file.
+
+        Args:
+            types: Only yield chunks of those types (e.g. ['STAR', 'STRS']),
+                   the other chunks are skipped without touching their data.
+            check_crc: Verify the CRC of the yielded chunks.  Files written
+                       by the engine tools leave the CRC to zero, in which
+                       case there is nothing to check.
+
+        Yields:
+            Dict with the chunk 'type', 'size', 'offset' (position of the
+            data in the file), 'crc' and 'data' (memoryview).
+        """
+        data = self.data
+        offset = 8
+        while offset + 8 <= len(data):
+            chunk_type = bytes(data[offset:offset+4]).decode('ascii', errors='ignore')
+            chunk_size = struct.unpack_from('<I', data, offset + 4)[0]
+            start = offset + 8
+            if start + chunk_size > len(data):
+                break
+            # Skip CRC (4 bytes after data)
+            offset = start + chunk_size + 4
+            if types is not None and chunk_type not in types:
+                continue
+
+            chunk_data = data[start:start+chunk_size]
+            crc = 0
+            if offset <= len(data):
+                crc = struct.unpack_from('<I', data, start + chunk_size)[0]
+            if check_crc and crc and zlib.crc32(chunk_data) != crc:
+                raise ValueError(f"Bad CRC for chunk {chunk_type} in {self.filepath}")
+            yield {
+                'type': chunk_type,
+                'size': chunk_size,
+                'offset': start,
+                'crc': crc,
+                'data': chunk_data
+            }
+
+    def find_chunk(self, chunk_type, check_crc=False):
+        """Return the first chunk of the given type, or None"""
+        for chunk in self.chunks([chunk_type], check_crc):
+            return chunk
+        return None
+
+def read_tile_header(chunk_data, offset=0):
+    """Read a tile header, return (version, nuniq, new offset)"""
+    version, nuniq = struct.unpack_from('<IQ', chunk_data, offset)
+    return version, nuniq, offset + 12
+
+def nuniq_to_order_pix(nuniq):
+    """Convert a HiPS nuniq position to (order, pix)"""
+    if nuniq <= 0:
+        return 0, 0
+    order = ((nuniq // 4).bit_length() - 1) // 2  # floor(log2(nuniq / 4) / 2)
+    pix = nuniq - 4 * (1 << (2 * order))
+    return order, pix
+
+def path_to_nuniq(path):
+    """
+    Get the HiPS nuniq position of a tile from its Norder/Dir/Npix path.
+    Returns None if the path doesn't follow the HiPS layout.
+    """
+    match = re.search(r'Norder(\d+)[\\/]Dir\d+[\\/]Npix(\d+)\.eph$', str(path))
+    if not match:
+        return None
+    order, pix = int(match.group(1)), int(match.group(2))
+    return 4 * (1 << (2 * order)) + pix
+
+def sort_tiles(paths):
+    """Sort tile paths in NUNIQ order (files outside the HiPS layout last)"""
+    def key(path):
+        nuniq = path_to_nuniq(path)
+        return (nuniq is None, nuniq or 0, str(path))
+    return sorted(paths, key=key)
+
+def read_table_header(chunk_data, offset):
+    """
+    Read a table header and its column definitions.
+    Returns (flags, row_size, n_row, columns, new offset)
+    """
+    flags, row_size, n_col, n_row = struct.unpack_from('<4I', chunk_data, offset)
+    offset += 16
+
+    columns = []
+    for i in range(n_col):
+        col_name = bytes(chunk_data[offset:offset+4]).decode('ascii', errors='ignore').rstrip('\x00')
+        col_type_str = bytes(chunk_data[offset+4:offset+8]).decode('ascii', errors='ignore').rstrip('\x00')
+        col_type = col_type_str[0] if col_type_str else ''  # Type is single character
+        col_unit, col_start, col_size = struct.unpack_from('<3I', chunk_data, offset + 8)
+
+        columns.append({
+            'name': col_name,
+            'type': col_type,
+            'unit': col_unit,
+            'start': col_start,
+            'size': col_size
+        })
+        offset += 20
+
+    return flags, row_size, n_row, columns, offset
+
+def read_compressed_block(chunk_data, offset):
+    """Read and decompress a data block, return (data, new offset)"""
+    size, comp_size = struct.unpack_from('<II', chunk_data, offset)
+    offset += 8
+    data = zlib.decompress(chunk_data[offset:offset+comp_size])
+    if len(data) != size:
+        raise ValueError(f"Bad block size: {len(data)} (expected {size})")
+    return data, offset + comp_size
+
+def unshuffle_bytes(data, row_size, num_rows):
+    """
+    Reverse byte shuffling.
+
+    Shuffled tables store byte j of every row together (see
+    eph_shuffle_bytes in src/eph-file.c), so the data is a (row_size,
+    num_rows) byte matrix that we only need to transpose.
+    """
+    total_size = row_size * num_rows
+    if len(data) < total_size:
+        return data
+
+    buf = np.frombuffer(data, dtype=np.uint8, count=total_size)
+    return buf.reshape(row_size, num_rows).T.tobytes()
+
+def shuffle_bytes(data, row_size, num_rows):
+    """Shuffle the bytes of a table for better compression (inverse of unshuffle_bytes)"""
+    total_size = row_size * num_rows
+    if len(data) < total_size:
+        return data
+
+    buf = np.frombuffer(data, dtype=np.uint8, count=total_size)
+    return buf.reshape(num_rows, row_size).T.tobytes()
+
+def table_dtype(columns, row_size):
+    """Build the numpy structured dtype matching one table row"""
+    names, formats, offsets = [], [], []
+    for col in columns:
+        if col['type'] == 's':
+            fmt = f"S{col['size']}"
+        elif col['type'] in COLUMN_DTYPES:
+            fmt = COLUMN_DTYPES[col['type']]
+        else:
+            continue  # Unknown type, ignore the column
+        names.append(col['name'])
+        formats.append(fmt)
+        offsets.append(col['start'])
+    return np.dtype({'names': names, 'formats': formats,
+                     'offsets': offsets, 'itemsize': row_size})
+
+def decode_table(chunk_data, offset, angle_columns=()):
+    """
+    Decode a whole table starting at offset (table header position).
+
+    Returns (columns, table) where table is a dict of column name -> numpy
+    array.  Float columns listed in angle_columns are converted from radians
+    to degrees (as float64), string columns are kept as raw bytes arrays.
+    """
+    flags, row_size, n_row, columns, offset = read_table_header(chunk_data, offset)
+    table_data, offset = read_compressed_block(chunk_data, offset)
+
+    # Unshuffle if needed
+    if flags & 1:
+        table_data = unshuffle_bytes(table_data, row_size, n_row)
+
+    rows = np.frombuffer(table_data, dtype=table_dtype(columns, row_size),
+                         count=n_row)
+    table = {}
+    for name in rows.dtype.names:
+        values = rows[name]
+        if name in angle_columns and values.dtype.kind == 'f':
+            values = values.astype(np.float64) * 180.0 / 3.14159265359
+        else:
+            # Copy so that we don't keep the whole decompressed block alive
+            values = values.copy()
+        table[name] = values
+    return columns, table
+
+def concat_tables(tables):
+    """Concatenate a list of tables with the same columns"""
+    if not tables:
+        return {}
+    names = list(tables[0])
+    return {name: np.concatenate([t[name] for t in tables]) for name in names}
+
+def table_len(table):
+    """Return the number of rows of a table"""
+    for values in table.values():
+        return len(values)
+    return 0
+
+def column_to_list(values):
+    """Convert a column array to a list of python values"""
+    if values.dtype.kind == 'S':
+        return [v.decode('utf-8', errors='ignore').rstrip('\x00') for v in values.tolist()]
+    return values.tolist()
+
+def table_to_rows(table, start=0, stop=None):
+    """Convert (a slice of) a table into a list of row dicts"""
+    names = list(table)
+    cols = [column_to_list(table[name][start:stop]) for name in names]
+    return [dict(zip(names, values)) for values in zip(*cols)]
@@ -5,33 +5,61 @@ Example: Using the name index for autocomplete/query suggestions
 import json
 from pathlib import Path
 
+import numpy as np
+
+from name_search import NAME_BUNDLE, NameIndex, NgramIndex, normalize_name
+from query_cache import LRUCache, PrefixCache
+
 class SkyObjectSearch:
     """Simple search engine for sky objects using the name index"""
     
-    def __init__(self, index_dir='name_index'):
+    def __init__(self, index_dir='name_index', cache_size=256):
         """Load the name index"""
         self.index_dir = Path(index_dir)
         
-        # Load compact index for fast autocomplete
-        compact_file = self.index_dir / 'name_index_compact.json'
-        with open(compact_file, 'r', encoding='utf-8') as f:
-            self.compact_index = json.load(f)
-        
-        # Load full index for detailed lookups
+        # Binary index written by create_name_index.py: memory mapped, names
+        # are decoded on access.  Parse the JSON index if it is missing or
+        # out of date.
         full_file = self.index_dir / 'name_index.json'
-        with open(full_file, 'r', encoding='utf-8') as f:
-            full_index = json.load(f)
+        bundle = self.index_dir / NAME_BUNDLE
+        if (bundle / 'manifest.json').exists() and (
+                not full_file.exists() or
+                (bundle / 'manifest.json').stat().st_mtime >= full_file.stat().st_mtime):
+            self.name_index = NameIndex.load(bundle)
+            index_mtime = (bundle / 'manifest.json').stat().st_mtime
+        else:
+            with open(full_file, 'r', encoding='utf-8') as f:
+                self.name_index = NameIndex.from_entries(json.load(f))
+            index_mtime = full_file.stat().st_mtime
         
-        # Create lookup dictionary (name -> object data)
-        self.lookup = {item['name'].lower(): item for item in full_index}
+        # Sorted name array for autocomplete, ranked by magnitude
+        self.prefix_index = self.name_index.prefix_index()
         
-        print(f"✓ Loaded {len(self.lookup)} sky objects")
-        print(f"  - Stars: {len(self.compact_index['stars'])}")
-        print(f"  - DSOs: {len(self.compact_index['dsos'])}")
+        # Trigram index for infix and fuzzy matching: saved by
+        # create_name_index.py, rebuilt here if missing or out of date
+        ngram_file = self.index_dir / 'name_ngrams.npz'
+        self.ngram_index = None
+        if ngram_file.exists() and ngram_file.stat().st_mtime >= index_mtime:
+            self.ngram_index = NgramIndex.load(ngram_file, self.prefix_index.keys)
+        if self.ngram_index is None:
+            self.ngram_index = NgramIndex.build(self.prefix_index.keys)
+        
+        # Autocomplete sends one query per keystroke: keep recent
+        # suggestions, and the prefix ranges and the names containing recent
+        # queries so that the next, longer query only searches those
+        self.results = LRUCache(cache_size)
+        self.ranges = PrefixCache(cache_size)
+        self.candidates = PrefixCache(cache_size)
+        
+        print(f"✓ Loaded {len(self.name_index)} sky object names")
+        print(f"  - Stars: {self.prefix_index.count('star')}")
+        print(f"  - DSOs: {self.prefix_index.count('dso')}")
     
     def suggest_names(self, query, limit=10, object_type=None):
         """
-        Get name suggestions for autocomplete
+        Get name suggestions for autocomplete: names starting with the
+        query, then names containing it (each brightest first), or if there
+        are none, names matching it with a few typos
         
         Args:
             query: Search query string
@@ -41,26 +69,82 @@ class SkyObjectSearch:
         Returns:
             List of matching names
         """
-        query_lower = query.lower()
+        key = (normalize_name(query), limit, object_type)
+        matches = self.results.get(key)
+        if matches is None:
+            matches = self._suggest_names(query, limit, object_type)
+            self.results.put(key, matches)
+        return list(matches)
+    
+    def _suggest_names(self, query, limit, object_type):
+        index = self.prefix_index
+        lo, hi = self.prefix_range(query, object_type)
+        matches = index.search(query, limit, object_type, bounds=(lo, hi))
+        if len(matches) >= limit:
+            return matches
         
-        # Choose which list to search
-        if object_type == 'star':
-            search_list = self.compact_index['stars']
-        elif object_type == 'dso':
-            search_list = self.compact_index['dsos']
+        # Fill up with names containing the query
+        view = index.views[object_type]
+        ids = self.contains(query).astype(np.int64)
+        if object_type is None:
+            ids = ids[(ids < lo) | (ids >= hi)]
         else:
-            search_list = self.compact_index['all']
-        
-        # Find matches (case-insensitive substring search)
-        matches = []
-        for name in search_list:
-            if query_lower in name.lower():
-                matches.append(name)
-                if len(matches) >= limit:
-                    break
+            ids = np.setdiff1d(ids, view[lo:hi], assume_unique=True)
+        matches += index.brightest(ids, limit - len(matches), object_type)
         
+        if not matches:
+            matches = self.fuzzy_names(query, limit, object_type)
         return matches
     
+    def prefix_range(self, query, object_type=None):
+        """
+        PrefixIndex.prefix_range() of the query, searched within the range
+        of a shorter cached query when there is one
+        """
+        key = normalize_name(query)
+        bounds = self.ranges.get((key, object_type))
+        if bounds is None:
+            shorter = self.ranges.narrow(key, object_type) or ()
+            bounds = self.prefix_index.prefix_range(key, object_type, *shorter)
+            self.ranges.put((key, object_type), bounds)
+        return bounds
+    
+    def contains(self, query):
+        """
+        Ids of the names containing the query, found among the names
+        containing a shorter cached query when there is one
+        """
+        key = normalize_name(query)
+        ids = self.candidates.get((key, ()))
+        if ids is None:
+            ids = self.ngram_index.contains(key, self.candidates.narrow(key))
+            self.candidates.put((key, ()), ids)
+        return ids
+    
+    def cache_stats(self):
+        """Hit and miss counters of the suggestion caches"""
+        return {'results': self.results.stats(), 'ranges': self.ranges.stats(),
+                'candidates': self.candidates.stats()}
+    
+    def fuzzy_names(self, query, limit=10, object_type=None):
+        """
+        Names containing the query with up to two typos (e.g. 'Betelguese'),
+        closest first, then brightest first
+        
+        Args:
+            query: Search query string
+            limit: Maximum number of suggestions
+            object_type: Filter by type ('star', 'dso', or None for all)
+        
+        Returns:
+            List of matching names
+        """
+        index = self.prefix_index
+        scored = [(dist, index.vmags[i], i) for dist, i in self.ngram_index.fuzzy(query)
+                  if object_type is None or index.types[i] == object_type]
+        scored.sort()
+        return [index.names[i] for _, _, i in scored[:limit]]
+    
     def get_object_info(self, name):
         """
         Get detailed information about a sky object
@@ -71,29 +155,23 @@ class SkyObjectSearch:
         Returns:
             Dictionary with object data, or None if not found
         """
-        return self.lookup.get(name.lower())
+        pos = self.prefix_index.find(name)
+        return self.name_index.entry(pos) if pos is not None else None
     
-    def search_by_prefix(self, prefix, limit=10):
+    def search_by_prefix(self, prefix, limit=10, object_type=None, ranked=True):
         """
         Search for objects starting with a prefix (useful for catalog searches)
         
         Args:
             prefix: Prefix to search for (e.g., "M ", "NGC ", "HIP ")
             limit: Maximum number of results
+            object_type: Filter by type ('star', 'dso', or None for all)
+            ranked: Brightest first if True, otherwise alphabetical order
         
         Returns:
             List of matching names
         """
-        prefix_lower = prefix.lower()
-        matches = []
-        
-        for name in self.compact_index['all']:
-            if name.lower().startswith(prefix_lower):
-                matches.append(name)
-                if len(matches) >= limit:
-                    break
-        
-        return matches
+        return self.prefix_index.search(prefix, limit, object_type, ranked)
     
     def format_object_info(self, obj):
         """Format object information for display"""
@@ -146,6 +224,12 @@ def demo():
         print(f"\nQuery: '{query}'")
         print(f"Suggestions: {', '.join(suggestions)}")
     
+    # Misspelled queries fall back to fuzzy matching
+    for query in ["Betelguese", "Andromda"]:
+        suggestions = search.fuzzy_names(query, limit=5)
+        print(f"\nTypo: '{query}'")
+        print(f"Did you mean: {', '.join(suggestions)}")
+    
     # Example 2: Search by object type
     print("\n" + "=" * 80)
     print("Example 2: Search by object type")
@@ -2,240 +2,186 @@
 Extract Star data from Stellarium .eph files to human-readable formats.
 """
 
-import struct
+import argparse
 import json
-import csv
-import zlib
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
 
-def read_eph_file(filepath):
-    """Read and parse an .eph file"""
-    with open(filepath, 'rb') as f:
-        data = f.read()
-    
-    # Check magic string
-    if data[:4] != b'EPHE':
-        raise ValueError(f"Not a valid EPH file: {filepath}")
-    
-    version = struct.unpack('<I', data[4:8])[0]
-    
-    offset = 8
-    chunks = []
-    
-    while offset < len(data):
-        if offset + 8 > len(data):
-            break
-            
-        chunk_type = data[offset:offset+4].decode('ascii', errors='ignore')
-        chunk_size = struct.unpack('<I', data[offset+4:offset+8])[0]
-        
-        if offset + 8 + chunk_size > len(data):
-            break
-            
-        chunk_data = data[offset+8:offset+8+chunk_size]
-        chunks.append({
-            'type': chunk_type,
-            'size': chunk_size,
-            'data': chunk_data
-        })
-        
-        # Skip CRC (4 bytes after data)
-        offset += chunk_size + 12
-    
-    return version, chunks
+from eph import EphFile, read_tile_header, decode_table, sort_tiles, table_len
+from catalog_io import CatalogWriter, DEFAULT_SINKS, SINKS, parse_sinks
+from tile_cache import TileCache
 
-def read_compressed_block(data):
-    """Read and decompress a data block"""
-    zlib_start = data.find(b'\x78\x9c')  # Find zlib header
-    if zlib_start == -1:
-        raise Exception("Zlib header not found in compressed block")
-    
-    compressed_data = data[zlib_start:]
-    uncompressed_data = zlib.decompress(compressed_data)
-    
-    return uncompressed_data
+# Both chunk types might exist
+STAR_CHUNK_TYPES = ('STAR', 'STRS')
 
-def unshuffle_bytes(data, row_size, num_rows):
-    """Reverse byte shuffling"""
-    total_size = row_size * num_rows
-    if len(data) < total_size:
-        return data
-    
-    unshuffled = bytearray(total_size)
-    for i in range(num_rows):
-        for j in range(row_size):
-            unshuffled[i * row_size + j] = data[j * num_rows + i]
-    
-    return bytes(unshuffled)
+# Angle columns stored in radians, converted to degrees on extraction
+ANGLE_COLUMNS = ('ra', 'de', 'pra', 'pde')
 
 def parse_star_chunk(chunk_data):
-    """Parse STAR chunk data"""
-    offset = 0
-    
-    # Read tile header (12 bytes)
-    version = struct.unpack('<I', chunk_data[offset:offset+4])[0]
-    nuniq = struct.unpack('<Q', chunk_data[offset+4:offset+12])[0]
-    order = int((nuniq // 4).bit_length() / 2) if nuniq > 0 else 0
-    pix = nuniq - 4 * (1 << (2 * order)) if nuniq > 0 else 0
-    offset = 12
-    
-    # Read table header (16 bytes)
-    flags = struct.unpack('<I', chunk_data[offset:offset+4])[0]
-    row_size = struct.unpack('<I', chunk_data[offset+4:offset+8])[0]
-    n_col = struct.unpack('<I', chunk_data[offset+8:offset+12])[0]
-    n_row = struct.unpack('<I', chunk_data[offset+12:offset+16])[0]
-    offset = 12 + 16  # Tile header + table header = 28
-    
-    # Read column definitions
-    columns = []
-    for i in range(n_col):
-        col_name = chunk_data[offset:offset+4].decode('ascii', errors='ignore').rstrip('\x00')
-        col_type_str = chunk_data[offset+4:offset+8].decode('ascii', errors='ignore').rstrip('\x00')
-        col_type = col_type_str[0] if col_type_str else ''  # Type is single character
-        col_unit = struct.unpack('<I', chunk_data[offset+8:offset+12])[0]
-        col_start = struct.unpack('<I', chunk_data[offset+12:offset+16])[0]
-        col_size = struct.unpack('<I', chunk_data[offset+16:offset+20])[0]
-        
-        columns.append({
-            'name': col_name,
-            'type': col_type,
-            'unit': col_unit,
-            'start': col_start,
-            'size': col_size
-        })
-        offset += 20
-    
-    # Read compressed data block
-    table_data = read_compressed_block(chunk_data[offset:])
-    
-    # Unshuffle if needed
-    if flags & 1:
-        table_data = unshuffle_bytes(table_data, row_size, n_row)
-    
-    # Parse rows
-    rows = []
-    data_offset = 0
-    for i in range(n_row):
-        row = {}
-        row_data = table_data[data_offset:data_offset+row_size]
-        
-        for col in columns:
-            value = None
-            try:
-                if col['type'] == 'f':  # float
-                    value = struct.unpack('<f', row_data[col['start']:col['start']+4])[0]
-                    # Convert radians to degrees for angles
-                    if col['name'] in ['ra', 'de', 'pra', 'pde']:
-                        value = value * 180.0 / 3.14159265359
-                elif col['type'] == 'i':  # int
-                    value = struct.unpack('<i', row_data[col['start']:col['start']+4])[0]
-                elif col['type'] == 'Q':  # uint64
-                    value = struct.unpack('<Q', row_data[col['start']:col['start']+8])[0]
-                elif col['type'] == 's':  # string
-                    value = row_data[col['start']:col['start']+col['size']].decode('utf-8', errors='ignore').rstrip('\x00')
-            except:
-                value = None
-            
-            row[col['name']] = value
-        
-        rows.append(row)
-        data_offset += row_size
-    
-    return columns, rows
+    """Parse STAR chunk data, return (nuniq, columns, table of column arrays)"""
+    # Tile header (12 bytes) then the table
+    version, nuniq, offset = read_tile_header(chunk_data)
+    return (nuniq, *decode_table(chunk_data, offset, ANGLE_COLUMNS))
+
+def decode_star_tile(eph_file):
+    """
+    Decode all the STAR chunks of one tile file.
+
+    This runs in the worker processes, so only compact columnar data is sent
+    back: returns (list of (nuniq, table), decoding time in s, error or None).
+    """
+    start = time.perf_counter()
+    results = []
+    error = None
+    try:
+        with EphFile(eph_file) as eph:
+            for chunk in eph.chunks(STAR_CHUNK_TYPES):
+                nuniq, columns, table = parse_star_chunk(chunk['data'])
+                results.append((nuniq, table))
+    except Exception as e:
+        error = str(e)
+    return results, time.perf_counter() - start, error
+
+def decode_star_tiles(eph_files, workers=1, cache=None):
+    """
+    Decode tile files, in a process pool if workers > 1, or take them from
+    the tile cache.  Yields (list of (nuniq, table), decoding time in s or
+    None if cached, error or None) in eph_files order.  At most 2 * workers
+    tiles are in flight, so decoded tiles don't pile up while the caller
+    writes them.
+    """
+    def cached(eph_file):
+        return cache.get(eph_file) if cache else None
+
+    if workers <= 1:
+        for eph_file in eph_files:
+            results = cached(eph_file)
+            yield (results, None, None) if results is not None else decode_star_tile(eph_file)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+
+        def result(item):
+            return item.result() if isinstance(item, Future) else (item, None, None)
+
+        for eph_file in eph_files:
+            results = cached(eph_file)
+            pending.append(executor.submit(decode_star_tile, eph_file) if results is None
+                           else results)
+            if len(pending) >= 2 * workers:
+                yield result(pending.popleft())
+        while pending:
+            yield result(pending.popleft())
 
-def extract_star_data(star_dir, output_dir, max_files=None):
-    """Extract all star data from .eph files"""
+def extract_star_data(star_dir, output_dir, max_files=None, workers=1, sinks=DEFAULT_SINKS,
+                      cache_dir=None):
+    """
+    Extract all star data from .eph files.
+
+    Tiles are written to the output sinks as soon as they are decoded, so
+    only a few tiles (2 per worker) are kept in memory at a time.  If cache_dir is set, only
+    the tiles that changed since the last run are decoded (see tile_cache).
+    Returns a summary dict with the number of stars, a sample star and the
+    written files.
+    """
     star_path = Path(star_dir)
-    output_path = Path(output_dir)
-    output_path.mkdir(exist_ok=True)
-    
-    all_stars = []
+    timings = []
     
-    # Find all .eph files
-    eph_files = list(star_path.rglob('*.eph'))
+    # Find all .eph files, in NUNIQ order so that the output doesn't depend
+    # on the file system order or on the number of workers.
+    eph_files = sort_tiles(star_path.rglob('*.eph'))
     if max_files:
         eph_files = eph_files[:max_files]
     
-    print(f"Found {len(eph_files)} .eph files\n")
-    
-    for eph_file in eph_files:
-        print(f"Processing: {eph_file.name}")
-        try:
-            version, chunks = read_eph_file(eph_file)
-            
-            for chunk in chunks:
-                if chunk['type'] in ['STAR', 'STRS']:  # Both chunk types might exist
-                    try:
-                        columns, rows = parse_star_chunk(chunk['data'])
-                        all_stars.extend(rows)
-                        print(f"  Extracted {len(rows)} stars")
-                    except Exception as e:
-                        print(f"  Error parsing STAR chunk: {e}")
-        
-        except Exception as e:
-            print(f"  Error: {e}")
-    
-    if not all_stars:
-        print("\nNo star data found!")
+    print(f"Found {len(eph_files)} .eph files ({workers} worker(s))\n")
+    
+    writer = CatalogWriter(output_dir, 'star_data', sinks,
+                           text=('Star Data', 'stars', 'Star', 1000))
+    start = time.perf_counter()
+    cache = None
+    if cache_dir:
+        cache = TileCache(cache_dir, star_path, 'stars:' + ','.join(ANGLE_COLUMNS))
+    decoded = decode_star_tiles(eph_files, workers, cache)
+    
+    # Cached and decoded tiles come in NUNIQ order
+    for eph_file, (results, elapsed, error) in zip(eph_files, decoded):
+        name = eph_file.relative_to(star_path).as_posix()
+        if elapsed is None:
+            n_stars = sum(table_len(table) for nuniq, table in results)
+            print(f"Cached:    {name:30s} {n_stars:6d} stars")
+        else:
+            if error:
+                print(f"Error in {name}: {error}")
+                continue
+            n_stars = sum(table_len(table) for nuniq, table in results)
+            print(f"Processed: {name:30s} {n_stars:6d} stars in {elapsed * 1000:7.1f} ms")
+            timings.append((elapsed, name))
+            if cache:
+                cache.put(eph_file, results)
+        for nuniq, table in results:
+            writer.write(table)
+    files = writer.close()
+    if cache:
+        cache.save()
+        print(f"\nTile cache: {cache.stats['reused']} reused, {cache.stats['decoded']} decoded, "
+              f"{cache.stats['evicted']} evicted")
+    wall_time = time.perf_counter() - start
+    
+    if timings:
+        print(f"\nProcessed {len(eph_files)} tiles in {wall_time:.2f} s "
+              f"({len(timings)} decoded, sum of decode times: {sum(t for t, _ in timings):.2f} s)")
+        print("Slowest tiles:")
+        for elapsed, name in sorted(timings, reverse=True)[:5]:
+            print(f"  {name:30s} {elapsed * 1000:7.1f} ms")
+    
+    if not writer.count:
+        print(f"\nNo star data found! Previous outputs in {output_dir} left unchanged")
         return
     
     print(f"\n{'='*80}")
-    print(f"Total stars extracted: {len(all_stars)}")
+    print(f"Total stars extracted: {writer.count}")
     print(f"{'='*80}\n")
     
-    # Save to JSON
-    json_file = output_path / 'star_data.json'
-    with open(json_file, 'w', encoding='utf-8') as f:
-        json.dump(all_stars, f, indent=2)
-    print(f"Saved to {json_file}")
-    
-    # Save to CSV
-    if all_stars:
-        csv_file = output_path / 'star_data.csv'
-        with open(csv_file, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=all_stars[0].keys())
-            writer.writeheader()
-            writer.writerows(all_stars)
-        print(f"Saved to {csv_file}")
-    
-    # Save to readable text (first 1000 stars to avoid huge file)
-    txt_file = output_path / 'star_data.txt'
-    with open(txt_file, 'w', encoding='utf-8') as f:
-        f.write(f"Star Data\n")
-        f.write(f"{'='*80}\n\n")
-        f.write(f"Total stars: {len(all_stars)}\n")
-        f.write(f"(Showing first 1000 in text format)\n\n")
-        
-        for i, star in enumerate(all_stars[:1000], 1):
-            f.write(f"Star #{i}\n")
-            f.write(f"{'-'*40}\n")
-            for key, value in star.items():
-                if value is not None:
-                    f.write(f"  {key:10s}: {value}\n")
-            f.write(f"\n")
-    
-    print(f"Saved to {txt_file}")
+    for path in files:
+        print(f"Saved to {path}")
     
-    return all_stars
+    return {'count': writer.count, 'sample': writer.first_row, 'files': files}
 
 if __name__ == "__main__":
-    star_dir = r'apps\web-frontend\public\skydata\stars'
-    output_dir = r'stars_extracted'
+    parser = argparse.ArgumentParser(description="Extract star data from .eph files")
+    parser.add_argument('--star-dir', default=os.path.join('apps', 'web-frontend', 'public', 'skydata', 'stars'))
+    parser.add_argument('--output-dir', default='stars_extracted')
+    parser.add_argument('--max-files', type=int, default=None,
+                        help="Only process the first N tiles (default: full survey)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Number of worker processes (1 to decode serially)")
+    parser.add_argument('--outputs', type=parse_sinks, default=list(DEFAULT_SINKS),
+                        help=f"Comma separated outputs to write, from: {', '.join(SINKS)} "
+                             f"(default: {','.join(DEFAULT_SINKS)})")
+    parser.add_argument('--cache-dir', default=None,
+                        help="Tile cache directory (default: <output-dir>/.eph_cache)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Decode every tile, ignoring the tile cache")
+    args = parser.parse_args()
+    
+    cache_dir = None
+    if not args.no_cache:
+        cache_dir = args.cache_dir or os.path.join(args.output_dir, '.eph_cache')
     
     print("Extracting star data from .eph files...\n")
-    print("Note: Processing first 10 files only (there are many star files)")
-    print("Remove max_files parameter to extract all stars\n")
     
-    stars = extract_star_data(star_dir, output_dir, max_files=10)
+    stars = extract_star_data(args.star_dir, args.output_dir, max_files=args.max_files,
+                              workers=args.workers, sinks=args.outputs, cache_dir=cache_dir)
     
     if stars:
         print(f"\n{'='*80}")
-        print(f"SUCCESS! Extracted {len(stars)} stars")
+        print(f"SUCCESS! Extracted {stars['count']} stars")
         print(f"{'='*80}")
         print(f"\nFiles created:")
-        print(f"  - star_data.json  (JSON format)")
-        print(f"  - star_data.csv   (CSV spreadsheet)")
-        print(f"  - star_data.txt   (Human-readable text, first 1000 stars)")
+        for path in stars['files']:
+            print(f"  - {path}")
         print(f"\nSample star:")
-        if stars:
-            print(json.dumps(stars[0], indent=2))
+        print(json.dumps(stars['sample'], indent=2))
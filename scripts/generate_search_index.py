@@ -1,12 +1,22 @@
 
+import argparse
 import json
 import csv
 import re
+from bisect import bisect_right
+from pathlib import Path
+
+from create_name_index import convert_greek_to_english
 
 # File paths
 NAME_INDEX_PATH = 'apps/web-frontend/public/skydata/name_index_compact.json'
 DSO_DATA_PATH = 'dso_extracted/dso_data.csv'
 OUTPUT_PATH = 'apps/web-frontend/public/skydata/search_index.json'
+SHARDS_PATH = 'apps/web-frontend/public/skydata/search_index'
+
+# Sharded index: shards hold contiguous ranges of normalized names, of
+# about SHARD_SIZE entries
+SHARD_SIZE = 2000
 
 def normalize(s):
     if not s:
@@ -18,27 +28,44 @@ def normalize(s):
         n = n[4:]
     return n
 
-def load_dso_types():
-    dso_types = {}
+def load_dso_aliases():
+    """
+    Load the DSO catalog as an alias index.
+
+    Returns (names, aliases, types): names maps every id and snam of an
+    object, and their Greek letter spellings (as generated by
+    create_name_index.py), to a stable object key, its snam or first id.
+    aliases maps the normalize()d forms of the same names to the object
+    key, for names spelled differently.  types maps the object keys to
+    their type.  A name shared by several objects resolves to the first one
+    in the catalog, as in the name index.
+    """
+    names = {}
+    aliases = {}
+    types = {}
+    conflicts = 0
     with open(DSO_DATA_PATH, 'r', encoding='utf-8') as f:
         reader = csv.DictReader(f)
-        for row in reader:
-            # Map IDs to type
-            # IDs in name_index might be primary name or other designations
-            # We'll map all known IDs to the type
-            obj_type = row.get('type', 'dso')
-            ids_str = row.get('ids', '')
-            if ids_str:
-                ids = ids_str.split('|')
-                for i in ids:
-                    dso_types[i] = obj_type
-            
-            # Also map the primary 'snam'
+        for row_num, row in enumerate(reader):
             snam = row.get('snam', '')
-            if snam:
-                dso_types[snam] = obj_type
-                
-    return dso_types
+            ids = [i for i in row.get('ids', '').split('|') if i]
+            key = snam or (ids[0] if ids else f'#{row_num}')
+            if key in types:
+                key = f'{key}#{row_num}'
+            types[key] = row.get('type', 'dso')
+            
+            for name in [snam] + ids:
+                for variant in [name] + convert_greek_to_english(name):
+                    names.setdefault(variant, key)
+                    alias = normalize(variant)
+                    if not alias:
+                        continue
+                    owner = aliases.setdefault(alias, key)
+                    if owner != key:
+                        conflicts += 1
+    
+    print(f"  {len(types)} objects, {len(aliases)} aliases ({conflicts} shared by several objects)")
+    return names, aliases, types
 
 def categorize_dso(dso_type):
     # Mapping based on previous analysis
@@ -55,9 +82,81 @@ def categorize_dso(dso_type):
     else:
         return 'other'
 
+def entry_key(entry):
+    """Normalized name of a "NORMALIZED|Original..." entry"""
+    return entry.split('|', 1)[0]
+
+def split_shards(index, shard_size=SHARD_SIZE):
+    """
+    Split an index into shards of consecutive normalized names.
+
+    Returns (boundaries, shards): shard i holds the entries whose normalized
+    name is >= boundaries[i] and < boundaries[i + 1].  Each boundary is the
+    shortest prefix of the first name of its shard that sorts after the last
+    name of the previous one, so the names starting with a typed prefix are
+    in the shards from the last boundary <= prefix to the last boundary
+    <= prefix + '\\uffff' (usually just one).  Shards have the structure of
+    the full index and keep its order inside each list, so the client
+    binary search works on them unchanged.
+    """
+    keys = [entry_key(e) for e in index['stars']]
+    keys += [entry_key(e) for entries in index['dsos'].values() for e in entries]
+    keys.sort()
+    
+    boundaries = ['']
+    size = 0
+    for prev, key in zip([None] + keys, keys):
+        if size >= shard_size and key != prev:
+            boundary = next(key[:n] for n in range(1, len(key) + 1) if key[:n] > prev)
+            boundaries.append(boundary)
+            size = 0
+        size += 1
+    
+    shards = [{'version': index['version'], 'stars': [],
+               'dsos': {c: [] for c in index['dsos']}} for _ in boundaries]
+    for entry in index['stars']:
+        shards[bisect_right(boundaries, entry_key(entry)) - 1]['stars'].append(entry)
+    for cat, entries in index['dsos'].items():
+        for entry in entries:
+            shards[bisect_right(boundaries, entry_key(entry)) - 1]['dsos'][cat].append(entry)
+    return boundaries, shards
+
+def write_shards(index, output_dir, shard_size=SHARD_SIZE):
+    """
+    Write the sharded index: <i>.json for each shard and a manifest.json
+    with the shard boundaries
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    boundaries, shards = split_shards(index, shard_size)
+    
+    # Remove the shards of a previous run that had more of them
+    for old in output_dir.glob('*.json'):
+        if old.stem.isdigit() and int(old.stem) >= len(shards):
+            old.unlink()
+    
+    for i, shard in enumerate(shards):
+        with open(output_dir / f'{i}.json', 'w', encoding='utf-8') as f:
+            json.dump(shard, f)
+    
+    manifest = {
+        'version': index['version'],
+        'boundaries': boundaries,
+    }
+    with open(output_dir / 'manifest.json', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    return boundaries
+
 def main():
+    parser = argparse.ArgumentParser(description="Generate the web frontend search index")
+    parser.add_argument('--shards', action='store_true',
+                        help=f"Also write the index split in prefix shards to {SHARDS_PATH}/")
+    parser.add_argument('--shard-size', type=int, default=SHARD_SIZE,
+                        help="Number of entries per shard")
+    args = parser.parse_args()
+    
     print("Loading DSO data...")
-    dso_type_map = load_dso_types()
+    dso_names, dso_aliases, dso_types = load_dso_aliases()
     
     print("Loading existing name index...")
     with open(NAME_INDEX_PATH, 'r', encoding='utf-8') as f:
@@ -110,29 +209,33 @@ def main():
         "other": []
     }
     
-    # The old index 'dsos' is just a list of names. We need to look up their types.
-    # Be careful: The name in the index might not be the primary key in dso_data
-    # But dso_type_map has all IDs mapped.
-    
+    # The old index 'dsos' is just a list of names. We need to look up their
+    # types: any designation of an object resolves to it, exactly or through
+    # the alias index whatever its spacing, punctuation or Greek spelling
+    unresolved = []
     for dso_name in old_index.get('dsos', []):
-        # Default to 'other' (or generic dso)
-        d_type = 'dso'
-        
-        # Try to find type
-        # 1. Direct match
-        if dso_name in dso_type_map:
-            d_type = dso_type_map[dso_name]
-        # 2. Try variations (remove NAME)
-        elif dso_name.startswith('NAME ') and dso_name[5:] in dso_type_map:
-            d_type = dso_type_map[dso_name[5:]]
+        norm = normalize(dso_name)
+        key = dso_names.get(dso_name) or dso_aliases.get(norm)
+        if key is None:
+            # Default to 'other' (or generic dso)
+            d_type = 'dso'
+            unresolved.append(dso_name)
+        else:
+            d_type = dso_types[key]
         
         category = categorize_dso(d_type)
-        norm = normalize(dso_name)
         
         # Store as "NORMALIZED|Original Name|Type"
         entry = f"{norm}|{dso_name}|{d_type}"
         processed_dsos[category].append(entry)
-        
+    
+    total = len(old_index.get('dsos', []))
+    resolved = total - len(unresolved)
+    print(f"DSO type resolution: {resolved}/{total} names "
+          f"({resolved / total * 100 if total else 100:.2f}%)")
+    if unresolved:
+        print(f"  Unresolved: {', '.join(unresolved[:10])}" + (" ..." if len(unresolved) > 10 else ""))
+    
     # Sort each category
     for cat in processed_dsos:
         processed_dsos[cat].sort()
@@ -147,6 +250,11 @@ def main():
     with open(OUTPUT_PATH, 'w', encoding='utf-8') as f:
         json.dump(new_index, f)
     
+    if args.shards:
+        print(f"Writing shards to {SHARDS_PATH}/...")
+        boundaries = write_shards(new_index, SHARDS_PATH, args.shard_size)
+        print(f"Shards: {len(boundaries)}")
+    
     print("Done.")
 
 if __name__ == '__main__':
@@ -0,0 +1,181 @@
+"""
+Minimal HEALPix (nested scheme) helpers, ported from src/algos/healpix.c.
+
+Used to index the extracted catalogs spatially: each object gets the nested
+pixel that contains it at HPX_ORDER, and a cone is converted into a small
+list of pixel ranges at that order (children of a nested pixel are
+contiguous), which the SQLite index can answer directly.
+"""
+
+import math
+
+# Order of the pixel column stored in the search databases
+# (nside 256, pixels of about 0.23 deg)
+HPX_ORDER = 8
+
+# Position of the healpix faces.
+FACES = [(1, 0), (3, 0), (5, 0), (7, 0),
+         (0, -1), (2, -1), (4, -1), (6, -1),
+         (1, -2), (3, -2), (5, -2), (7, -2)]
+
+def _spread_bits(v):
+    """Interleave the bits of v with zeros (0b111 -> 0b10101)"""
+    r = 0
+    i = 0
+    while v:
+        r |= (v & 1) << (2 * i)
+        v >>= 1
+        i += 1
+    return r
+
+def _compress_bits(v):
+    """Inverse of _spread_bits (keep the even bits)"""
+    r = 0
+    i = 0
+    while v:
+        r |= (v & 1) << i
+        v >>= 2
+        i += 1
+    return r
+
+def xyf2nest(nside, ix, iy, face_num):
+    return face_num * nside * nside + (_spread_bits(ix) | (_spread_bits(iy) << 1))
+
+def nest2xyf(nside, pix):
+    npface = nside * nside
+    face_num = pix // npface
+    pix &= npface - 1
+    return _compress_bits(pix), _compress_bits(pix >> 1), face_num
+
+def _xy2vec(x, y):
+    if abs(y) > math.pi / 4:
+        # Polar
+        sigma = 2 - abs(y * 4) / math.pi
+        z = (1 if y > 0 else -1) * (1 - sigma * sigma / 3)
+        xc = -math.pi + (2 * math.floor((x + math.pi) * 4 / (2 * math.pi)) + 1) * math.pi / 4
+        phi = (xc + (x - xc) / sigma) if sigma else x
+    else:
+        # Equatorial
+        phi = x
+        z = y * 8 / (math.pi * 3)
+    stheta = math.sqrt((1 - z) * (1 + z))
+    return (stheta * math.cos(phi), stheta * math.sin(phi), z)
+
+def xyf2vec(nside, x, y, f):
+    return _xy2vec((FACES[f][0] + (x - y + 0.0) / nside) * math.pi / 4,
+                   (FACES[f][1] + (x + y + 0.0) / nside) * math.pi / 4)
+
+def pix2vec(nside, pix):
+    """Unit vector of the center of a nested pixel"""
+    ix, iy, face = nest2xyf(nside, pix)
+    return _xy2vec((FACES[face][0] + (ix - iy + 0.0) / nside) * math.pi / 4,
+                   (FACES[face][1] + (ix + iy + 1.0) / nside) * math.pi / 4)
+
+def _ang2pix_nest_z_phi(nside, z, phi):
+    za = abs(z)
+    tt = math.fmod(phi, 2 * math.pi)
+    if tt < 0:
+        tt += 2 * math.pi
+    tt *= 2 / math.pi  # in [0,4)
+
+    if za <= 2 / 3:  # Equatorial region
+        temp1 = nside * (0.5 + tt)
+        temp2 = nside * (z * 0.75)
+        jp = int(temp1 - temp2)  # index of  ascending edge line
+        jm = int(temp1 + temp2)  # index of descending edge line
+        ifp = jp // nside  # in {0,4}
+        ifm = jm // nside
+        face_num = (ifp | 4) if ifp == ifm else (ifp if ifp < ifm else ifm + 8)
+        ix = jm & (nside - 1)
+        iy = nside - (jp & (nside - 1)) - 1
+    else:  # polar region, za > 2/3
+        ntt = min(int(tt), 3)
+        tp = tt - ntt
+        tmp = nside * math.sqrt(3 * (1 - za))
+        jp = min(int(tp * tmp), nside - 1)  # increasing edge line index
+        jm = min(int((1.0 - tp) * tmp), nside - 1)  # decreasing edge line index
+        if z >= 0:
+            face_num = ntt  # in {0,3}
+            ix = nside - jm - 1
+            iy = nside - jp - 1
+        else:
+            face_num = ntt + 8  # in {8,11}
+            ix = jp
+            iy = jm
+
+    return xyf2nest(nside, ix, iy, face_num)
+
+def radec_to_vec(ra, de):
+    """Unit vector from RA/Dec in degrees"""
+    ra, de = math.radians(ra), math.radians(de)
+    return (math.cos(de) * math.cos(ra), math.cos(de) * math.sin(ra), math.sin(de))
+
+def radec_to_pix(ra, de, order=HPX_ORDER):
+    """Nested pixel containing RA/Dec (degrees) at the given order"""
+    return _ang2pix_nest_z_phi(1 << order, math.sin(math.radians(de)), math.radians(ra))
+
+def bounding_cap(nside, pix):
+    """
+    Bounding cap of a pixel, as (center unit vector, angular radius in rad).
+    Same computation as healpix_get_bounding_cap, from the pixel corners.
+    """
+    ix, iy, face = nest2xyf(nside, pix)
+    corners = [xyf2vec(nside, ix + (i % 2), iy + (i // 2), face) for i in range(4)]
+    c = [sum(v[k] for v in corners) for k in range(3)]
+    n = math.sqrt(c[0] ** 2 + c[1] ** 2 + c[2] ** 2)
+    c = (c[0] / n, c[1] / n, c[2] / n)
+    d = min(c[0] * v[0] + c[1] * v[1] + c[2] * v[2] for v in corners)
+    return c, math.acos(max(-1.0, min(1.0, d)))
+
+def angular_distance(v1, v2):
+    """Angle in rad between two unit vectors"""
+    d = v1[0] * v2[0] + v1[1] * v2[1] + v1[2] * v2[2]
+    return math.acos(max(-1.0, min(1.0, d)))
+
+def cone_ranges(ra, de, radius, order=HPX_ORDER):
+    """
+    Compute the pixel ranges at `order` that may intersect a cone.
+
+    Args:
+        ra, de: Center of the cone, in degrees.
+        radius: Radius of the cone, in degrees.
+
+    Returns:
+        A sorted list of inclusive (first, last) nested pixel ranges at
+        `order`.  This is a superset of the cone: the objects still have
+        to be filtered by their actual distance.
+    """
+    center = radec_to_vec(ra, de)
+    radius = math.radians(radius)
+    # Stop the recursion once the pixels are about a quarter of the cone,
+    # the ranges are then fine enough and stay few.
+    max_order = order
+    while max_order > 0 and math.radians(58.6 / (1 << max_order)) < radius / 4:
+        max_order -= 1
+
+    ranges = []
+    stack = [(0, pix) for pix in range(12)]
+    while stack:
+        o, pix = stack.pop()
+        cap_center, cap_radius = bounding_cap(1 << o, pix)
+        # The corners cap doesn't fully contain the curved pixel edges,
+        # so add a small margin.
+        cap_radius *= 1.1
+        dist = angular_distance(center, cap_center)
+        if dist > radius + cap_radius:
+            continue
+        if dist + cap_radius <= radius or o >= max_order:
+            shift = 2 * (order - o)
+            ranges.append((pix << shift, ((pix + 1) << shift) - 1))
+        else:
+            stack.extend((o + 1, pix * 4 + i) for i in range(4))
+
+    # Merge the contiguous ranges
+    ranges.sort()
+    merged = []
+    for first, last in ranges:
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+        else:
+            merged.append((first, last))
+    return merged
@@ -0,0 +1,488 @@
+"""
+In-memory indexes over the sky object names of name_index.json.
+
+PrefixIndex keeps the normalized names in one sorted array.  A prefix
+query is two binary searches giving the range of matching names; the
+brightest k of that range are then extracted with a sparse table of range
+minimums over vmag, so a ranked prefix query costs O(log n + k log k)
+whatever the number of matching names.  Type filtered views ('star',
+'dso') are arrays of positions into the shared sorted arrays, with their
+own range minimum tables.
+
+NameIndex serves the entries of name_index.json from a binary bundle
+(name_index_columns/, see write_name_bundle): names are stored once in a
+utf-8 blob with an offsets array, the metadata in fixed width columns, and
+a permutation gives the sorted order.  Everything is memory mapped and a
+name or an entry is only decoded when it is accessed.
+
+NgramIndex maps every trigram of the normalized names to the sorted list
+(posting list) of the names containing it.  Infix queries intersect the
+postings of the query trigrams and fuzzy queries count the trigrams each
+name shares with the query, so only the few candidate names are compared
+with the query.  It is saved next to name_index.json as flat numpy arrays
+(name_ngrams.npz) and loaded without any parsing.
+"""
+
+import heapq
+import re
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+from catalog_io import NpyColumnsWriter, load_catalog
+
+NAME_TYPES = ('star', 'dso')
+
+# Sorts after any character that can appear in a name
+MAX_CHAR = '\U0010ffff'
+
+# Binary name index: a catalog_io columnar bundle next to name_index.json
+NAME_BUNDLE = 'name_index_columns'
+NAME_STR_COLUMNS = ('name', 'primary_name', 'dso_type')
+NAME_NUM_COLUMNS = {
+    'type': np.uint8,     # Index into NAME_TYPES
+    'vmag': np.float64,   # NaN if unknown
+    'ra': np.float64,
+    'de': np.float64,
+    'hip': np.int32,      # 0 if unknown
+    'hd': np.int32,
+    'order': np.uint32,   # Permutation sorting the names by normalized key
+}
+
+NGRAM = 3
+NGRAM_FORMAT_VERSION = 1
+
+# Fuzzy matching: names sharing the most trigrams with the query are
+# compared with it, at most this many per query
+FUZZY_CANDIDATES = 500
+
+def normalize_name(name):
+    """Key used for case-insensitive name matching"""
+    return name.casefold()
+
+def sort_order(names):
+    """Permutation sorting names by normalized key (stable)"""
+    keys = [normalize_name(n) for n in names]
+    return sorted(range(len(keys)), key=keys.__getitem__)
+
+class RangeMin:
+    """
+    Sparse table answering 'position of the smallest value in [lo, hi)'
+    in O(1), after an O(n log n) build.  Ties go to the leftmost position.
+    """
+
+    def __init__(self, values):
+        self.values = values
+        level = np.arange(len(values), dtype=np.int32)
+        self.levels = [level]
+        width = 1
+        while 2 * width <= len(values):
+            left, right = level[:-width], level[width:]
+            level = np.where(values[right] < values[left], right, left)
+            self.levels.append(level)
+            width *= 2
+
+    def argmin(self, lo, hi):
+        j = (hi - lo).bit_length() - 1
+        level = self.levels[j]
+        a, b = int(level[lo]), int(level[hi - (1 << j)])
+        return b if self.values[b] < self.values[a] else a
+
+    def smallest(self, lo, hi, k):
+        """Yield up to k positions of [lo, hi), smallest values first"""
+        if lo >= hi or k <= 0:
+            return
+        pos = self.argmin(lo, hi)
+        heap = [(self.values[pos], pos, lo, hi)]
+        while heap and k > 0:
+            _, pos, lo, hi = heapq.heappop(heap)
+            yield pos
+            k -= 1
+            for a, b in ((lo, pos), (pos + 1, hi)):
+                if a < b:
+                    p = self.argmin(a, b)
+                    heapq.heappush(heap, (self.values[p], p, a, b))
+
+class SortedView:
+    """Read-only sequence items[order[i]], optionally mapped through a function"""
+
+    def __init__(self, items, order, func=None):
+        self.items = items
+        self.order = order
+        self.func = func
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, i):
+        item = self.items[int(self.order[i])]
+        return self.func(item) if self.func else item
+
+class PrefixIndex:
+    """
+    Sorted array of normalized names for prefix lookups.
+
+    Args:
+        names: Sequence of names, sorted by normalize_name (a list or a lazy
+               sequence such as a SortedView over a NameIndex).
+        types: numpy array of the name types ('star' or 'dso'), same order.
+        vmags: numpy array of the magnitudes (NaN if unknown), same order.
+    """
+
+    def __init__(self, names, types, vmags):
+        self.names = names
+        self.keys = (SortedView(names, range(len(names)), normalize_name)
+                     if not isinstance(names, list) else [normalize_name(n) for n in names])
+        self.types = types
+        # Objects without a magnitude rank after all the others
+        vmags = np.array(vmags, dtype=np.float64)
+        vmags[np.isnan(vmags)] = np.inf
+        self.vmags = vmags
+
+        # Views: positions (in the sorted arrays) of the names of each type
+        self.views = {None: np.arange(len(self.keys), dtype=np.int32)}
+        for obj_type in NAME_TYPES:
+            self.views[obj_type] = np.flatnonzero(types == obj_type).astype(np.int32)
+        self.rmq = {t: RangeMin(vmags[view]) for t, view in self.views.items()}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def count(self, object_type=None):
+        """Number of names of a type ('star', 'dso' or None for all)"""
+        return len(self.views[object_type])
+
+    def prefix_range(self, prefix, object_type=None, lo=0, hi=None):
+        """
+        Return the [lo, hi) range of the view whose names start with prefix,
+        searching only the given [lo, hi) range (such as the range of a
+        shorter prefix) if given
+        """
+        view = self.views[object_type]
+        prefix = normalize_name(prefix)
+        hi = len(view) if hi is None else hi
+        if object_type is None:
+            # The view is the identity: search the keys directly
+            return (bisect_left(self.keys, prefix, lo, hi),
+                    bisect_right(self.keys, prefix + MAX_CHAR, lo, hi))
+        key = lambda pos: self.keys[pos]
+        return (bisect_left(view, prefix, lo, hi, key=key),
+                bisect_right(view, prefix + MAX_CHAR, lo, hi, key=key))
+
+    def search(self, prefix, limit=10, object_type=None, ranked=True, bounds=None):
+        """
+        Names starting with prefix (case-insensitive), brightest first if
+        ranked, otherwise in alphabetical order.  bounds is the
+        prefix_range() of prefix if already known.
+        """
+        view = self.views[object_type]
+        lo, hi = bounds or self.prefix_range(prefix, object_type)
+        if ranked:
+            positions = self.rmq[object_type].smallest(lo, hi, limit)
+        else:
+            positions = range(lo, min(hi, lo + limit))
+        return [self.names[view[i]] for i in positions]
+
+    def find(self, name):
+        """Position of a name (case-insensitive) in the sorted arrays, or None"""
+        key = normalize_name(name)
+        i = bisect_left(self.keys, key)
+        return i if i < len(self.keys) and self.keys[i] == key else None
+
+    def brightest(self, ids, limit=10, object_type=None):
+        """Names of the given ids (positions in the sorted arrays), brightest first"""
+        ids = np.asarray(ids, dtype=np.int64)
+        if object_type is not None:
+            ids = ids[self.types[ids] == object_type]
+        ids = ids[np.argsort(self.vmags[ids], kind='stable')[:limit]]
+        return [self.names[i] for i in ids.tolist()]
+
+def ngrams(key):
+    """Set of the trigrams of a normalized name"""
+    return {key[i:i + NGRAM] for i in range(len(key) - NGRAM + 1)}
+
+def max_edits(query):
+    """Default number of typos tolerated in a fuzzy query"""
+    return 0 if len(query) < 4 else 1 if len(query) < 8 else 2
+
+def neighbourhood_pattern(query):
+    """
+    Regular expression matching every string within one edit of query
+    (any character but the NUL separator standing for the inserted or
+    substituted one)
+    """
+    any_char = '[^\0]'
+    variants = set()
+    for i in range(len(query) + 1):
+        variants.add(re.escape(query[:i]) + any_char + re.escape(query[i:]))
+    for i in range(len(query)):
+        variants.add(re.escape(query[:i]) + any_char + re.escape(query[i + 1:]))
+        variants.add(re.escape(query[:i] + query[i + 1:]))
+    for i in range(len(query) - 1):
+        variants.add(re.escape(query[:i] + query[i + 1] + query[i] + query[i + 2:]))
+    return '|'.join(sorted(variants))
+
+def substring_distance(query, text, bound):
+    """
+    Smallest edit distance between query and any substring of text (Sellers
+    algorithm, counting a transposition of adjacent letters as one edit),
+    or bound + 1 if it is larger than bound.
+    """
+    before = None
+    prev = list(range(len(query) + 1))
+    best = prev[-1]
+    for j, c in enumerate(text):
+        cur = [0]
+        for i, q in enumerate(query):
+            d = min(prev[i] + (q != c), prev[i + 1] + 1, cur[i] + 1)
+            if i and before is not None and q == text[j - 1] and query[i - 1] == c:
+                d = min(d, before[i - 1] + 1)
+            cur.append(d)
+        best = min(best, cur[-1])
+        before, prev = prev, cur
+    return best if best <= bound else bound + 1
+
+class NgramIndex:
+    """
+    Trigram posting lists over a sorted list of normalized names (the keys
+    of a PrefixIndex).  Name ids are positions in that list.
+
+    Arrays:
+        grams     sorted unique trigrams
+        offsets   postings of grams[i] are postings[offsets[i]:offsets[i + 1]]
+        postings  name ids, increasing within each posting list
+    """
+
+    def __init__(self, keys, grams, offsets, postings):
+        self.keys = keys
+        self.grams = grams
+        self.offsets = offsets
+        self.postings = postings
+        # All keys joined by NUL (see joined()), built on first use
+        self.text = None
+        self.starts = None
+        self.bounds = None
+
+    @classmethod
+    def build(cls, keys):
+        """Build the index of a list of normalized names"""
+        lists = {}
+        for name_id, key in enumerate(keys):
+            for gram in ngrams(key):
+                lists.setdefault(gram, []).append(name_id)
+        grams = sorted(lists)
+        sizes = np.array([len(lists[g]) for g in grams], dtype=np.uint32)
+        offsets = np.zeros(len(grams) + 1, dtype=np.uint32)
+        np.cumsum(sizes, out=offsets[1:])
+        postings = np.fromiter((i for g in grams for i in lists[g]),
+                               dtype=np.uint32, count=int(offsets[-1]))
+        return cls(keys, np.array(grams, dtype=f'<U{NGRAM}'), offsets, postings)
+
+    def save(self, path):
+        np.savez(path, version=NGRAM_FORMAT_VERSION, count=len(self.keys),
+                 grams=self.grams, offsets=self.offsets, postings=self.postings)
+
+    @classmethod
+    def load(cls, path, keys):
+        """
+        Load an index saved for keys.  Returns None if the file has another
+        format version or was built for a different number of names.
+        """
+        with np.load(path) as data:
+            if int(data['version']) != NGRAM_FORMAT_VERSION or int(data['count']) != len(keys):
+                return None
+            return cls(keys, data['grams'], data['offsets'], data['postings'])
+
+    def posting(self, gram):
+        """Name ids containing a trigram (empty array if none)"""
+        i = int(np.searchsorted(self.grams, gram))
+        if i == len(self.grams) or self.grams[i] != gram:
+            return self.postings[:0]
+        return self.postings[self.offsets[i]:self.offsets[i + 1]]
+
+    def contains(self, query, candidates=None):
+        """
+        Ids of the names containing query (case-insensitive), increasing.
+
+        candidates: optional increasing ids known to include every match,
+                    such as the matches of a query this one extends; only
+                    those names are checked.
+        """
+        query = normalize_name(query)
+        if len(query) < NGRAM and candidates is None:
+            return self.scan(query)
+        # Intersect the shortest posting lists first
+        lists = [self.posting(g) for g in ngrams(query)]
+        if candidates is not None:
+            lists.append(np.asarray(candidates, dtype=np.uint32))
+        lists.sort(key=len)
+        ids = lists[0]
+        for posting in lists[1:]:
+            if not len(ids):
+                break
+            ids = np.intersect1d(ids, posting, assume_unique=True)
+        # Having all the trigrams doesn't mean having them in order
+        if self.text is not None:
+            return self.verify(ids, query)
+        return np.array([i for i in ids.tolist() if query in self.keys[i]],
+                        dtype=np.uint32)
+
+    def joined(self):
+        """
+        Join all the keys with NUL separators into self.text, so substring
+        checks don't decode names, with the start offset (self.starts) and
+        (start, end) bounds (self.bounds) of each key
+        """
+        if self.text is None:
+            keys = [self.keys[i] for i in range(len(self.keys))]
+            self.text = '\0'.join(keys)
+            self.starts = np.zeros(len(keys), dtype=np.int64)
+            np.cumsum([len(key) + 1 for key in keys[:-1]], out=self.starts[1:])
+            starts = self.starts.tolist()
+            self.bounds = list(zip(starts, starts[1:] + [len(self.text) + 1]))
+
+    def verify(self, ids, query):
+        """The ids whose name contains query, checked in the joined text"""
+        text, bounds = self.text, self.bounds
+        return np.array([i for i in ids.tolist() if text.find(query, *bounds[i]) >= 0],
+                        dtype=np.uint32)
+
+    def scan(self, query):
+        """contains() for queries too short to have a trigram"""
+        self.joined()
+        found = []
+        pos = self.text.find(query)
+        while pos >= 0:
+            found.append(pos)
+            # Skip to the next key, one match per name is enough
+            i = int(np.searchsorted(self.starts, pos, side='right'))
+            if i == len(self.starts):
+                break
+            pos = self.text.find(query, int(self.starts[i]))
+        ids = np.searchsorted(self.starts, found, side='right') - 1
+        return ids.astype(np.uint32)
+
+    def fuzzy(self, query, edits=None):
+        """
+        Names containing query with at most edits typos (insertions,
+        deletions, substitutions or transpositions of adjacent letters).
+        Returns a list of (distance, id).
+
+        An edit changes at most NGRAM + 1 of the query trigrams (4 for a
+        transposition), so a name within edits of the query keeps at least
+        len(trigrams) - (NGRAM + 1) * edits of them and only the names
+        reaching that count are compared with the query.  When that count
+        is not positive, a one edit query is matched by scanning the joined
+        names for its neighbourhood_pattern(), and longer edit distances
+        fall back to the names sharing at least one trigram.
+        """
+        query = normalize_name(query)
+        edits = max_edits(query) if edits is None else edits
+        grams = ngrams(query)
+        if not grams:
+            # Too short to filter with trigrams: exact matches only
+            return [(0, i) for i in self.contains(query).tolist()]
+        threshold = len(grams) - (NGRAM + 1) * edits
+        if threshold < 1 and edits == 1:
+            self.joined()
+            found = [m.start() for m in re.finditer(neighbourhood_pattern(query), self.text)]
+            candidates = np.unique(np.searchsorted(self.starts, found, side='right') - 1)
+        else:
+            counts = np.bincount(np.concatenate([self.posting(g) for g in grams]),
+                                 minlength=len(self.keys))
+            candidates = np.flatnonzero(counts >= max(1, threshold))
+            if len(candidates) > FUZZY_CANDIDATES:
+                best = np.argsort(-counts[candidates], kind='stable')[:FUZZY_CANDIDATES]
+                candidates = candidates[best]
+        results = []
+        for i in candidates.tolist():
+            dist = substring_distance(query, self.keys[i], edits)
+            if dist <= edits:
+                results.append((dist, i))
+        return results
+
+def name_columns(entries):
+    """
+    Columns of the binary name index for a list of entries (in
+    name_index.json order): lists of strings and numpy arrays.
+    """
+    def num(key, missing):
+        return [missing if e.get(key) is None else e[key] for e in entries]
+
+    columns = {name: [e.get(name) or '' for e in entries] for name in NAME_STR_COLUMNS}
+    columns.update({
+        'type': [NAME_TYPES.index(e['type']) for e in entries],
+        'vmag': num('vmag', np.nan),
+        'ra': num('ra', np.nan),
+        'de': num('de', np.nan),
+        'hip': num('hip', 0),
+        'hd': num('hd', 0),
+        'order': sort_order(columns['name']),
+    })
+    for name, dtype in NAME_NUM_COLUMNS.items():
+        columns[name] = np.array(columns[name], dtype=dtype)
+    return columns
+
+def write_name_bundle(entries, path):
+    """Write name index entries as a binary bundle loadable by NameIndex"""
+    columns = name_columns(entries)
+    for name in NAME_STR_COLUMNS:
+        columns[name] = np.array([v.encode('utf-8') for v in columns[name]], dtype=np.bytes_)
+    writer = NpyColumnsWriter(path)
+    writer.write(columns)
+    writer.close()
+
+class NameIndex:
+    """
+    The entries of name_index.json, in name order (see PrefixIndex).
+
+    Args:
+        columns: Columns as written by write_name_bundle: a memory mapped
+                 Catalog (see load) or the in-memory name_columns().
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.order = columns['order']
+        self.names = SortedView(columns['name'], self.order)
+
+    @classmethod
+    def load(cls, path):
+        """Open a binary bundle: only its manifest is read"""
+        return cls(load_catalog(path))
+
+    @classmethod
+    def from_entries(cls, entries):
+        return cls(name_columns(list(entries)))
+
+    def __len__(self):
+        return len(self.order)
+
+    def prefix_index(self):
+        order = np.asarray(self.order)
+        types = np.array(NAME_TYPES)[self.columns['type'][order]]
+        return PrefixIndex(self.names, types, self.columns['vmag'][order])
+
+    def entry(self, pos):
+        """Entry (as in name_index.json) of the name at sorted position pos"""
+        row = int(self.order[pos])
+        c = self.columns
+        obj_type = NAME_TYPES[c['type'][row]]
+
+        def num(name, missing):
+            value = c[name][row].item()
+            return None if value == missing or value != value else value
+
+        entry = {'name': c['name'][row], 'type': obj_type}
+        if obj_type == 'star':
+            entry['hip'] = num('hip', 0)
+            entry['hd'] = num('hd', 0)
+        else:
+            entry['dso_type'] = c['dso_type'][row]
+        entry.update({
+            'vmag': num('vmag', None),
+            'ra': num('ra', None),
+            'de': num('de', None),
+            'primary_name': c['primary_name'][row],
+        })
+        return entry
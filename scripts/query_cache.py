@@ -0,0 +1,75 @@
+"""
+Bounded result caches for the search scripts: a plain LRU cache, and one
+that reuses the results of a query for the queries extending it.
+"""
+
+from collections import OrderedDict
+
+class LRUCache:
+    """
+    Mapping of at most maxsize entries, evicting the least recently used
+    one.  Counts hits and misses.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, default=None):
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        return {'size': len(self.entries), 'maxsize': self.maxsize,
+                'hits': self.hits, 'misses': self.misses}
+
+class PrefixCache(LRUCache):
+    """
+    LRU cache for queries typed one key at a time, keyed on
+    (normalized query, filters).  When a query misses, narrow() finds the
+    entry of the longest cached query it extends with the same filters,
+    whose value the caller can filter instead of searching everything
+    again.  misses counts every query not answered exactly, narrowed how
+    many of those reused a shorter query.
+    """
+
+    def __init__(self, maxsize=256):
+        super().__init__(maxsize)
+        self.narrowed = 0
+
+    def narrow(self, query, filters=(), accept=None):
+        """
+        Value of the longest cached proper prefix of query with the same
+        filters (and accepted by accept(value) if given), or None
+        """
+        for n in range(len(query) - 1, 0, -1):
+            key = (query[:n], filters)
+            value = self.entries.get(key)
+            if value is not None and (accept is None or accept(value)):
+                self.entries.move_to_end(key)
+                self.narrowed += 1
+                return value
+        return None
+
+    def stats(self):
+        return dict(super().stats(), narrowed=self.narrowed)
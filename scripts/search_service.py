@@ -0,0 +1,491 @@
+"""
+Search service: loads the search databases, the name index, the frontend
+search index and the constellation index once and answers queries over a
+local HTTP API.
+Usage: python search_service.py [--host 127.0.0.1] [--port 8765]
+Endpoints (JSON responses):
+  GET  /suggest?q=<text>[&limit=10][&type=star|dso|constellation][&category=galaxies|nebulae|clusters|other]
+  GET  /resolve?name=<name>
+  GET  /cone?ra=<deg>&dec=<deg>&radius=<deg>[&max_vmag=<mag>][&limit=50]
+  GET  /stats
+  POST /batch   body: [{"path": "/suggest", "params": {"q": "M3"}}, ...]
+Examples:
+  curl 'http://127.0.0.1:8765/suggest?q=andr'
+  curl 'http://127.0.0.1:8765/resolve?name=M31'
+  curl 'http://127.0.0.1:8765/cone?ra=10.68&dec=41.27&radius=2&max_vmag=8'
+"""
+
+import argparse
+import asyncio
+import bisect
+import json
+import math
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+from example_name_search import SkyObjectSearch
+from query_cache import LRUCache
+from search_sky import SkySearcher
+
+SEARCH_INDEX = 'apps/web-frontend/public/skydata/search_index.json'
+CONSTELLATION_INDEX = 'apps/web-frontend/public/skydata/constellations'
+OBJECT_TYPES = ('star', 'dso', 'constellation')
+DSO_CATEGORIES = ('galaxies', 'nebulae', 'clusters', 'other')
+MAX_LIMIT = 500
+CACHE_SIZE = 4096
+MAX_BATCH = 64
+MAX_BODY = 1 << 20
+HTTP_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+                405: 'Method Not Allowed', 413: 'Payload Too Large'}
+MISSING = object()
+# 'M31' -> 'M 31', 'NGC224' -> 'NGC 224'
+DESIGNATION_RE = re.compile(r'^([A-Za-z]+)\s*(\d)')
+
+class BadRequest(ValueError):
+    """Invalid query parameters: answered with HTTP 400"""
+
+def load_dso_categories(path):
+    """Map DSO names to their search_index.json category"""
+    if not Path(path).exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        index = json.load(f)
+    return {entry.split('|')[1]: category
+            for category, entries in index.get('dsos', {}).items()
+            for entry in entries}
+
+def load_constellations(path):
+    """
+    List of the constellation entries (id, culture, names, english, native,
+    pronounce, iau) of all the cultures, from the directory written by
+    generate_constellation_index.py
+    """
+    path = Path(path)
+    if not (path / 'index.json').exists():
+        return []
+    with open(path / 'index.json', 'r', encoding='utf-8') as f:
+        cultures = json.load(f)['cultures']
+    constellations = []
+    for culture in cultures:
+        with open(path / f'{culture}.json', 'r', encoding='utf-8') as f:
+            shard = json.load(f)
+        for pos, con_id in enumerate(shard['ids']):
+            con = {'id': con_id, 'culture': culture, 'names': []}
+            for field in ('english', 'native', 'pronounce', 'iau'):
+                if shard[field][pos] >= 0:
+                    con[field] = shard['names'][shard[field][pos]]
+                    if con[field] not in con['names']:
+                        con['names'].append(con[field])
+            constellations.append(con)
+    return constellations
+
+def spaced_designation(name):
+    """'M31' -> 'M 31', the spacing of designations in the name index"""
+    return DESIGNATION_RE.sub(r'\1 \2', name.strip())
+
+def name_variants(name):
+    """Spellings of a name as stored in the name index"""
+    name = name.strip()
+    yield name
+    spaced = spaced_designation(name)
+    if spaced != name:
+        yield spaced
+    if not name.upper().startswith('NAME '):
+        yield 'NAME ' + name
+
+def row_dict(columns, row):
+    return {col: value for col, value in zip(columns, row) if value is not None}
+
+DSO_COLUMNS = ('type', 'vmag', 'ra', 'de', 'smax', 'short_name', 'ids', 'distance')
+STAR_COLUMNS = ('hip', 'hd', 'vmag', 'ra', 'de', 'bv', 'ids', 'distance')
+
+class SearchIndexes:
+    """
+    All search indexes of the service.  The query methods are synchronous
+    and only called from the service's single worker thread.
+    """
+
+    def __init__(self, dso_db='dso_extracted/dso_search.db',
+                 star_db='stars_extracted/star_search.db',
+                 name_index='name_index', search_index=SEARCH_INDEX,
+                 constellation_index=CONSTELLATION_INDEX):
+        self.sky = SkySearcher(dso_db, star_db)
+        self.names = SkyObjectSearch(name_index)
+        self.categories = load_dso_categories(search_index)
+        self.constellations = load_constellations(constellation_index)
+        # Sorted (normalized name, rank, entry, name) for prefix lookups,
+        # western constellations first among equal names
+        self.constellation_keys = sorted(
+            (name.casefold(), con.get('culture') != 'western', i, name)
+            for i, con in enumerate(self.constellations)
+            for name in con.get('names', []))
+        print(f"✓ Loaded {len(self.categories)} DSO categories, "
+              f"{len(self.constellations)} constellations")
+
+    def close(self):
+        self.sky.close()
+
+    def constellation_prefix(self, query, limit):
+        """
+        Constellations with a name starting with query, one per name:
+        [(entry, matching name)]
+        """
+        key = query.casefold()
+        pos = bisect.bisect_left(self.constellation_keys, (key,))
+        found = {}
+        for norm, _, i, name in self.constellation_keys[pos:]:
+            if not norm.startswith(key) or len(found) >= limit:
+                break
+            found.setdefault(norm, (i, name))
+        return list(found.values())
+
+    def constellation_result(self, i, name):
+        con = self.constellations[i]
+        return {'name': name, 'type': 'constellation',
+                'id': con['id'], 'culture': con.get('culture')}
+
+    def object_result(self, name):
+        info = self.names.get_object_info(name)
+        result = {'name': name, 'type': info['type'] if info else None}
+        if info and info.get('vmag') is not None:
+            result['vmag'] = info['vmag']
+        if name in self.categories:
+            result['category'] = self.categories[name]
+        return result
+
+    def category_names(self, query, want, category):
+        """
+        DSO names suggested for query in a search_index.json category.  The
+        category is not part of the name index: fetch twice as many names
+        until enough are in it, the names run out or MAX_LIMIT is reached.
+        """
+        fetch = min(MAX_LIMIT, want * 8)
+        while True:
+            found = self.names.suggest_names(query, fetch, 'dso')
+            names = [n for n in found if self.categories.get(n) == category]
+            if len(names) >= want or len(found) < fetch or fetch >= MAX_LIMIT:
+                return names[:want]
+            fetch = min(MAX_LIMIT, fetch * 2)
+
+    def suggest(self, q, limit=10, type=None, category=None):
+        """Autocomplete suggestions: constellations first, then stars and DSOs"""
+        results = []
+        if type in (None, 'constellation'):
+            n = limit if type else max(1, limit // 4)
+            results += [self.constellation_result(i, name)
+                        for i, name in self.constellation_prefix(q, n)]
+        if type != 'constellation':
+            want = limit - len(results)
+            names = []
+            # Spaced designation first ('M3' -> 'M 3'), then the query as typed
+            for query in dict.fromkeys((spaced_designation(q), q)):
+                if category:
+                    found = self.category_names(query, want, category)
+                else:
+                    found = self.names.suggest_names(query, want, type)
+                names += [n for n in found if n not in names]
+                if len(names) >= want:
+                    break
+            results += [self.object_result(name) for name in names[:want]]
+        return results
+
+    def resolve(self, name):
+        """
+        Full data for one object: name index entry, else a constellation, else
+        the best database match.  None if nothing matches.
+        """
+        for variant in name_variants(name):
+            info = self.names.get_object_info(variant)
+            if info is not None:
+                info = {key: value for key, value in info.items() if value is not None}
+                if info['name'] in self.categories:
+                    info['category'] = self.categories[info['name']]
+                return info
+        key = name.strip().casefold()
+        pos = bisect.bisect_left(self.constellation_keys, (key,))
+        if pos < len(self.constellation_keys) and self.constellation_keys[pos][0] == key:
+            return dict(self.constellations[self.constellation_keys[pos][2]],
+                        type='constellation')
+        dsos = self.sky.search_dsos(name, 1)
+        if dsos:
+            return dict(row_dict(DSO_COLUMNS, dsos[0]), type='dso')
+        stars = self.sky.search_stars(name, 1)
+        if stars:
+            return dict(row_dict(STAR_COLUMNS, stars[0]), type='star')
+        return None
+
+    def cone(self, ra, dec, radius, max_vmag=None, limit=50):
+        """Stars and DSOs within radius degrees of (ra, dec), brightest first"""
+        try:
+            dsos, stars = self.sky.cone_search(ra, dec, radius, max_vmag, limit)
+        except RuntimeError as e:
+            raise BadRequest(str(e))
+        return {'dsos': [row_dict(DSO_COLUMNS, row) for row in dsos],
+                'stars': [row_dict(STAR_COLUMNS, row) for row in stars]}
+
+def int_param(params, name, default, lo=1, hi=MAX_LIMIT):
+    try:
+        value = int(params.get(name, default))
+    except ValueError:
+        raise BadRequest(f"'{name}' must be an integer")
+    return min(max(value, lo), hi)
+
+def float_param(params, name, default=None):
+    if name not in params:
+        if default is None:
+            raise BadRequest(f"missing parameter '{name}'")
+        return default
+    try:
+        value = float(params[name])
+    except ValueError:
+        raise BadRequest(f"'{name}' must be a number")
+    if not math.isfinite(value):
+        raise BadRequest(f"'{name}' must be a finite number")
+    return value
+
+def choice_param(params, name, choices):
+    value = params.get(name) or None
+    if value is not None and value not in choices:
+        raise BadRequest(f"'{name}' must be one of {', '.join(choices)}")
+    return value
+
+def parse_query(path, params):
+    """
+    Validate the parameters of one query.  Returns a hashable key
+    (endpoint, arguments...) that also serves as the cache key.
+    """
+    if path == '/suggest':
+        q = params.get('q', '').strip()
+        if not q:
+            raise BadRequest("missing parameter 'q'")
+        category = choice_param(params, 'category', DSO_CATEGORIES)
+        object_type = 'dso' if category else choice_param(params, 'type', OBJECT_TYPES)
+        return ('suggest', q, int_param(params, 'limit', 10), object_type, category)
+    if path == '/resolve':
+        name = params.get('name', '').strip()
+        if not name:
+            raise BadRequest("missing parameter 'name'")
+        return ('resolve', name)
+    if path == '/cone':
+        radius = float_param(params, 'radius')
+        if not 0 < radius <= 180:
+            raise BadRequest("'radius' must be in (0, 180]")
+        dec = float_param(params, 'dec')
+        if not -90 <= dec <= 90:
+            raise BadRequest("'dec' must be in [-90, 90]")
+        return ('cone', float_param(params, 'ra') % 360, dec, radius,
+                float_param(params, 'max_vmag', float('inf')), int_param(params, 'limit', 50))
+    return None
+
+class QueryBatcher:
+    """
+    Queues queries from concurrent requests and runs them in batches on a
+    single worker thread, so the indexes and SQLite connections are only
+    used from that thread and the event loop never blocks.  Identical
+    queries in a batch are answered once.
+    """
+
+    def __init__(self, indexes, max_batch=MAX_BATCH):
+        self.indexes = indexes
+        self.max_batch = max_batch
+        self.queue = asyncio.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='search')
+        self.batches = 0
+        self.queries = 0
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+        self.executor.shutdown(wait=True)
+
+    async def submit(self, key):
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((key, future))
+        return await future
+
+    def run_query(self, key):
+        endpoint, *args = key
+        if endpoint == 'cone' and args[3] == float('inf'):
+            args[3] = None
+        return getattr(self.indexes, endpoint)(*args)
+
+    def run_batch(self, keys):
+        results = []
+        for key in keys:
+            try:
+                results.append((True, self.run_query(key)))
+            except Exception as e:
+                results.append((False, e))
+        return results
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            waiting = {}
+            key, future = await self.queue.get()
+            waiting.setdefault(key, []).append(future)
+            while len(waiting) < self.max_batch and not self.queue.empty():
+                key, future = self.queue.get_nowait()
+                waiting.setdefault(key, []).append(future)
+            keys = list(waiting)
+            results = await loop.run_in_executor(self.executor, self.run_batch, keys)
+            self.batches += 1
+            self.queries += len(keys)
+            for key, (ok, value) in zip(keys, results):
+                for future in waiting[key]:
+                    if future.cancelled():
+                        continue
+                    if ok:
+                        future.set_result(value)
+                    else:
+                        future.set_exception(value)
+
+class SearchService:
+    """HTTP front end: parameter checks, result cache and query batching"""
+
+    def __init__(self, indexes, cache_size=CACHE_SIZE):
+        self.indexes = indexes
+        self.cache = LRUCache(cache_size)
+        self.batcher = QueryBatcher(indexes)
+        self.requests = 0
+        self.started = time.time()
+
+    async def query(self, path, params):
+        """Answer one query: (HTTP status, JSON-serializable body)"""
+        try:
+            key = parse_query(path, params)
+        except BadRequest as e:
+            return 400, {'error': str(e)}
+        if key is None:
+            return 404, {'error': f'unknown endpoint {path}'}
+        result = self.cache.get(key, MISSING)
+        if result is MISSING:
+            try:
+                result = await self.batcher.submit(key)
+            except BadRequest as e:
+                return 400, {'error': str(e)}
+            self.cache.put(key, result)
+        if key[0] == 'resolve' and not result:
+            return 404, {'error': f"no object named '{key[1]}'"}
+        return 200, result
+
+    async def batch(self, body):
+        """POST /batch: a list of {path, params} queries, answered in order"""
+        try:
+            queries = json.loads(body)
+            if not isinstance(queries, list):
+                raise ValueError
+            tasks = [self.query(q['path'], {k: str(v) for k, v in q.get('params', {}).items()})
+                     for q in queries]
+        except (ValueError, TypeError, KeyError, AttributeError):
+            return 400, {'error': 'expected a JSON list of {"path", "params"} objects'}
+        results = await asyncio.gather(*tasks)
+        return 200, [{'status': status, 'result': result} for status, result in results]
+
+    def stats(self):
+        return {'requests': self.requests, 'uptime': round(time.time() - self.started, 1),
+                'cache': self.cache.stats(), 'name_caches': self.indexes.names.cache_stats(),
+                'db_cache': self.indexes.sky.cache.stats(),
+                'batches': self.batcher.batches, 'queries': self.batcher.queries}
+
+    async def dispatch(self, method, target, body):
+        url = urlsplit(target)
+        if method == 'POST' and url.path == '/batch':
+            return await self.batch(body)
+        if method != 'GET':
+            return 405, {'error': f'method {method} not allowed'}
+        if url.path == '/stats':
+            return 200, self.stats()
+        return await self.query(url.path, dict(parse_qsl(url.query)))
+
+    async def handle(self, reader, writer):
+        """One HTTP/1.1 connection, kept alive until the client closes it"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = headers.get('content-length') or '0'
+                length = int(length) if length.isascii() and length.isdigit() else None
+                if length is None:
+                    # The end of the body is unknown: answer and close
+                    status, result = 400, {'error': 'invalid Content-Length header'}
+                    keep_alive = False
+                elif length > MAX_BODY:
+                    status, result = 413, {'error': 'request body too large'}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b''
+                    self.requests += 1
+                    status, result = await self.dispatch(method, target, body)
+                    keep_alive = (headers.get('connection', '').lower() != 'close'
+                                  and version == 'HTTP/1.1')
+                payload = json.dumps(result, ensure_ascii=False).encode('utf-8')
+                writer.write(
+                    f'HTTP/1.1 {status} {HTTP_REASONS.get(status, "")}\r\n'
+                    f'Content-Type: application/json; charset=utf-8\r\n'
+                    f'Content-Length: {len(payload)}\r\n'
+                    f'Access-Control-Allow-Origin: *\r\n'
+                    f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'
+                    .encode('latin-1') + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        self.batcher.start()
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"Serving on http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.batcher.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description='Local HTTP search service for sky objects')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--dso-db', default='dso_extracted/dso_search.db')
+    parser.add_argument('--star-db', default='stars_extracted/star_search.db')
+    parser.add_argument('--name-index', default='name_index')
+    parser.add_argument('--search-index', default=SEARCH_INDEX)
+    parser.add_argument('--constellation-index', default=CONSTELLATION_INDEX)
+    parser.add_argument('--cache-size', type=int, default=CACHE_SIZE,
+                        help='Number of results kept in the LRU cache')
+    args = parser.parse_args()
+
+    indexes = SearchIndexes(args.dso_db, args.star_db, args.name_index,
+                            args.search_index, args.constellation_index)
+    service = SearchService(indexes, args.cache_size)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        indexes.close()
+
+if __name__ == "__main__":
+    main()
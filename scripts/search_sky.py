@@ -1,17 +1,25 @@
 """
 Quick search tool for DSOs and Stars
 Usage: python search_sky.py <query>
+       python search_sky.py --cone <ra> <dec> <radius> [max_vmag]
+       python search_sky.py --batch [limit] < queries.txt
 Examples:
   python search_sky.py M31
   python search_sky.py Pleiades
   python search_sky.py "HIP 677"
   python search_sky.py NGC
+  python search_sky.py --cone 10.68 41.27 2 8
+  python search_sky.py --batch 5 < queries.txt
 """
 
+import math
 import sqlite3
 import sys
 from pathlib import Path
 
+from healpix import HPX_ORDER, angular_distance, cone_ranges, radec_to_vec
+from query_cache import PrefixCache
+
 def format_coords(ra, de):
     """Format coordinates in a readable way"""
     if ra is None or de is None:
@@ -32,78 +40,294 @@ def format_coords(ra, de):
     
     return f"RA {ra_h:02d}h{ra_m:02d}m{ra_s:04.1f}s  Dec {de_sign}{de_d:02d}°{de_m:02d}'{de_s:04.1f}\""
 
-def search_dsos(query, db_file, limit=20):
-    """Search DSO database"""
-    if not Path(db_file).exists():
-        return []
-    
-    conn = sqlite3.connect(db_file)
-    cursor = conn.cursor()
-    
-    # Search in all text fields
-    search_term = f"%{query.upper()}%"
-    cursor.execute('''
-        SELECT type, vmag, ra, de, smax, short_name, ids
-        FROM dsos
-        WHERE search_text LIKE ? OR UPPER(morpho) LIKE ?
-        ORDER BY vmag ASC
-        LIMIT ?
-    ''', (search_term, search_term, limit))
-    
-    results = cursor.fetchall()
-    conn.close()
-    
-    return results
-
-def search_stars(query, db_file, limit=20):
-    """Search star database"""
-    if not Path(db_file).exists():
-        return []
-    
-    conn = sqlite3.connect(db_file)
-    cursor = conn.cursor()
-    
-    # Try to parse as HIP or HD number
-    hip_num = None
-    hd_num = None
-    if query.upper().startswith('HIP'):
-        try:
-            hip_num = int(query.upper().replace('HIP', '').strip())
-        except:
-            pass
-    elif query.upper().startswith('HD'):
-        try:
-            hd_num = int(query.upper().replace('HD', '').strip())
-        except:
-            pass
-    elif query.isdigit():
+# The trigram tokenizer can't match strings shorter than one trigram
+FTS_MIN_QUERY = 3
+
+# Read-only connection tuning: map the whole database and keep a large page
+# cache so repeated lookups don't go back to the file
+MMAP_SIZE = 256 * 1024 * 1024
+CACHE_SIZE_KB = 64 * 1024
+
+def match_bucket_sql(names):
+    """
+    SQL expression ranking a full-text match of the query ?2 among the
+    '|' separated names: 0 for a name equal to the query, 1 for a name
+    starting with it, 2 for any other match.  'NAME ' and '* ' prefixes of
+    the catalog ids are ignored.
+    """
+    names = f"REPLACE(REPLACE('|' || UPPER({names}), '|NAME ', '|'), '|* ', '|')"
+    return (f"CASE WHEN instr({names} || '|', '|' || UPPER(?2) || '|') THEN 0 "
+            f"WHEN instr({names}, '|' || UPPER(?2)) THEN 1 ELSE 2 END")
+
+# The statements below are compiled once per connection: sqlite3 keeps a
+# per-connection cache of prepared statements keyed by the SQL text.
+# Full-text matches are ranked by match_bucket_sql, then by magnitude (a
+# bm25 score mostly favours short documents and never ties)
+DSO_FTS_SQL = f'''
+    SELECT d.type, d.vmag, d.ra, d.de, d.smax, d.short_name, d.ids
+    FROM dsos_fts JOIN dsos d ON d.id = dsos_fts.rowid
+    WHERE dsos_fts MATCH ?1
+    ORDER BY {match_bucket_sql("IFNULL(d.short_name, '') || '|' || IFNULL(d.ids, '')")},
+             d.vmag IS NULL, d.vmag
+    LIMIT ?3
+'''
+DSO_LIKE_SQL = '''
+    SELECT type, vmag, ra, de, smax, short_name, ids
+    FROM dsos
+    WHERE search_text LIKE ? OR UPPER(morpho) LIKE ?
+    ORDER BY vmag ASC
+    LIMIT ?
+'''
+STAR_NUMBER_SQL = '''
+    SELECT hip, hd, vmag, ra, de, bv, ids
+    FROM stars
+    WHERE hip = ? OR hd = ?
+    ORDER BY vmag ASC
+    LIMIT ?
+'''
+STAR_FTS_SQL = f'''
+    SELECT s.hip, s.hd, s.vmag, s.ra, s.de, s.bv, s.ids
+    FROM stars_fts JOIN stars s ON s.id = stars_fts.rowid
+    WHERE stars_fts MATCH ?1
+    ORDER BY {match_bucket_sql("IFNULL(s.ids, '')")}, s.vmag IS NULL, s.vmag
+    LIMIT ?3
+'''
+STAR_LIKE_SQL = '''
+    SELECT hip, hd, vmag, ra, de, bv, ids
+    FROM stars
+    WHERE search_text LIKE ?
+    ORDER BY vmag ASC
+    LIMIT ?
+'''
+
+def fts_phrase(query):
+    """Quote a query as a single FTS5 phrase (a substring with trigrams)"""
+    return '"' + query.replace('"', '""') + '"'
+
+def open_readonly(db_file):
+    """
+    Open a search database read-only.  The database is opened as immutable,
+    so SQLite skips file locking and change detection: it must not be
+    modified while the connection is open.
+    """
+    uri = Path(db_file).resolve().as_uri() + '?mode=ro&immutable=1'
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    conn.execute(f'PRAGMA mmap_size = {MMAP_SIZE}')
+    conn.execute(f'PRAGMA cache_size = -{CACHE_SIZE_KB}')
+    return conn
+
+def parse_catalog_number(query):
+    """Return (hip, hd) numbers for a 'HIP n', 'HD n' or bare number query"""
+    upper = query.upper()
+    try:
+        if upper.startswith('HIP'):
+            return int(upper[3:].strip()), None
+        if upper.startswith('HD'):
+            return None, int(upper[2:].strip())
+    except ValueError:
+        return None, None
+    if query.isdigit():
         # If just a number, try both HIP and HD
-        hip_num = int(query)
-        hd_num = int(query)
-    
-    if hip_num or hd_num:
-        cursor.execute('''
-            SELECT hip, hd, vmag, ra, de, bv, ids
-            FROM stars
-            WHERE hip = ? OR hd = ?
-            ORDER BY vmag ASC
-            LIMIT ?
-        ''', (hip_num, hd_num, limit))
-    else:
-        # Text search
+        return int(query), int(query)
+    return None, None
+
+class SkySearcher:
+    """
+    Searches the DSO and star databases through persistent read-only
+    connections, for interactive sessions and batch lookups.  A missing
+    database behaves as an empty one.
+
+    Usage:
+        with SkySearcher() as searcher:
+            searcher.search_dsos('M31')
+    """
+
+    def __init__(self, dso_db='dso_extracted/dso_search.db',
+                 star_db='stars_extracted/star_search.db', cache_size=256):
+        self.dso_conn = open_readonly(dso_db) if dso_db and Path(dso_db).exists() else None
+        self.star_conn = open_readonly(star_db) if star_db and Path(star_db).exists() else None
+        # The databases are immutable: look up their optional tables once
+        self.has_fts = {}
+        self.has_hpx = {}
+        for table, conn in (('dsos', self.dso_conn), ('stars', self.star_conn)):
+            if conn is None:
+                continue
+            names = {row[0] for row in conn.execute('SELECT name FROM sqlite_master')}
+            self.has_fts[table] = f'{table}_fts' in names
+            self.has_hpx[table] = any(row[1] == 'hpx' for row in
+                                      conn.execute(f'PRAGMA table_info({table})'))
+        # Results of recent text searches, see cached_search()
+        self.cache = PrefixCache(cache_size)
+
+    def close(self):
+        for conn in (self.dso_conn, self.star_conn):
+            if conn is not None:
+                conn.close()
+        self.dso_conn = self.star_conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def use_fts_index(self, table, query):
+        """Return True if the query can be answered by the <table>_fts index"""
+        return len(query) >= FTS_MIN_QUERY and self.has_fts.get(table, False)
+
+    def cached_search(self, conn, table, mode, query, limit, sql, params):
+        """
+        Run a search statement through the result cache.  query is the
+        normalized query and mode ('fts', 'like' or 'number') the kind of
+        statement.  Text searches match substrings, so when a shorter query
+        of the same kind had no match, this one has none either.
+        """
+        filters = (table, mode, limit)
+        rows = self.cache.get((query, filters))
+        if rows is None:
+            if mode != 'number' and self.cache.narrow(
+                    query, filters, accept=lambda rows: not rows) is not None:
+                rows = []
+            else:
+                rows = conn.execute(sql, params).fetchall()
+            self.cache.put((query, filters), rows)
+        return list(rows)
+
+    def search_dsos(self, query, limit=20, use_fts=True):
+        """
+        Search DSOs.  Uses the full-text index when the database has one
+        (exact names first, then name prefixes, then other matches, each
+        by magnitude), otherwise a LIKE scan.
+        """
+        if self.dso_conn is None:
+            return []
+        query = query.strip()
+        if use_fts and self.use_fts_index('dsos', query):
+            return self.cached_search(self.dso_conn, 'dsos', 'fts', query, limit,
+                                      DSO_FTS_SQL, (fts_phrase(query), query, limit))
+        # Search in all text fields
         search_term = f"%{query.upper()}%"
-        cursor.execute('''
-            SELECT hip, hd, vmag, ra, de, bv, ids
-            FROM stars
-            WHERE search_text LIKE ?
-            ORDER BY vmag ASC
-            LIMIT ?
-        ''', (search_term, limit))
+        return self.cached_search(self.dso_conn, 'dsos', 'like', query.upper(), limit,
+                                  DSO_LIKE_SQL, (search_term, search_term, limit))
+
+    def search_stars(self, query, limit=20, use_fts=True):
+        """
+        Search stars.  Catalog numbers are looked up directly, text uses the
+        full-text index when the database has one.
+        """
+        if self.star_conn is None:
+            return []
+        query = query.strip()
+        hip_num, hd_num = parse_catalog_number(query)
+        if hip_num or hd_num:
+            return self.cached_search(self.star_conn, 'stars', 'number', (hip_num, hd_num),
+                                      limit, STAR_NUMBER_SQL, (hip_num, hd_num, limit))
+        if use_fts and self.use_fts_index('stars', query):
+            return self.cached_search(self.star_conn, 'stars', 'fts', query, limit,
+                                      STAR_FTS_SQL, (fts_phrase(query), query, limit))
+        # Text search
+        return self.cached_search(self.star_conn, 'stars', 'like', query.upper(), limit,
+                                  STAR_LIKE_SQL, (f"%{query.upper()}%", limit))
+
+    def search(self, query, limit=20):
+        """Search both databases.  Returns (dso results, star results)."""
+        return self.search_dsos(query, limit), self.search_stars(query, limit)
+
+    def cone_query(self, conn, table, columns, ra, dec, radius, max_vmag=None, limit=None):
+        """cone_query() with the spatial index check answered from the cache"""
+        if not self.has_hpx.get(table, False):
+            raise RuntimeError(f"No spatial index in table '{table}', "
+                               f"rebuild it with create_search_index.py")
+        return cone_query(conn, table, columns, ra, dec, radius, max_vmag, limit,
+                          check_index=False)
+
+    def cone_search_dsos(self, ra, dec, radius, max_vmag=None, limit=None):
+        """
+        DSOs within radius degrees of (ra, dec) using the HEALPix pixel
+        index.  Returns rows in the search_dsos format plus the separation.
+        """
+        if self.dso_conn is None:
+            return []
+        rows = self.cone_query(self.dso_conn, 'dsos', 'ra, de, vmag, type, smax, short_name, ids',
+                               ra, dec, radius, max_vmag, limit)
+        return [(t, vmag, r, d, smax, name, ids, dist)
+                for r, d, vmag, t, smax, name, ids, dist in rows]
+
+    def cone_search_stars(self, ra, dec, radius, max_vmag=None, limit=None):
+        """
+        Stars within radius degrees of (ra, dec) using the HEALPix pixel
+        index.  Returns rows in the search_stars format plus the separation.
+        """
+        if self.star_conn is None:
+            return []
+        rows = self.cone_query(self.star_conn, 'stars', 'ra, de, vmag, hip, hd, bv, ids',
+                               ra, dec, radius, max_vmag, limit)
+        return [(hip, hd, vmag, r, d, bv, ids, dist)
+                for r, d, vmag, hip, hd, bv, ids, dist in rows]
+
+    def cone_search(self, ra, dec, radius, max_vmag=None, limit=None):
+        """Everything within radius degrees of (ra, dec): (dsos, stars)"""
+        return (self.cone_search_dsos(ra, dec, radius, max_vmag, limit),
+                self.cone_search_stars(ra, dec, radius, max_vmag, limit))
+
+def search_dsos(query, db_file, limit=20, use_fts=True):
+    """One-off DSO search, see SkySearcher.search_dsos"""
+    with SkySearcher(dso_db=db_file, star_db=None) as searcher:
+        return searcher.search_dsos(query, limit, use_fts)
+
+def search_stars(query, db_file, limit=20, use_fts=True):
+    """One-off star search, see SkySearcher.search_stars"""
+    with SkySearcher(dso_db=None, star_db=db_file) as searcher:
+        return searcher.search_stars(query, limit, use_fts)
+
+def cone_query(conn, table, columns, ra, dec, radius, max_vmag=None, limit=None,
+               check_index=True):
+    """
+    Return the rows of table within radius degrees of (ra, dec), brightest
+    first.  columns must start with 'ra, de'; the angular separation (in
+    degrees) is appended to each returned row.
+    """
+    if check_index:
+        has_hpx = any(row[1] == 'hpx' for row in conn.execute(f'PRAGMA table_info({table})'))
+        if not has_hpx:
+            raise RuntimeError(f"No spatial index in table '{table}', "
+                               f"rebuild it with create_search_index.py")
     
-    results = cursor.fetchall()
-    conn.close()
+    ranges = cone_ranges(ra, dec, radius, HPX_ORDER)
+    where = ' OR '.join(['hpx BETWEEN ? AND ?'] * len(ranges))
+    params = [p for r in ranges for p in r]
+    if max_vmag is not None:
+        where = f'({where}) AND vmag <= ?'
+        params.append(max_vmag)
     
-    return results
+    center = radec_to_vec(ra, dec)
+    results = []
+    for row in conn.execute(f'SELECT {columns} FROM {table} WHERE {where}', params):
+        dist = math.degrees(angular_distance(center, radec_to_vec(row[0], row[1])))
+        if dist <= radius:
+            results.append(row + (dist,))
+    results.sort(key=lambda r: (r[2] is None, r[2]))
+    return results[:limit] if limit else results
+
+def cone_search_dsos(ra, dec, radius, db_file, max_vmag=None, limit=None):
+    """One-off DSO cone search, see SkySearcher.cone_search_dsos"""
+    with SkySearcher(dso_db=db_file, star_db=None) as searcher:
+        return searcher.cone_search_dsos(ra, dec, radius, max_vmag, limit)
+
+def cone_search_stars(ra, dec, radius, db_file, max_vmag=None, limit=None):
+    """One-off star cone search, see SkySearcher.cone_search_stars"""
+    with SkySearcher(dso_db=None, star_db=db_file) as searcher:
+        return searcher.cone_search_stars(ra, dec, radius, max_vmag, limit)
+
+def cone_search(ra, dec, radius, max_vmag=None, limit=None,
+                dso_db='dso_extracted/dso_search.db',
+                star_db='stars_extracted/star_search.db'):
+    """
+    Everything within radius degrees of (ra, dec), optionally brighter than
+    max_vmag.  Returns (dso results, star results).
+    """
+    with SkySearcher(dso_db, star_db) as searcher:
+        return searcher.cone_search(ra, dec, radius, max_vmag, limit)
 
 def display_dso_results(results):
     """Display DSO search results"""
@@ -115,9 +339,9 @@ def display_dso_results(results):
     print(f"DEEP SKY OBJECTS ({len(results)} results)")
     print(f"{'='*100}\n")
     
-    for i, (obj_type, vmag, ra, de, smax, short_name, ids) in enumerate(results, 1):
-        print(f"{i}. {short_name or 'Unnamed'}")
-        print(f"   Type: {obj_type or 'N/A'}  |  Magnitude: {vmag:.2f if vmag else 'N/A'}")
+    for i, (obj_type, vmag, ra, de, smax, short_name, ids, *dist) in enumerate(results, 1):
+        print(f"{i}. {short_name or 'Unnamed'}" + (f"  ({dist[0]:.3f}° away)" if dist else ""))
+        print(f"   Type: {obj_type or 'N/A'}  |  Magnitude: {f'{vmag:.2f}' if vmag is not None else 'N/A'}")
         print(f"   Coordinates: {format_coords(ra, de)}")
         if smax:
             print(f"   Size: {smax:.2f}°")
@@ -137,38 +361,103 @@ def display_star_results(results):
     print(f"STARS ({len(results)} results)")
     print(f"{'='*100}\n")
     
-    for i, (hip, hd, vmag, ra, de, bv, ids) in enumerate(results, 1):
+    for i, (hip, hd, vmag, ra, de, bv, ids, *dist) in enumerate(results, 1):
         name = ids if ids else f"HIP {hip}" if hip else f"HD {hd}" if hd else "Unnamed"
-        print(f"{i}. {name}")
-        print(f"   HIP: {hip or 'N/A'}  |  HD: {hd or 'N/A'}  |  Magnitude: {vmag:.2f if vmag else 'N/A'}")
+        print(f"{i}. {name}" + (f"  ({dist[0]:.3f}° away)" if dist else ""))
+        print(f"   HIP: {hip or 'N/A'}  |  HD: {hd or 'N/A'}  |  Magnitude: {f'{vmag:.2f}' if vmag is not None else 'N/A'}")
         print(f"   Coordinates: {format_coords(ra, de)}")
         if bv is not None:
             color = "Blue" if bv < 0 else "White" if bv < 0.5 else "Yellow" if bv < 1.0 else "Orange" if bv < 1.5 else "Red"
             print(f"   Color: {color} (B-V = {bv:.2f})")
         print()
 
+def cone_main(args):
+    """Positional search: --cone <ra> <dec> <radius> [max_vmag]"""
+    try:
+        ra, dec, radius = (float(a) for a in args[:3])
+        max_vmag = float(args[3]) if len(args) > 3 else None
+    except ValueError:
+        print("Usage: python search_sky.py --cone <ra> <dec> <radius> [max_vmag]")
+        print("  (all values in degrees)")
+        return
+    
+    print(f"\nObjects within {radius}° of RA {ra}° Dec {dec}°"
+          + (f" brighter than mag {max_vmag}" if max_vmag is not None else ""))
+    
+    try:
+        dso_results, star_results = cone_search(ra, dec, radius, max_vmag, limit=50)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        return
+    
+    if dso_results:
+        display_dso_results(dso_results)
+    if star_results:
+        display_star_results(star_results)
+    if not dso_results and not star_results:
+        print("\nNo results found.")
+
+def format_batch_value(value):
+    """Format a result field for the tab separated batch output"""
+    if value is None:
+        return ''
+    if isinstance(value, float):
+        return f'{value:.6g}'
+    return str(value).replace('\t', ' ')
+
+def batch_main(args):
+    """
+    Batch search: --batch [limit]
+    Reads one query per line from stdin and writes one tab separated line per
+    result, 'query, dso|star, <result fields>', flushed after every query.
+    Both databases stay open for the whole run.
+    """
+    try:
+        limit = int(args[0]) if args else 20
+    except ValueError:
+        print("Usage: python search_sky.py --batch [limit] < queries.txt")
+        return
+    
+    out = sys.stdout
+    with SkySearcher() as searcher:
+        for line in sys.stdin:
+            query = line.strip()
+            if not query:
+                continue
+            dso_results, star_results = searcher.search(query, limit)
+            for kind, results in (('dso', dso_results), ('star', star_results)):
+                for row in results:
+                    out.write('\t'.join([query, kind] + [format_batch_value(v) for v in row]) + '\n')
+            out.flush()
+
 def main():
+    if len(sys.argv) >= 2 and sys.argv[1] == '--cone':
+        cone_main(sys.argv[2:])
+        return
+    
+    if len(sys.argv) >= 2 and sys.argv[1] == '--batch':
+        batch_main(sys.argv[2:])
+        return
+    
     if len(sys.argv) < 2:
         print("Usage: python search_sky.py <query>")
+        print("       python search_sky.py --cone <ra> <dec> <radius> [max_vmag]")
+        print("       python search_sky.py --batch [limit] < queries.txt")
         print("\nExamples:")
         print("  python search_sky.py M31")
         print("  python search_sky.py Pleiades")
         print("  python search_sky.py \"HIP 677\"")
         print("  python search_sky.py NGC")
         print("  python search_sky.py Andromeda")
+        print("  python search_sky.py --cone 10.68 41.27 2 8")
         return
     
     query = ' '.join(sys.argv[1:])
     
     print(f"\nSearching for: '{query}'")
     
-    # Search DSOs
-    dso_db = Path('dso_extracted/dso_search.db')
-    dso_results = search_dsos(query, dso_db)
-    
-    # Search stars
-    star_db = Path('stars_extracted/star_search.db')
-    star_results = search_stars(query, star_db)
+    with SkySearcher() as searcher:
+        dso_results, star_results = searcher.search(query)
     
     # Display results
     if dso_results:
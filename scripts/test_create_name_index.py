@@ -0,0 +1,101 @@
+"""
+Regression tests of the incremental rebuild of create_name_index.py: after
+a catalog change it must write the same outputs as a full rebuild.
+Usage: python -m pytest scripts/test_create_name_index.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import create_name_index
+from create_name_index import OUTPUTS
+
+STARS = [
+    {'hip': 32349, 'hd': 48915, 'vmag': -1.44, 'ra': 101.29, 'de': -16.72,
+     'ids': 'Sirius|* alf CMa'},
+    {'hip': 91262, 'hd': 172167, 'vmag': 0.03, 'ra': 279.23, 'de': 38.78,
+     'ids': 'Vega|* alf Lyr'},
+    {'hip': 677, 'hd': 358, 'vmag': 2.07, 'ra': 2.10, 'de': 29.09,
+     'ids': 'Alpheratz|* alf And'},
+]
+
+DSOS = [
+    {'type': 'G', 'vmag': 3.44, 'ra': 10.68, 'de': 41.27, 'short_name': 'M 31',
+     'ids': 'M 31|NGC 224|NAME Andromeda Galaxy'},
+    {'type': 'G', 'vmag': 7.86, 'ra': 210.80, 'de': 54.35, 'short_name': 'M 101',
+     'ids': 'M 101|NGC 5457|NAME Pinwheel Galaxy'},
+    {'type': 'G', 'vmag': 8.31, 'ra': 23.46, 'de': 30.66, 'short_name': 'M 33',
+     'ids': 'M 33|NGC 598|NAME Pinwheel Galaxy|NAME Triangulum galaxy'},
+    {'type': 'G', 'vmag': 8.6, 'ra': 23.47, 'de': 30.67, 'short_name': '',
+     'ids': 'NAME TRIANGULUM GALAXY'},
+]
+
+def write_catalogs(directory, stars, dsos):
+    for path, rows in (('stars_extracted/star_data.json', stars),
+                       ('dso_extracted/dso_data.json', dsos)):
+        path = Path(directory) / path
+        path.parent.mkdir(exist_ok=True)
+        mtime = path.stat().st_mtime_ns if path.exists() else 0
+        path.write_text(json.dumps(rows), encoding='utf-8')
+        # A rewrite within the clock resolution must still look modified
+        if path.stat().st_mtime_ns <= mtime:
+            os.utime(path, ns=(mtime + 1000, mtime + 1000))
+
+def build(directory, *args):
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        with mock.patch.object(sys, 'argv', ['create_name_index.py', *args]):
+            create_name_index.main()
+    finally:
+        os.chdir(cwd)
+
+def outputs(directory):
+    contents = {}
+    for name in OUTPUTS.values():
+        path = Path(directory) / 'name_index' / name
+        for f in sorted(path.rglob('*')) if path.is_dir() else [path]:
+            if f.is_file():
+                contents[str(f.relative_to(directory))] = f.read_bytes()
+    return contents
+
+def check_incremental(stars, dsos, new_stars, new_dsos):
+    with tempfile.TemporaryDirectory() as incremental, tempfile.TemporaryDirectory() as full:
+        write_catalogs(incremental, stars, dsos)
+        build(incremental)
+        write_catalogs(incremental, new_stars, new_dsos)
+        build(incremental)
+        write_catalogs(full, new_stars, new_dsos)
+        build(full, '--full')
+        assert outputs(incremental) == outputs(full)
+
+def test_dso_reorder():
+    # 'NAME Pinwheel Galaxy' changes owner, and 'NAME Triangulum galaxy' /
+    # 'NAME TRIANGULUM GALAXY' (same sort key) swap places
+    check_incremental(STARS, DSOS, STARS, DSOS[::-1])
+
+def test_star_reorder():
+    check_incremental(STARS, DSOS, STARS[::-1], DSOS)
+
+def test_name_ownership_change():
+    # A star claiming a DSO name moves it to the star names of the compact
+    # index and of the text list, its entry staying the DSO one
+    stars = [dict(STARS[0], ids=STARS[0]['ids'] + '|M 31'), *STARS[1:]]
+    check_incremental(STARS, DSOS, stars, DSOS)
+    check_incremental(stars, DSOS, STARS, DSOS)
+
+def test_metadata_change():
+    dsos = [dict(DSOS[0], vmag=3.4), *DSOS[1:]]
+    check_incremental(STARS, DSOS, STARS, dsos)
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"{name}: ok")
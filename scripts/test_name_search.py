@@ -0,0 +1,50 @@
+"""
+Regression tests of the trigram fuzzy matching of name_search.py.
+Usage: python -m pytest scripts/test_name_search.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from name_search import NgramIndex, normalize_name, substring_distance
+
+NAMES = ['Antares', 'Vega', 'Sirius', 'Betelgeuse', 'Rigel', 'Polaris', 'NGC 224',
+         'Andromeda Galaxy', 'Vela', 'Antlia Dwarf']
+
+def fuzzy_names(index, query, edits=None):
+    return sorted(index.keys[i] for _, i in index.fuzzy(query, edits))
+
+def make_index():
+    return NgramIndex.build(sorted(normalize_name(name) for name in NAMES))
+
+def test_transposition_is_one_edit():
+    assert substring_distance('antraes', 'antares', 1) == 1
+    assert substring_distance('vgea', 'vega', 1) == 1
+
+def test_transposed_typos_are_found():
+    # A transposition changes up to 4 trigrams: 'antraes' shares only 'ant'
+    # with 'antares', 'vgea' shares none with 'vega'
+    index = make_index()
+    assert 'antares' in fuzzy_names(index, 'Antraes')
+    assert fuzzy_names(index, 'Vgea') == ['vega']
+    assert 'betelgeuse' in fuzzy_names(index, 'Btelegeuse')
+
+def test_short_query_substitution_and_insertion():
+    index = make_index()
+    assert fuzzy_names(index, 'Vxga') == ['vega']
+    assert fuzzy_names(index, 'Rigl') == ['rigel']
+    assert 'sirius' in fuzzy_names(index, 'Siruis')
+
+def test_fuzzy_matches_full_scan():
+    index = make_index()
+    for query in ('vgea', 'vlea', 'antraes', 'polrais', 'ngc 242', 'sirus'):
+        expected = sorted(key for key in index.keys if substring_distance(query, key, 1) <= 1)
+        assert fuzzy_names(index, query, 1) == expected, query
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"{name}: ok")
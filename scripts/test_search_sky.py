@@ -0,0 +1,72 @@
+"""
+Regression tests of the full-text search ranking of search_sky.py.
+Usage: python -m pytest scripts/test_search_sky.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from create_search_index import create_dso_index, create_star_index
+from search_sky import SkySearcher
+
+STARS = [
+    {'hip': 24436, 'hd': 34085, 'vmag': 0.18, 'ra': 78.63, 'de': -8.20,
+     'ids': 'Rigel|* bet Ori|* 19 Ori'},
+    {'hip': 27989, 'hd': 39801, 'vmag': 0.45, 'ra': 88.79, 'de': 7.41,
+     'ids': 'Betelgeuse|* alf Ori|* 58 Ori'},
+    {'hip': 25930, 'hd': 36486, 'vmag': 2.25, 'ra': 83.00, 'de': -0.30,
+     'ids': 'Mintaka|* del Ori|* 34 Ori'},
+    {'hip': 28716, 'hd': 41361, 'vmag': 5.16, 'ra': 90.98, 'de': 9.65,
+     'ids': '* g Ori|* 6 Ori'},
+    {'hip': 24674, 'hd': 35039, 'vmag': 4.13, 'ra': 79.40, 'de': -3.53,
+     'ids': '* e Ori|* 29 Ori'},
+    {'hip': 32349, 'hd': 48915, 'vmag': -1.44, 'ra': 101.29, 'de': -16.72,
+     'ids': 'Sirius|* alf CMa|* 9 CMa'},
+]
+
+DSOS = [
+    {'type': 'OpC', 'vmag': 4.59, 'ra': 322.96, 'de': 48.43, 'snam': 'M 39',
+     'ids': 'M 39|NGC 7092'},
+    {'type': 'G', 'vmag': 3.44, 'ra': 10.68, 'de': 41.27, 'snam': 'M 31',
+     'ids': 'M 31|NGC 224|NAME Andromeda Galaxy'},
+    {'type': 'GlC', 'vmag': 6.38, 'ra': 205.55, 'de': 28.38, 'snam': 'M 3',
+     'ids': 'M 3|NGC 5272'},
+    {'type': 'G', 'vmag': 2.5, 'ra': 11.0, 'de': 40.0, 'snam': 'X 1',
+     'ids': 'X 1|NAME Andromeda Galaxy Halo'},
+]
+
+def make_searcher(directory):
+    directory = Path(directory)
+    for name, rows in (('stars.json', STARS), ('dsos.json', DSOS)):
+        (directory / name).write_text(json.dumps(rows), encoding='utf-8')
+    create_star_index(directory / 'stars.json', directory / 'stars.db')
+    create_dso_index(directory / 'dsos.json', directory / 'dsos.db')
+    return SkySearcher(directory / 'dsos.db', directory / 'stars.db')
+
+def star_names(rows):
+    return [row[6].split('|')[0] for row in rows]
+
+def test_constellation_query_returns_brightest_stars_first():
+    with tempfile.TemporaryDirectory() as directory, make_searcher(directory) as searcher:
+        assert searcher.has_fts['stars']
+        assert star_names(searcher.search_stars('Ori', 2)) == ['Rigel', 'Betelgeuse']
+        assert star_names(searcher.search_stars('Ori', 10)) == star_names(
+            searcher.search_stars('Ori', 10, use_fts=False))
+
+def test_exact_and_prefix_names_first():
+    with tempfile.TemporaryDirectory() as directory, make_searcher(directory) as searcher:
+        assert [row[5] for row in searcher.search_dsos('M 3')] == ['M 3', 'M 31', 'M 39']
+        # 'NAME ' is ignored: an exact match beats a brighter prefix match
+        assert [row[5] for row in searcher.search_dsos('Andromeda Galaxy')] == ['M 31', 'X 1']
+        assert star_names(searcher.search_stars('Sirius')) == ['Sirius']
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"{name}: ok")
@@ -0,0 +1,134 @@
+"""
+Incremental extraction cache for .eph tiles.
+
+The cache directory contains a manifest.json recording, for each tile file
+(by path relative to the survey root), its size, mtime, content hash and the
+chunks extracted from it.  The decoded column arrays of a tile are stored in
+<hash>.npz, so a re-run only decodes the tiles that are new or whose content
+changed, and reuses the cached tables for the others.  Entries of tiles that
+were deleted from the survey are evicted when the cache is saved.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+CACHE_VERSION = 1
+
+def file_hash(path):
+    """Return the sha1 hex digest of a file content"""
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+class TileCache:
+    """
+    Cache of the decoded tables of each tile file.
+
+    Args:
+        cache_dir: Directory where the manifest and the tables are stored.
+        root: Root directory of the survey (tiles are keyed relative to it).
+        key: String identifying the decoder settings; a cache written with
+             a different key is discarded.
+    """
+
+    def __init__(self, cache_dir, root, key):
+        self.cache_dir = Path(cache_dir)
+        self.root = Path(root)
+        self.key = key
+        self.tiles = {}
+        self.stats = {'reused': 0, 'decoded': 0, 'evicted': 0}
+        self._hashes = {}
+
+        manifest_file = self.cache_dir / 'manifest.json'
+        if manifest_file.exists():
+            try:
+                with open(manifest_file, 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+                if manifest.get('version') == CACHE_VERSION and manifest.get('key') == key:
+                    self.tiles = manifest['tiles']
+            except (ValueError, KeyError):
+                print(f"Warning: ignoring invalid cache manifest {manifest_file}")
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _name(self, path):
+        return Path(path).relative_to(self.root).as_posix()
+
+    def _hash(self, path):
+        name = self._name(path)
+        if name not in self._hashes:
+            self._hashes[name] = file_hash(path)
+        return self._hashes[name]
+
+    def is_fresh(self, path):
+        """Return True if the tile file is cached and didn't change since"""
+        entry = self.tiles.get(self._name(path))
+        if entry is None:
+            return False
+        st = os.stat(path)
+        if entry['size'] != st.st_size or entry['mtime'] != st.st_mtime_ns:
+            # Only hash the file when its stat changed
+            if st.st_size != entry['size'] or self._hash(path) != entry['hash']:
+                return False
+            entry['mtime'] = st.st_mtime_ns
+        return (self.cache_dir / f"{entry['hash']}.npz").exists()
+
+    def get(self, path):
+        """
+        Return the cached list of (nuniq, table) of a tile file, or None if
+        the tile is not in the cache or changed since it was cached.
+        """
+        if not self.is_fresh(path):
+            return None
+        entry = self.tiles[self._name(path)]
+        results = []
+        with np.load(self.cache_dir / f"{entry['hash']}.npz") as data:
+            for i, chunk in enumerate(entry['chunks']):
+                table = {name: data[f'{i}_{name}'] for name in chunk['columns']}
+                results.append((chunk['nuniq'], table))
+        self.stats['reused'] += 1
+        return results
+
+    def put(self, path, results):
+        """Store the decoded list of (nuniq, table) of a tile file"""
+        st = os.stat(path)
+        digest = self._hash(path)
+        arrays = {}
+        chunks = []
+        for i, (nuniq, table) in enumerate(results):
+            chunks.append({'nuniq': nuniq, 'columns': list(table),
+                           'rows': len(next(iter(table.values()), []))})
+            for name, values in table.items():
+                arrays[f'{i}_{name}'] = values
+        np.savez(self.cache_dir / f'{digest}.npz', **arrays)
+        self.tiles[self._name(path)] = {
+            'size': st.st_size,
+            'mtime': st.st_mtime_ns,
+            'hash': digest,
+            'chunks': chunks,
+        }
+        self.stats['decoded'] += 1
+
+    def save(self):
+        """Evict the deleted tiles and write the manifest"""
+        for name in list(self.tiles):
+            if not (self.root / name).exists():
+                del self.tiles[name]
+                self.stats['evicted'] += 1
+
+        # Remove the tables that are no longer referenced
+        used = {entry['hash'] for entry in self.tiles.values()}
+        for table_file in self.cache_dir.glob('*.npz'):
+            if table_file.stem not in used:
+                table_file.unlink()
+
+        manifest = {'version': CACHE_VERSION, 'key': self.key, 'tiles': self.tiles}
+        tmp_file = self.cache_dir / 'manifest.json.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(tmp_file, self.cache_dir / 'manifest.json')
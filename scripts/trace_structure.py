@@ -1,21 +1,28 @@
 import struct
 
-f = open(r'apps\web-frontend\public\skydata\dso\Norder0\Dir0\Npix0.eph', 'rb')
-data = f.read()
-f.close()
+from eph import EphFile
+
+eph = EphFile(r'apps\web-frontend\public\skydata\dso\Norder0\Dir0\Npix0.eph')
+data = eph.data
 
 print("=== FILE STRUCTURE ===\n")
 
 # File header
 print("File header (offset 0-8):")
-print(f"  Magic: {data[0:4]}")
-print(f"  File version: {struct.unpack('<I', data[4:8])[0]}")
+print(f"  Magic: {bytes(data[0:4])}")
+print(f"  File version: {eph.version}")
+
+# Chunks list
+print("\nChunks:")
+for chunk in eph.chunks():
+    print(f"  {chunk['type']!r}: data offset {chunk['offset']}, size {chunk['size']}, crc {chunk['crc']:08x}")
 
 # Chunk header
-offset = 8
+chunk = eph.find_chunk('DSO ')
+offset = chunk['offset'] - 8
 print(f"\nChunk header (offset {offset}-{offset+8}):")
-chunk_type = data[offset:offset+4]
-chunk_size = struct.unpack('<I', data[offset+4:offset+8])[0]
+chunk_type = chunk['type']
+chunk_size = chunk['size']
 print(f"  Type: {chunk_type}")
 print(f"  Size: {chunk_size}")
 
@@ -47,8 +54,8 @@ col_offset = table_offset + 16
 print(f"\nColumn definitions start at offset {col_offset}:")
 for i in range(min(3, n_col)):  # Show first 3 columns
     print(f"\nColumn {i} (offset {col_offset + i*20}-{col_offset + (i+1)*20}):")
-    col_name_bytes = data[col_offset + i*20:col_offset + i*20+4]
-    col_type_bytes = data[col_offset + i*20+4:col_offset + i*20+8]
+    col_name_bytes = bytes(data[col_offset + i*20:col_offset + i*20+4])
+    col_type_bytes = bytes(data[col_offset + i*20+4:col_offset + i*20+8])
     col_unit = struct.unpack('<I', data[col_offset + i*20+8:col_offset + i*20+12])[0]
     col_start = struct.unpack('<I', data[col_offset + i*20+12:col_offset + i*20+16])[0]
     col_size = struct.unpack('<I', data[col_offset + i*20+16:col_offset + i*20+20])[0]
@@ -59,3 +66,6 @@ for i in range(min(3, n_col)):  # Show first 3 columns
     print(f"  Name: '{col_name}' (bytes: {col_name_bytes.hex()})")
     print(f"  Type: '{col_type[0] if col_type else ''}' (bytes: {col_type_bytes.hex()})")
     print(f"  Unit: {col_unit}, Start: {col_start}, Size: {col_size}")
+
+del chunk, data
+eph.close()
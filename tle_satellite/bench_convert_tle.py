@@ -0,0 +1,128 @@
+"""
+Throughput and memory benchmark of convert_tle.py.
+Compares the streaming converter with the original readlines() loop on a
+synthetic dump (or a given TLE file), in records/s and peak memory.  The
+NORAD number dedup holds one record per object, it is measured apart.
+Usage: python bench_convert_tle.py [n_records | tle_file]
+"""
+
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from io import StringIO
+
+from convert_tle import convert_and_filter, get_group, get_launch_date, parse_norad_id
+
+SAMPLE_TLE = (
+    "1 {norad:05d}U 58002B   25{day:03d}.05824217  .00000017  00000-0  48301-4 0  9999",
+    "2 {norad:05d}  34.2413 137.8836 1839953  64.3619 313.5368 10.85939234424134",
+)
+NAMES = ('STARLINK-{}', 'COSMOS {}', 'ONEWEB-{}', 'IRIDIUM {}', 'SAT {}', 'FALCON 9 DEB {}')
+
+def write_sample(path, n):
+    """Write n three-line records with epochs spread over 2025"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(n):
+            f.write(f"0 {NAMES[i % len(NAMES)].format(i)}\n")
+            for line in SAMPLE_TLE:
+                f.write(line.format(norad=i % 100000, day=1 + i % 365) + '\n')
+
+def convert_readlines(input_file, output_file, max_age_days, now):
+    """Reference implementation: the original whole-file loop"""
+    with open(input_file, 'r', encoding='utf-8') as f_in, \
+         open(output_file, 'w', encoding='utf-8') as f_out:
+        lines = f_in.readlines()
+        i = 0
+        while i < len(lines):
+            line = lines[i].strip()
+            if not line:
+                i += 1
+                continue
+            if not (i + 2 < len(lines) and lines[i + 1].startswith('1 ')
+                    and lines[i + 2].startswith('2 ')):
+                i += 1
+                continue
+            line0, line1, line2 = line, lines[i + 1].strip(), lines[i + 2].strip()
+            i += 3
+            name = line0[2:].strip() if line0.startswith('0 ') else line0
+            if "TBA" in name.upper():
+                continue
+            epoch_str = line1[18:32].strip()
+            year = int(epoch_str[:2])
+            year = year + 2000 if year < 57 else year + 1900
+            epoch = datetime(year, 1, 1) + timedelta(days=float(epoch_str[2:]) - 1)
+            if (now - epoch).days > max_age_days:
+                continue
+            if any(m in name.upper() for m in (' DEB', ' R/B', ' DEBRIS', ' ROCKET BODY')):
+                continue
+            norad_number = parse_norad_id(line1[2:7])
+            designation = line1[9:17].strip()
+            f_out.write(json.dumps({
+                "types": ["Asa"], "model": "tle_satellite",
+                "model_data": {
+                    "norad_number": norad_number, "designation": designation,
+                    "tle": [line1, line2], "group": get_group(name),
+                    "status": "Operational", "owner": "Unknown",
+                    "launch_date": get_launch_date(designation) or "Unknown"},
+                "names": [f"NAME {name}", f"NORAD {norad_number}"],
+                "short_name": name, "interest": 1.0}, ensure_ascii=False) + '\n')
+
+def measure(func, *args, repeat=3):
+    """(best time in seconds, peak traced memory in bytes) of func(*args), stdout muted"""
+    with redirect_stdout(StringIO()):
+        seconds = None
+        for _ in range(repeat):
+            t = time.perf_counter()
+            func(*args)
+            t = time.perf_counter() - t
+            seconds = t if seconds is None else min(seconds, t)
+        tracemalloc.start()
+        func(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return seconds, peak
+
+def main():
+    arg = sys.argv[1] if len(sys.argv) > 1 else '70000'
+    now = datetime(2026, 1, 1)
+    max_age_days = 365
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if arg.isdigit():
+            input_file = os.path.join(tmp, 'tle_base.txt')
+            write_sample(input_file, int(arg))
+        else:
+            input_file = arg
+        gz_file = os.path.join(tmp, 'tle_base.txt.gz')
+        with open(input_file, 'rb') as f_in, gzip.open(gz_file, 'wb') as f_out:
+            f_out.write(f_in.read())
+        with open(input_file, 'r', encoding='utf-8') as f:
+            n = sum(1 for line in f if line.startswith('1 '))
+        print(f"{n} records, {os.path.getsize(input_file) / 1e6:.1f} MB "
+              f"({os.path.getsize(gz_file) / 1e6:.1f} MB gzip)\n")
+
+        unix_now = (now - datetime(1970, 1, 1)).total_seconds()
+        output_file = os.path.join(tmp, 'out.jsonl')
+        runs = [
+            ('readlines (original)', convert_readlines, input_file, output_file,
+             max_age_days, now),
+            ('streaming', convert_and_filter, input_file, output_file,
+             max_age_days, True, unix_now, False),
+            ('streaming, gzip input', convert_and_filter, gz_file, output_file,
+             max_age_days, True, unix_now, False),
+            ('streaming, dedup', convert_and_filter, input_file, output_file,
+             max_age_days, True, unix_now, True),
+        ]
+        print(f"{'':<24} {'records/s':>10} {'peak memory':>12}")
+        for label, func, *args in runs:
+            seconds, peak = measure(func, *args)
+            print(f"{label:<24} {n / seconds:>10.0f} {peak / 1e6:>9.1f} MB")
+
+if __name__ == "__main__":
+    main()
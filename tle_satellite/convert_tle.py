@@ -1,6 +1,13 @@
-import json
+import argparse
+import gzip
+import math
 import os
-from datetime import datetime, timedelta
+import re
+import time
+from collections import namedtuple
+from datetime import date
+from functools import lru_cache
+from json.encoder import encode_basestring
 
 # Configuration
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -11,32 +18,61 @@ OUTPUT_FILE = os.path.join(BASE_DIR, 'apps', 'web-frontend', 'public', 'skydata'
 MAX_AGE_DAYS = 60  # Only include TLEs updated in the last 60 days
 FILTER_OPERATIONAL = True  # Try to exclude debris and rocket bodies
 
+# Number of JSON lines written at once
+WRITE_BATCH = 1024
+
+# Known debris and rocket body markers (' DEB' also covers ' DEBRIS')
+NOT_OPERATIONAL_RE = re.compile(r' DEB| R/B| ROCKET BODY')
+
+# Name markers -> group, first match wins
+GROUP_MARKERS = (
+    ("STARLINK", "Starlink"),
+    ("ONEWEB", "OneWeb"),
+    ("GLONASS", "Glonass"),
+    ("GPS", "GPS"),
+    ("COSMOS", "Cosmos"),
+    ("BEIDOU", "Beidou"),
+    ("IRIDIUM", "Iridium"),
+    ("ISS", "ISS"),
+    ("ZARYA", "ISS"),
+)
+
+UNIX_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+def tle_year(year_part):
+    """Four digit year of a two digit TLE year (assumes 1957-2056 range)"""
+    return year_part + 2000 if year_part < 57 else year_part + 1900
+
+@lru_cache(maxsize=None)
+def year_start(year):
+    """Days since 1970-01-01 of January 1st of year"""
+    return date(year, 1, 1).toordinal() - UNIX_EPOCH_ORDINAL
+
 def parse_tle_epoch(tle_line1):
-    """Extract epoch from TLE line 1: YYDDD.DDDDDDDD"""
+    """
+    Extract epoch from TLE line 1: YYDDD.DDDDDDDD.
+    Returns days since 1970-01-01 (UTC) as a float, or None if invalid.
+    """
     try:
         epoch_str = tle_line1[18:32].strip()
-        year_part = int(epoch_str[:2])
-        # Assumes 1957-2056 range
-        year = year_part + 2000 if year_part < 57 else year_part + 1900
+        year = tle_year(int(epoch_str[:2]))
         day_of_year = float(epoch_str[2:])
-        
-        # Calculate the date
-        epoch = datetime(year, 1, 1) + timedelta(days=day_of_year - 1)
-        return epoch
-    except Exception:
+    except (ValueError, IndexError):
         return None
+    if not math.isfinite(day_of_year):
+        return None
+    return year_start(year) + day_of_year - 1
+
+def days_now(now=None):
+    """Days since 1970-01-01 of now (a unix time, default current time)"""
+    return (time.time() if now is None else now) / 86400
 
 def is_operational(name):
     """
     Heuristic to check if a satellite is likely operational.
     Excludes known debris and rocket body markers.
     """
-    name = name.upper()
-    exclude_markers = [' DEB', ' R/B', ' DEBRIS', ' ROCKET BODY']
-    for marker in exclude_markers:
-        if marker in name:
-            return False
-    return True
+    return NOT_OPERATIONAL_RE.search(name.upper()) is None
 
 def alphatoneumeric(char):
     """Convert Alpha-5 character to base-10 prefix"""
@@ -52,7 +88,7 @@ def parse_norad_id(id_str):
     id_str = id_str.strip()
     if id_str.isdigit():
         return int(id_str)
-    
+
     # Handle Alpha-5 (e.g. T0000)
     try:
         prefix = alphatoneumeric(id_str[0])
@@ -63,137 +99,184 @@ def parse_norad_id(id_str):
 
 def get_launch_date(designation):
     """
-    Extract launch year from designation (COSPAR ID: YYNNNSSS)
-    Example: 63014D -> 1963
+    Launch date (January 1st of the launch year) from designation
+    (COSPAR ID: YYNNNSSS) as 'YYYY-MM-DD', or None
+    Example: 63014D -> 1963-01-01
     """
     designation = designation.strip()
-    if not designation or len(designation) < 2:
-        return None
-    
-    try:
-        year_part = int(designation[:2])
-        year = year_part + 2000 if year_part < 57 else year_part + 1900
-        return datetime(year, 1, 1)
-    except Exception:
+    if len(designation) < 2 or not designation[:2].isdigit():
         return None
+    return f"{tle_year(int(designation[:2]))}-01-01"
 
 def get_group(name):
     """Heuristic to group satellites based on their name"""
     name = name.upper()
-    if "STARLINK" in name:
-        return ["Starlink"]
-    if "ONEWEB" in name:
-        return ["OneWeb"]
-    if "GLONASS" in name:
-        return ["Glonass"]
-    if "GPS" in name:
-        return ["GPS"]
-    if "COSMOS" in name:
-        return ["Cosmos"]
-    if "BEIDOU" in name:
-        return ["Beidou"]
-    if "IRIDIUM" in name:
-        return ["Iridium"]
-    if "ISS" in name or "ZARYA" in name:
-        return ["ISS"]
+    for marker, group in GROUP_MARKERS:
+        if marker in name:
+            return [group]
     return ["Satellites"]
 
-def convert_and_filter():
-    if not os.path.exists(INPUT_FILE):
-        print(f"Error: Input file not found at {INPUT_FILE}")
-        return
+def open_tle(path):
+    """Open a text file for reading, decompressing it if it is gzip compressed"""
+    with open(path, 'rb') as f:
+        compressed = f.read(2) == b'\x1f\x8b'
+    if compressed:
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+def read_tle_records(lines):
+    """
+    Yield (line0, line1, line2) for every three-line record of an iterable
+    of lines: a name line followed by lines starting with '1 ' and '2 '.
+    Other lines are skipped.  Only three lines are held at a time.
+    """
+    window = []
+    for line in lines:
+        window.append(line)
+        if len(window) < 3:
+            continue
+        line0, line1, line2 = window
+        if line0.strip() and line1.startswith('1 ') and line2.startswith('2 '):
+            yield line0.strip(), line1.strip(), line2.strip()
+            window = []
+        else:
+            del window[0]
+
+# json.dumps() output of a satellite record, with the constant fields
+# preformatted: only the strings need escaping
+SATELLITE_JSON = (
+    '{{"types": ["Asa"], "model": "tle_satellite", "model_data": '
+    '{{"norad_number": {norad}, "designation": {designation}, "tle": [{line1}, {line2}], '
+    '"group": [{group}], "status": "Operational", "owner": "Unknown", '
+    '"launch_date": {launch_date}}}, "names": [{name_names}, {norad_name}], '
+    '"short_name": {name}, "interest": 1.0}}\n'
+)
 
-    current_date = datetime.now()
+def satellite_json(name, norad_number, designation, line1, line2, group=None):
+    """
+    JSONL record of a satellite in the format read by the frontend, group
+    defaulting to get_group(name)
+    """
+    return SATELLITE_JSON.format(
+        norad=norad_number, designation=encode_basestring(designation),
+        line1=encode_basestring(line1), line2=encode_basestring(line2),
+        group=encode_basestring(group or get_group(name)[0]),
+        launch_date=encode_basestring(get_launch_date(designation) or "Unknown"),
+        name_names=encode_basestring(f"NAME {name}"), norad_name=encode_basestring(f"NORAD {norad_number}"),
+        name=encode_basestring(name))
+
+# A TLE record: name, TLE lines, epoch (days since 1970) and its JSONL line
+# when it comes from an already converted catalog (None otherwise)
+Satellite = namedtuple('Satellite', 'name line1 line2 epoch json')
+
+def norad_number(sat):
+    return parse_norad_id(sat.line1[2:7])
+
+def tle_epoch(sat):
+    """Epoch field of line 1 as written (YYDDD.DDDDDDDD): tells TLEs of a satellite apart"""
+    return sat.line1[18:32].strip()
+
+def read_satellites(lines, stats):
+    """
+    Satellites of the three-line records of lines.  TBA (To Be Assigned)
+    names and invalid epochs are skipped and counted in stats 'filtered_tba'
+    and 'errors', 'total' counts all the records.
+    """
+    for line0, line1, line2 in read_tle_records(lines):
+        stats['total'] += 1
+        name = line0[2:].strip() if line0.startswith('0 ') else line0
+        if "TBA" in name.upper():
+            stats['filtered_tba'] += 1
+            continue
+        epoch = parse_tle_epoch(line1)
+        if epoch is None:
+            stats['errors'] += 1
+            continue
+        yield Satellite(name, line1, line2, epoch, None)
+
+def keep_latest(satellites, stats):
+    """
+    Freshest record (latest epoch, the first one on ties) of every NORAD
+    number, in order of first appearance.  stats['duplicates'] counts the
+    records left out.  One record per object is held until the input ends;
+    records without a NORAD number (0) are all kept.
+    """
+    latest = {}
+    for i, sat in enumerate(satellites):
+        key = norad_number(sat) or ('unknown', i)
+        kept = latest.get(key)
+        if kept is None:
+            latest[key] = sat
+            continue
+        stats['duplicates'] += 1
+        if sat.epoch > kept.epoch:
+            latest[key] = sat
+    yield from latest.values()
+
+def to_json(sat):
+    """JSONL line of a satellite"""
+    if sat.json is not None:
+        return sat.json
+    return satellite_json(sat.name, norad_number(sat), sat.line1[9:17].strip(),
+                          sat.line1, sat.line2)
+
+def write_lines(lines, *files):
+    """Write lines to every file in batches of WRITE_BATCH.  Returns the count."""
+    count = 0
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= WRITE_BATCH:
+            for f in files:
+                f.write(''.join(batch))
+            count += len(batch)
+            batch = []
+    for f in files:
+        f.write(''.join(batch))
+    return count + len(batch)
+
+def convert_and_filter(input_file=INPUT_FILE, output_file=OUTPUT_FILE,
+                       max_age_days=MAX_AGE_DAYS, filter_operational=FILTER_OPERATIONAL,
+                       now=None, dedup=True):
+    """
+    Convert a TLE dump (plain or gzip) to the frontend JSONL in one
+    streaming pass, keeping only the freshest record of every object if
+    dedup.  Returns the stats, or None if the input is missing.
+    """
+    if not os.path.exists(input_file):
+        print(f"Error: Input file not found at {input_file}")
+        return None
+
+    today = days_now(now)
     stats = {
         'total': 0,
         'converted': 0,
         'filtered_age': 0,
         'filtered_status': 0,
         'filtered_tba': 0,
+        'duplicates': 0,
         'errors': 0
     }
 
-    print(f"Starting conversion from {INPUT_FILE}...")
-    
-    with open(INPUT_FILE, 'r', encoding='utf-8') as f_in, \
-         open(OUTPUT_FILE, 'w', encoding='utf-8') as f_out:
-        
-        lines = f_in.readlines()
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
-            if not line:
-                i += 1
-                continue
-            
-            # Check if this is Line 0 (Name)
-            if (i+1 < len(lines) and lines[i+1].startswith('1 ')) and \
-               (i+2 < len(lines) and lines[i+2].startswith('2 ')):
-                
-                line0 = line
-                line1 = lines[i+1].strip()
-                line2 = lines[i+2].strip()
-                i += 3
+    def filtered(satellites):
+        for sat in satellites:
+            # TLE Time Filter (Data freshness)
+            if math.floor(today - sat.epoch) > max_age_days:
+                stats['filtered_age'] += 1
+            # Operational Filter (Heuristic)
+            elif filter_operational and NOT_OPERATIONAL_RE.search(sat.name.upper()):
+                stats['filtered_status'] += 1
             else:
-                i += 1
-                continue
-
-            stats['total'] += 1
-            
-            try:
-                # 1. Clean up name (Line 0)
-                name = line0[2:].strip() if line0.startswith('0 ') else line0.strip()
-                
-                # Filter out TBA (To Be Assigned)
-                if name.upper() == "TBA - TO BE ASSIGNED" or "TBA" in name.upper():
-                    stats['filtered_tba'] += 1
-                    continue
-
-                # 2. Extract Metadata from TLE
-                norad_str = line1[2:7]
-                norad_number = parse_norad_id(norad_str)
-                designation = line1[9:17].strip()
-                
-                # 3. TLE Time Filter (Data freshness)
-                epoch = parse_tle_epoch(line1)
-                if not epoch:
-                    stats['errors'] += 1
-                    continue
-                    
-                age_days = (current_date - epoch).days
-                if age_days > MAX_AGE_DAYS:
-                    stats['filtered_age'] += 1
-                    continue
-                
-                # 4. Operational Filter (Heuristic)
-                if FILTER_OPERATIONAL and not is_operational(name):
-                    stats['filtered_status'] += 1
-                    continue
-
-                # 5. Build JSON Object
-                launch_date_dt = get_launch_date(designation)
-                sat_obj = {
-                    "types": ["Asa"],
-                    "model": "tle_satellite",
-                    "model_data": {
-                        "norad_number": norad_number,
-                        "designation": designation,
-                        "tle": [line1, line2],
-                        "group": get_group(name),
-                        "status": "Operational",
-                        "owner": "Unknown",
-                        "launch_date": launch_date_dt.strftime('%Y-%m-%d') if launch_date_dt else "Unknown"
-                    },
-                    "names": [f"NAME {name}", f"NORAD {norad_number}"],
-                    "short_name": name,
-                    "interest": 1.0
-                }
-
-                f_out.write(json.dumps(sat_obj, ensure_ascii=False) + '\n')
-                stats['converted'] += 1
-            except Exception as e:
-                print(f"Error processing {line0}: {e}")
-                stats['errors'] += 1
+                yield sat
+
+    print(f"Starting conversion from {input_file}...")
+
+    with open_tle(input_file) as f_in, \
+         open(output_file, 'w', encoding='utf-8') as f_out:
+        satellites = filtered(read_satellites(f_in, stats))
+        if dedup:
+            satellites = keep_latest(satellites, stats)
+        stats['converted'] = write_lines(map(to_json, satellites), f_out)
 
     print("\n=== Conversion Summary ===")
     print(f"Total objects processed: {stats['total']}")
@@ -201,8 +284,25 @@ def convert_and_filter():
     print(f"Filtered out (TLE too old): {stats['filtered_age']}")
     print(f"Filtered out (not operational): {stats['filtered_status']}")
     print(f"Filtered out (TBA): {stats['filtered_tba']}")
+    print(f"Duplicates (older epoch of the same NORAD number): {stats['duplicates']}")
     print(f"Errors: {stats['errors']}")
-    print(f"\nResult saved to: {OUTPUT_FILE}")
+    print(f"\nResult saved to: {output_file}")
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert a TLE dump to tle_satellite.jsonl')
+    parser.add_argument('--input', default=INPUT_FILE,
+                        help='Three-line TLE file, optionally gzip compressed')
+    parser.add_argument('--output', default=OUTPUT_FILE)
+    parser.add_argument('--max-age-days', type=int, default=MAX_AGE_DAYS,
+                        help='Drop TLEs with an older epoch')
+    parser.add_argument('--keep-debris', action='store_true',
+                        help='Keep debris and rocket bodies')
+    parser.add_argument('--keep-duplicates', action='store_true',
+                        help='Keep every record of a NORAD number, not only the freshest')
+    args = parser.parse_args()
+    convert_and_filter(args.input, args.output, args.max_age_days, not args.keep_debris,
+                       dedup=not args.keep_duplicates)
 
 if __name__ == "__main__":
-    convert_and_filter()
+    main()
@@ -0,0 +1,279 @@
+"""
+Compact binary satellite catalog, written alongside tle_satellite.dat.
+
+Instead of one JSON object with two TLE strings per satellite, every TLE
+is stored as a fixed-width record of its parsed fields, in the fixed-point
+units of the TLE text so that the decoder rebuilds the exact lines (and
+JSONL records).  Names go to a string table and groups to a dictionary.
+
+Format (little-endian, gzip compressed like the .dat):
+    header        magic 'TLEB', version (u16), group count (u16),
+                  record count (u32), names blob size (u32)
+    groups        for every group: utf-8 length (u8) and bytes
+    records       record count x RECORD (see FIELDS)
+    name offsets  record count + 1 offsets (u32) into the names blob
+    names blob    concatenated utf-8 names
+
+Usage: python satellite_bin.py [--input tle_satellite.dat] [--output tle_satellite.bin]
+       python satellite_bin.py --decode [--input tle_satellite.bin] [--output tle_satellite.jsonl]
+"""
+
+import argparse
+import gzip
+import json
+import os
+import struct
+from collections import namedtuple
+
+from convert_tle import BASE_DIR, open_tle, satellite_json, tle_year, year_start
+
+SKYDATA_DIR = os.path.join(BASE_DIR, 'apps', 'web-frontend', 'public', 'skydata')
+CATALOG_FILE = os.path.join(SKYDATA_DIR, 'tle_satellite.dat')
+BINARY_FILE = os.path.join(SKYDATA_DIR, 'tle_satellite.bin')
+
+MAGIC = b'TLEB'
+VERSION = 1
+HEADER = struct.Struct('<4sHHII')
+
+# Record fields: (name, struct format), values are the integers of the TLE
+# text: angles in 1e-4 degrees, eccentricity in 1e-7, epoch day and mean
+# motion (derivative) in 1e-8, exponent fields as mantissa (1e-5) and
+# exponent.  Signs and the zero or space padding of the catalog number are
+# kept in 'flags' (FLAG_* bits), so that '-0' and '   20' survive.
+FIELDS = (
+    ('norad', 'I'),
+    ('classification', 'c'),
+    ('designation', '8s'),
+    ('epoch_year', 'B'),        # two digits
+    ('epoch_day', 'Q'),         # day of year, 1e-8 days
+    ('ndot', 'I'),              # first derivative of mean motion / 2, 1e-8 rev/day^2
+    ('nddot', 'I'),             # second derivative / 6, mantissa
+    ('nddot_exp', 'B'),
+    ('bstar', 'I'),             # drag term, mantissa
+    ('bstar_exp', 'B'),
+    ('ephemeris_type', 'c'),
+    ('element_number', 'H'),
+    ('inclination', 'I'),
+    ('raan', 'I'),
+    ('eccentricity', 'I'),
+    ('argp', 'I'),
+    ('mean_anomaly', 'I'),
+    ('mean_motion', 'I'),       # 1e-8 rev/day
+    ('revolution', 'I'),
+    ('flags', 'B'),
+    ('group', 'B'),             # index in the group dictionary
+)
+RECORD = struct.Struct('<' + ''.join(fmt for _, fmt in FIELDS))
+Record = namedtuple('Record', [name for name, _ in FIELDS])
+
+FLAG_NDOT = 1
+FLAG_NDDOT = 2
+FLAG_NDDOT_EXP = 4
+FLAG_BSTAR = 8
+FLAG_BSTAR_EXP = 16
+FLAG_NORAD_PADDED = 32  # Catalog number padded with spaces ('   20') instead of zeros
+
+# Mean elements in usual units, see mean_elements()
+MeanElements = namedtuple('MeanElements',
+                          'epoch inclination raan eccentricity argp mean_anomaly mean_motion bstar')
+
+def tle_checksum(line):
+    """Modulo 10 checksum of the first 68 characters of a TLE line"""
+    return sum(int(c) if c.isdigit() else c == '-' for c in line[:68]) % 10
+
+def format_norad(norad, padded=False):
+    """5 character catalog number, Alpha-5 above 99999 (inverse of parse_norad_id)"""
+    if norad < 100000:
+        return f"{norad:5d}" if padded else f"{norad:05d}"
+    return chr(55 + norad // 10000) + f"{norad % 10000:04d}"
+
+def format_exp(mantissa, exp, negative, exp_negative):
+    """TLE exponent field such as ' 48301-4'"""
+    return f"{'-' if negative else ' '}{mantissa:05d}{'-' if exp_negative else '+'}{exp}"
+
+def format_angle(value):
+    return f"{value // 10000:3d}.{value % 10000:04d}"
+
+def format_tle(record):
+    """The (line1, line2) of a record"""
+    flags = record.flags
+    norad = format_norad(record.norad, flags & FLAG_NORAD_PADDED)
+    epoch = f"{record.epoch_year:02d}{record.epoch_day // 10**8:03d}.{record.epoch_day % 10**8:08d}"
+    nddot = format_exp(record.nddot, record.nddot_exp, flags & FLAG_NDDOT, flags & FLAG_NDDOT_EXP)
+    bstar = format_exp(record.bstar, record.bstar_exp, flags & FLAG_BSTAR, flags & FLAG_BSTAR_EXP)
+    line1 = (f"1 {norad}{record.classification.decode()} {record.designation.decode()} {epoch} "
+             f"{'-' if flags & FLAG_NDOT else ' '}.{record.ndot:08d} {nddot} {bstar} "
+             f"{record.ephemeris_type.decode()} {record.element_number:4d}")
+    line2 = (f"2 {norad} {format_angle(record.inclination)} {format_angle(record.raan)} "
+             f"{record.eccentricity:07d} {format_angle(record.argp)} "
+             f"{format_angle(record.mean_anomaly)} {record.mean_motion // 10**8:2d}."
+             f"{record.mean_motion % 10**8:08d}{record.revolution:5d}")
+    return line1 + str(tle_checksum(line1)), line2 + str(tle_checksum(line2))
+
+def parse_fixed(text, decimals):
+    """Integer of a fixed-point TLE field such as ' 34.2413'"""
+    whole, _, fraction = text.strip().partition('.')
+    if len(fraction) != decimals:
+        raise ValueError(f"expected {decimals} decimals: {text!r}")
+    return int(whole or 0) * 10 ** decimals + int(fraction)
+
+def parse_exp(text):
+    """(mantissa, exponent, negative, exponent negative) of ' 48301-4'"""
+    if len(text) != 8 or text[0] not in ' +-' or text[6] not in '+-':
+        raise ValueError(f"bad exponent field: {text!r}")
+    return int(text[1:6]), int(text[7]), text[0] == '-', text[6] == '-'
+
+def parse_tle(line1, line2, norad, group=0):
+    """
+    Record of a TLE.  Raises ValueError if the lines cannot be stored
+    exactly (format_tle() would not give them back).
+    """
+    ndot = line1[33:43]
+    nddot, nddot_exp, nddot_neg, nddot_exp_neg = parse_exp(line1[44:52])
+    bstar, bstar_exp, bstar_neg, bstar_exp_neg = parse_exp(line1[53:61])
+    flags = ((FLAG_NDOT if ndot[0] == '-' else 0)
+             | (FLAG_NDDOT if nddot_neg else 0) | (FLAG_NDDOT_EXP if nddot_exp_neg else 0)
+             | (FLAG_BSTAR if bstar_neg else 0) | (FLAG_BSTAR_EXP if bstar_exp_neg else 0)
+             | (FLAG_NORAD_PADDED if line1[2] == ' ' else 0))
+    try:
+        record = Record(
+            norad=norad, classification=line1[7].encode(), designation=line1[9:17].encode(),
+            epoch_year=int(line1[18:20]), epoch_day=parse_fixed(line1[20:32], 8),
+            ndot=parse_fixed(ndot[1:], 8), nddot=nddot, nddot_exp=nddot_exp,
+            bstar=bstar, bstar_exp=bstar_exp, ephemeris_type=line1[62].encode(),
+            element_number=int(line1[64:68]),
+            inclination=parse_fixed(line2[8:16], 4), raan=parse_fixed(line2[17:25], 4),
+            eccentricity=int(line2[26:33]), argp=parse_fixed(line2[34:42], 4),
+            mean_anomaly=parse_fixed(line2[43:51], 4), mean_motion=parse_fixed(line2[52:63], 8),
+            revolution=int(line2[63:68]), flags=flags, group=group)
+        RECORD.pack(*record)
+    except (IndexError, UnicodeEncodeError, struct.error) as e:
+        raise ValueError(str(e)) from None
+    if format_tle(record) != (line1, line2):
+        raise ValueError("TLE not in the standard column format")
+    return record
+
+def mean_elements(record):
+    """
+    MeanElements of a record: epoch in days since 1970-01-01, angles in
+    degrees, mean motion in rev/day and bstar in 1/earth radii
+    """
+    bstar = record.bstar * 1e-5 * 10.0 ** (-record.bstar_exp if record.flags & FLAG_BSTAR_EXP
+                                           else record.bstar_exp)
+    return MeanElements(
+        epoch=year_start(tle_year(record.epoch_year)) + record.epoch_day * 1e-8 - 1,
+        inclination=record.inclination * 1e-4, raan=record.raan * 1e-4,
+        eccentricity=record.eccentricity * 1e-7, argp=record.argp * 1e-4,
+        mean_anomaly=record.mean_anomaly * 1e-4, mean_motion=record.mean_motion * 1e-8,
+        bstar=-bstar if record.flags & FLAG_BSTAR else bstar)
+
+def encode(lines, stats=None):
+    """
+    Binary catalog (uncompressed) of JSONL catalog lines.  Only the name,
+    group and TLE are stored, the other fields being rebuilt by
+    satellite_json(): records that cannot be stored exactly (TLE in a non
+    standard format, or any field differing from the converter output) are
+    left out and counted in stats['errors'].
+    """
+    stats = {'total': 0, 'encoded': 0, 'errors': 0} if stats is None else stats
+    groups = {}
+    records = []
+    names = []
+    for line in lines:
+        if not line.strip():
+            continue
+        stats['total'] += 1
+        try:
+            sat = json.loads(line)
+            model_data = sat['model_data']
+            name, group = sat.get('short_name', ''), model_data['group'][0]
+            line1, line2 = model_data['tle'][:2]
+            record = parse_tle(line1, line2, model_data['norad_number'])
+            if satellite_json(name, record.norad, record.designation.decode().strip(),
+                              line1, line2, group).rstrip('\n') != line.rstrip('\r\n'):
+                raise ValueError("fields differ from the converter output")
+            record = record._replace(group=groups.setdefault(group, len(groups)))
+            records.append(RECORD.pack(*record))
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            stats['errors'] += 1
+            print(f"Skipping {line[:80].strip()}: {e}")
+            continue
+        names.append(name.encode('utf-8'))
+    if len(groups) > 256:
+        raise ValueError(f"too many groups: {len(groups)}")
+    stats['encoded'] = len(records)
+
+    offsets = [0]
+    for name in names:
+        offsets.append(offsets[-1] + len(name))
+    blob = b''.join(names)
+    parts = [HEADER.pack(MAGIC, VERSION, len(groups), len(records), len(blob))]
+    for group in groups:
+        group = group.encode('utf-8')
+        parts.append(bytes([len(group)]) + group)
+    parts.extend(records)
+    parts.append(struct.pack(f'<{len(offsets)}I', *offsets))
+    parts.append(blob)
+    return b''.join(parts)
+
+def decode(data):
+    """(groups, records, names) of a binary catalog, gzip compressed or not"""
+    if data[:2] == b'\x1f\x8b':
+        data = gzip.decompress(data)
+    magic, version, group_count, count, blob_size = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"not a version {VERSION} binary satellite catalog")
+    pos = HEADER.size
+    groups = []
+    for _ in range(group_count):
+        size = data[pos]
+        groups.append(data[pos + 1:pos + 1 + size].decode('utf-8'))
+        pos += 1 + size
+    end = pos + count * RECORD.size
+    records = list(map(Record._make, RECORD.iter_unpack(data[pos:end])))
+    offsets = struct.unpack_from(f'<{count + 1}I', data, end)
+    blob = data[end + 4 * (count + 1):end + 4 * (count + 1) + blob_size]
+    names = [blob[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(count)]
+    return groups, records, names
+
+def to_jsonl(groups, records, names):
+    """Yield the JSONL catalog lines of decoded records"""
+    for record, name in zip(records, names):
+        line1, line2 = format_tle(record)
+        yield satellite_json(name, record.norad, record.designation.decode().strip(),
+                             line1, line2, groups[record.group])
+
+def main():
+    parser = argparse.ArgumentParser(description='Encode tle_satellite.dat as a binary catalog')
+    parser.add_argument('--decode', action='store_true',
+                        help='Decode a binary catalog back to JSONL')
+    parser.add_argument('--input', help=f'default {os.path.basename(CATALOG_FILE)} '
+                                        f'(or {os.path.basename(BINARY_FILE)} with --decode)')
+    parser.add_argument('--output', help=f'default {os.path.basename(BINARY_FILE)} '
+                                         '(or tle_satellite.jsonl with --decode)')
+    args = parser.parse_args()
+
+    if args.decode:
+        input_file = args.input or BINARY_FILE
+        output_file = args.output or os.path.join(SKYDATA_DIR, 'tle_satellite.jsonl')
+        with open(input_file, 'rb') as f:
+            decoded = decode(f.read())
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.writelines(to_jsonl(*decoded))
+        print(f"Decoded {len(decoded[1])} satellites from {input_file} to {output_file}")
+        return
+
+    input_file = args.input or CATALOG_FILE
+    output_file = args.output or BINARY_FILE
+    stats = {'total': 0, 'encoded': 0, 'errors': 0}
+    with open_tle(input_file) as f:
+        data = encode(f, stats)
+    with open(output_file, 'wb') as f:
+        f.write(gzip.compress(data))
+    print(f"Encoded {stats['encoded']} of {stats['total']} satellites ({stats['errors']} errors): "
+          f"{len(data) / 1024:.0f} KB, {os.path.getsize(output_file) / 1024:.0f} KB gzip "
+          f"(input {os.path.getsize(input_file) / 1024:.0f} KB)")
+    print(f"Result saved to: {output_file}")
+
+if __name__ == "__main__":
+    main()
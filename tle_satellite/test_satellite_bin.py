@@ -0,0 +1,58 @@
+import gzip
+import json
+import os
+import time
+
+from convert_tle import parse_tle_epoch
+from satellite_bin import decode, encode, mean_elements, to_jsonl
+
+# Base directory of the project
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+src = os.path.join(base_dir, 'apps', 'web-frontend', 'public', 'skydata', 'tle_satellite.dat')
+
+with open(src, 'rb') as f:
+    dat = f.read()
+with gzip.open(src, 'rt', encoding='utf-8') as f:
+    lines = f.readlines()
+
+stats = {'total': 0, 'encoded': 0, 'errors': 0}
+data = encode(lines, stats)
+packed = gzip.compress(data)
+print(f'Encoded {stats["encoded"]} of {stats["total"]} satellites, {stats["errors"]} errors')
+print(f'Size: {len(dat)} bytes gzip JSONL -> {len(packed)} bytes gzip binary '
+      f'({len(data)} uncompressed)')
+
+# Parse time, from the downloaded bytes to the TLEs of every satellite
+t = time.perf_counter()
+parsed = [json.loads(line)['model_data']['tle'] for line in gzip.decompress(dat).splitlines()]
+json_time = time.perf_counter() - t
+t = time.perf_counter()
+groups, records, names = decode(packed)
+binary_time = time.perf_counter() - t
+print(f'Parse: {json_time * 1000:.0f} ms JSON, {binary_time * 1000:.0f} ms binary')
+
+# Round trip: the decoder must give back the exact catalog lines
+decoded = list(to_jsonl(groups, records, names))
+mismatches = [(a, b) for a, b in zip(lines, decoded) if a != b]
+for a, b in mismatches[:5]:
+    print(f'Mismatch:\n  {a.strip()}\n  {b.strip()}')
+if len(decoded) == len(lines) and not mismatches:
+    print(f'SUCCESS! {len(decoded)} satellites decoded identically')
+else:
+    print(f'Error: {len(decoded)} decoded of {len(lines)}, {len(mismatches)} mismatches')
+
+# Pre-parsed elements agree with the TLE text
+bad_epochs = sum(abs(mean_elements(record).epoch - parse_tle_epoch(tle[0])) > 1e-6
+                 for record, tle in zip(records, parsed))
+print(f'Epochs: {bad_epochs} differences')
+
+assert not stats['errors'] and decoded == lines and not bad_epochs
+
+# Fields rebuilt by the decoder: a record differing from the converter
+# output is left out instead of silently changed
+edited = [lines[0].replace('"status": "Operational"', '"status": "Decayed"'),
+          lines[1].replace('"names": [', '"names": ["Extra name", '), lines[2]]
+stats = {'total': 0, 'encoded': 0, 'errors': 0}
+groups, records, names = decode(encode(edited, stats))
+print(f'Edited records: {stats["errors"]} of {len(edited)} left out')
+assert stats['errors'] == 2 and list(to_jsonl(groups, records, names)) == edited[2:]
@@ -0,0 +1,242 @@
+"""
+Satellite catalog pipeline: converts a TLE dump (or re-filters an existing
+tle_satellite.jsonl / .dat catalog) and writes the gzip compressed
+tle_satellite.dat read by the frontend, in one streaming pass through
+configurable stages:
+  age        drop TLEs with an epoch older than --max-age-days
+  status     drop debris and rocket bodies
+  blocklist  drop the satellites listed in the blocklist files
+  dedup      keep the freshest record of every NORAD number
+  sgp4       drop the satellites failing SGP4 propagation (validate_tle.py,
+             not run by default)
+Usage: python tle_pipeline.py [--input tle_base.txt] [--stages age,status,blocklist,dedup]
+                              [--blocklist blocklist.txt] [--jsonl tle_satellite.jsonl] [--force]
+"""
+
+import argparse
+import gzip
+import json
+import math
+import os
+import re
+
+from convert_tle import (BASE_DIR, INPUT_FILE, MAX_AGE_DAYS, NOT_OPERATIONAL_RE, Satellite,
+                         days_now, keep_latest, norad_number, open_tle, parse_tle_epoch,
+                         read_satellites, tle_epoch, to_json, write_lines)
+from validate_tle import HAS_SGP4, SGP4_BLOCKLIST_FILE, sgp4_stage
+
+OUTPUT_FILE = os.path.join(BASE_DIR, 'apps', 'web-frontend', 'public', 'skydata', 'tle_satellite.dat')
+BLOCKLIST_FILE = os.path.join(BASE_DIR, 'tle_satellite', 'blocklist.txt')
+
+STAGES = ('age', 'status', 'blocklist', 'dedup', 'sgp4')
+DEFAULT_STAGES = ('age', 'status', 'blocklist', 'dedup')
+
+# An output with fewer records than this fraction of the catalog it
+# replaces is kept aside unless forced (e.g. a truncated download)
+MIN_KEPT_FRACTION = 0.5
+
+# Blocklist entry of a single TLE: NORAD number and epoch (validate_tle.py)
+TLE_ENTRY_RE = re.compile(r'^(\d+)\s+(\d{5}\.\d+)$')
+
+class OutputRefused(RuntimeError):
+    """The new catalog is empty or much smaller than the one it would replace"""
+
+    def __init__(self, message, source, counters):
+        super().__init__(message)
+        self.source = source
+        self.counters = counters
+
+def default_blocklists():
+    """blocklist.txt, and the blocklist written by validate_tle.py if any"""
+    paths = [BLOCKLIST_FILE]
+    if os.path.exists(SGP4_BLOCKLIST_FILE):
+        paths.append(SGP4_BLOCKLIST_FILE)
+    return paths
+
+def read_catalog(lines, stats):
+    """
+    Satellites of an already converted catalog (JSONL lines), keeping the
+    lines as they are.  Records without a valid TLE are counted in
+    stats['errors'].
+    """
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        stats['total'] += 1
+        try:
+            sat = json.loads(line)
+            line1, line2 = sat['model_data']['tle'][:2]
+        except (ValueError, KeyError, TypeError):
+            stats['errors'] += 1
+            continue
+        epoch = parse_tle_epoch(line1)
+        if epoch is None:
+            stats['errors'] += 1
+            continue
+        yield Satellite(sat.get('short_name', ''), line1, line2, epoch, line + '\n')
+
+def count_records(path):
+    """Number of records of a catalog, 0 if it doesn't exist"""
+    if not os.path.exists(path):
+        return 0
+    with open_tle(path) as f:
+        return sum(1 for line in f if line.strip())
+
+def load_blocklist(paths):
+    """
+    (NORAD numbers, names, (NORAD number, epoch) TLEs) of blocklist files:
+    one satellite per line, a NORAD number or an exact name, or one TLE of
+    a satellite, its NORAD number and epoch field.  Text after '#' is a
+    comment.
+    """
+    norads, names, tles = set(), set(), set()
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                entry = line.split('#', 1)[0].strip()
+                match = TLE_ENTRY_RE.match(entry)
+                if entry.isdigit():
+                    norads.add(int(entry))
+                elif match:
+                    tles.add((int(match[1]), match[2]))
+                elif entry:
+                    names.add(entry)
+    return norads, names, tles
+
+def age_stage(satellites, counter, max_age_days=MAX_AGE_DAYS, now=None):
+    today = days_now(now)
+    for sat in satellites:
+        counter['in'] += 1
+        if math.floor(today - sat.epoch) <= max_age_days:
+            counter['out'] += 1
+            yield sat
+
+def status_stage(satellites, counter):
+    for sat in satellites:
+        counter['in'] += 1
+        if not NOT_OPERATIONAL_RE.search(sat.name.upper()):
+            counter['out'] += 1
+            yield sat
+
+def blocklist_stage(satellites, counter, blocklist):
+    norads, names, tles = blocklist
+    for sat in satellites:
+        counter['in'] += 1
+        norad = norad_number(sat)
+        if sat.name not in names and norad not in norads and (norad, tle_epoch(sat)) not in tles:
+            counter['out'] += 1
+            yield sat
+
+def dedup_stage(satellites, counter):
+    """Freshest record of every NORAD number"""
+    def counted():
+        for sat in satellites:
+            counter['in'] += 1
+            yield sat
+
+    for sat in keep_latest(counted(), {'duplicates': 0}):
+        counter['out'] += 1
+        yield sat
+
+def run_pipeline(input_file=INPUT_FILE, output_file=OUTPUT_FILE, stages=DEFAULT_STAGES,
+                 max_age_days=MAX_AGE_DAYS, blocklists=(BLOCKLIST_FILE,), jsonl_file=None,
+                 now=None, workers=1, force=False):
+    """
+    Read input_file (a TLE dump, or a .jsonl / .dat catalog), chain the
+    stages and write the gzip compressed output_file (and the plain
+    jsonl_file if given).  The output replaces the previous file only once
+    complete, so the input may be the output.  Unless force, raises
+    OutputRefused and leaves the previous file in place when no record was
+    written or fewer than MIN_KEPT_FRACTION of its records.  Returns
+    (source stats, {stage: {'in', 'out'}}).
+    """
+    source = {'total': 0, 'filtered_tba': 0, 'errors': 0}
+    counters = {stage: {'in': 0, 'out': 0} for stage in stages}
+    args = {
+        'age': (max_age_days, now),
+        'status': (),
+        'blocklist': (load_blocklist(blocklists),) if 'blocklist' in stages else (),
+        'dedup': (),
+        'sgp4': (workers, now),
+    }
+    stage_funcs = {'age': age_stage, 'status': status_stage,
+                   'blocklist': blocklist_stage, 'dedup': dedup_stage, 'sgp4': sgp4_stage}
+
+    is_catalog = input_file.endswith(('.jsonl', '.dat'))
+    tmp_file = output_file + '.tmp'
+    tmp_jsonl = jsonl_file + '.tmp' if jsonl_file else None
+    with open_tle(input_file) as f_in, \
+         gzip.open(tmp_file, 'wt', encoding='utf-8') as f_out, \
+         open(tmp_jsonl or os.devnull, 'w', encoding='utf-8') as f_jsonl:
+        satellites = (read_catalog if is_catalog else read_satellites)(f_in, source)
+        for stage in stages:
+            satellites = stage_funcs[stage](satellites, counters[stage], *args[stage])
+        files = (f_out, f_jsonl) if jsonl_file else (f_out,)
+        source['written'] = write_lines(map(to_json, satellites), *files)
+    if not force:
+        previous = count_records(output_file)
+        if source['written'] == 0 or source['written'] < previous * MIN_KEPT_FRACTION:
+            for path in (tmp_file, tmp_jsonl):
+                if path:
+                    os.remove(path)
+            raise OutputRefused(f"{source['written']} records written, {output_file} has "
+                                f"{previous}: not replacing it (--force replaces it anyway)",
+                                source, counters)
+    os.replace(tmp_file, output_file)
+    if jsonl_file:
+        os.replace(tmp_jsonl, jsonl_file)
+    return source, counters
+
+def print_summary(source, counters):
+    print(f"Records read: {source['total']} (TBA: {source['filtered_tba']}, "
+          f"errors: {source['errors']})")
+    print(f"{'stage':<10} {'in':>8} {'out':>8} {'dropped':>8}")
+    for stage, counter in counters.items():
+        print(f"{stage:<10} {counter['in']:>8} {counter['out']:>8} "
+              f"{counter['in'] - counter['out']:>8}")
+    print(f"Written: {source['written']}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Build tle_satellite.dat in one streaming pass')
+    parser.add_argument('--input', default=INPUT_FILE,
+                        help='Three-line TLE file (optionally gzip compressed), '
+                             'or a .jsonl / .dat catalog to filter again')
+    parser.add_argument('--output', default=OUTPUT_FILE, help='Gzip compressed JSONL catalog')
+    parser.add_argument('--jsonl', help='Also write the uncompressed JSONL catalog')
+    parser.add_argument('--stages', default=','.join(DEFAULT_STAGES),
+                        help=f"Comma separated stages, in order, among {', '.join(STAGES)}")
+    parser.add_argument('--max-age-days', type=int, default=MAX_AGE_DAYS,
+                        help='Age stage: drop TLEs with an older epoch')
+    parser.add_argument('--blocklist', action='append',
+                        help='Blocklist file, may be repeated (default blocklist.txt and '
+                             'blocklist_sgp4.txt if it exists)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='SGP4 stage: number of propagation processes')
+    parser.add_argument('--force', action='store_true',
+                        help='Replace the output even if no record, or less than '
+                             f'{MIN_KEPT_FRACTION:.0%} of its records, survive')
+    args = parser.parse_args()
+
+    stages = [stage.strip() for stage in args.stages.split(',') if stage.strip()]
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(unknown)}")
+    if 'sgp4' in stages and not HAS_SGP4:
+        parser.error("the sgp4 stage requires the sgp4 package: pip install sgp4")
+    if not os.path.exists(args.input):
+        parser.error(f"input file not found: {args.input}")
+
+    print(f"Reading {args.input}, stages: {' -> '.join(stages) or 'none'}")
+    try:
+        source, counters = run_pipeline(args.input, args.output, stages, args.max_age_days,
+                                        args.blocklist or default_blocklists(), args.jsonl,
+                                        workers=args.workers, force=args.force)
+    except OutputRefused as e:
+        print_summary(e.source, e.counters)
+        parser.exit(1, f"Error: {e}\n")
+    print_summary(source, counters)
+    print(f"\nResult saved to: {args.output}" + (f" and {args.jsonl}" if args.jsonl else ''))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Offline SGP4 validation of the satellite catalog: propagates every TLE at
+a batch of timestamps, the way the engine does (src/sgp4.cpp and
+satellite_update() in src/modules/satellites.c), and writes the NORAD
+numbers and TLE epochs of the satellites that fail (propagation error,
+decayed orbit or NaN position) to a blocklist read by tle_pipeline.py.
+An entry only drops that TLE: a newer one of the satellite goes through.
+Requires the sgp4 package (pip install sgp4), whose vectorized
+SatrecArray runs the same Vallado SGP4 code as ext_src/sgp4.
+Usage: python validate_tle.py [--input tle_satellite.dat] [--output blocklist_sgp4.txt]
+                              [--days 7] [--steps 29] [--workers N]
+"""
+
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+
+try:
+    from sgp4.api import WGS72, Satrec, SatrecArray
+    HAS_SGP4 = True
+except ImportError:
+    HAS_SGP4 = False
+
+from convert_tle import BASE_DIR, days_now, norad_number, open_tle, tle_epoch
+
+CATALOG_FILE = os.path.join(BASE_DIR, 'apps', 'web-frontend', 'public', 'skydata', 'tle_satellite.dat')
+SGP4_BLOCKLIST_FILE = os.path.join(BASE_DIR, 'tle_satellite', 'blocklist_sgp4.txt')
+
+UNIX_EPOCH_JD = 2440587.5
+CHUNK_SIZE = 2048  # Satellites propagated per task
+
+# The engine only propagates a satellite within 3600 days of its epoch
+# when the launch and decay dates are unknown (satellite_is_operational)
+OPERATIONAL_DAYS = 3600
+
+# SGP4 error codes (src/sgp4.h)
+SGP4_ERRORS = {
+    1: "mean elements, ecc >= 1.0 or ecc < -0.001 or a < 0.95 er",
+    2: "mean motion less than 0.0",
+    3: "pert elements, ecc < 0.0 or ecc > 1.0",
+    4: "semi-latus rectum < 0.0",
+    5: "epoch elements are sub-orbital",
+    6: "satellite has decayed",
+}
+
+def validation_times(now=None, days=7, steps=29):
+    """Days since 1970 of steps timestamps evenly spread over [now, now + days]"""
+    return days_now(now) + np.linspace(0, days, steps)
+
+def check_tles(tles, times):
+    """
+    Propagate (line1, line2, epoch) TLEs at times (days since 1970).
+    Returns one failure reason per TLE, None when it propagates fine.
+    """
+    reasons = [None] * len(tles)
+    satrecs, index = [], []
+    for i, (line1, line2, _) in enumerate(tles):
+        try:
+            # Same constants and 'improved' operation mode as the engine
+            satrecs.append(Satrec.twoline2rv(line1, line2, WGS72))
+            index.append(i)
+        except Exception as e:
+            reasons[i] = f"invalid TLE: {e}"
+    if not satrecs:
+        return reasons
+
+    day = np.floor(times)
+    errors, r, v = SatrecArray(satrecs).sgp4(UNIX_EPOCH_JD + day, times - day)
+    epochs = np.array([tles[i][2] for i in index])
+    operational = np.abs(times[None, :] - epochs[:, None]) < OPERATIONAL_DAYS
+    errors = np.where(operational, errors, 0)
+    nans = operational & (np.isnan(r).any(axis=2) | np.isnan(v).any(axis=2))
+
+    for k, i in enumerate(index):
+        # The engine stops at the first failure, report that one
+        failed = np.flatnonzero(errors[k] | nans[k])
+        if len(failed):
+            code = int(errors[k, failed[0]])
+            reasons[i] = (f"sgp4 error {code}: {SGP4_ERRORS.get(code, 'unknown')}" if code
+                          else "NaN position")
+    return reasons
+
+def chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def validate(satellites, times, workers=1, chunk_size=CHUNK_SIZE):
+    """
+    Yield (satellite, reason) for every satellite, in order, reason being
+    None when it propagates fine.  Chunks are propagated in a process pool
+    if workers > 1.
+    """
+    def tasks(satellite_chunks):
+        for chunk in satellite_chunks:
+            yield chunk, [(sat.line1, sat.line2, sat.epoch) for sat in chunk]
+
+    if workers <= 1:
+        for chunk, tles in tasks(chunks(satellites, chunk_size)):
+            yield from zip(chunk, check_tles(tles, times))
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = []
+        for chunk, tles in tasks(chunks(satellites, chunk_size)):
+            pending.append((chunk, executor.submit(check_tles, tles, times)))
+            # Keep a few chunks in flight per worker, not the whole catalog
+            if len(pending) >= 2 * workers:
+                chunk, future = pending.pop(0)
+                yield from zip(chunk, future.result())
+        for chunk, future in pending:
+            yield from zip(chunk, future.result())
+
+def sgp4_stage(satellites, counter, workers=1, now=None, days=7, steps=29):
+    """Pipeline stage (tle_pipeline.py): drop the satellites failing validation"""
+    times = validation_times(now, days, steps)
+    for sat, reason in validate(satellites, times, workers):
+        counter['in'] += 1
+        if reason is None:
+            counter['out'] += 1
+            yield sat
+
+def write_blocklist(path, flagged, header):
+    """Write (satellite, reason) pairs as a blocklist, one NORAD number and TLE epoch per line"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for line in header:
+            f.write(f"# {line}\n")
+        for sat, reason in sorted(flagged, key=lambda item: norad_number(item[0])):
+            f.write(f"{norad_number(sat)} {tle_epoch(sat)}  # {sat.name}: {reason}\n")
+
+def main():
+    from tle_pipeline import read_catalog
+
+    parser = argparse.ArgumentParser(description='Write the blocklist of satellites failing SGP4')
+    parser.add_argument('--input', default=CATALOG_FILE, help='.jsonl or .dat satellite catalog')
+    parser.add_argument('--output', default=SGP4_BLOCKLIST_FILE)
+    parser.add_argument('--days', type=float, default=7,
+                        help='Propagate from now to now + days')
+    parser.add_argument('--steps', type=int, default=29, help='Number of timestamps')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Number of propagation processes')
+    args = parser.parse_args()
+    if not HAS_SGP4:
+        parser.error("the sgp4 package is required: pip install sgp4")
+
+    times = validation_times(None, args.days, args.steps)
+    start = time.perf_counter()
+    stats = {'total': 0, 'filtered_tba': 0, 'errors': 0}
+    flagged = []
+    with open_tle(args.input) as f:
+        for sat, reason in validate(read_catalog(f, stats), times, args.workers):
+            if reason is not None:
+                flagged.append((sat, reason))
+    elapsed = time.perf_counter() - start
+
+    first, last = (datetime.fromtimestamp(t * 86400, timezone.utc).strftime('%Y-%m-%d %H:%M')
+                   for t in (times[0], times[-1]))
+    write_blocklist(args.output, flagged, [
+        f"Generated by validate_tle.py from {os.path.basename(args.input)}: satellites",
+        f"failing SGP4 propagation between {first} and {last} UTC ({args.steps} steps).",
+    ])
+    print(f"Propagated {stats['total']} satellites at {args.steps} timestamps "
+          f"in {elapsed:.2f} s ({stats['errors']} unreadable records)")
+    for code in sorted(SGP4_ERRORS):
+        count = sum(1 for _, reason in flagged if reason.startswith(f"sgp4 error {code}:"))
+        if count:
+            print(f"  error {code} ({SGP4_ERRORS[code]}): {count}")
+    print(f"Flagged: {len(flagged)}, blocklist written to: {args.output}")
+
+if __name__ == "__main__":
+    main()